@@ -0,0 +1,150 @@
+import threading
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import F
+from django.db.models.functions import Coalesce
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.settings import api_settings
+
+from .models import ClaimsUser, TokenVersion, User
+
+VERSION_CLAIM = "ver"
+CLAIMS = ("is_staff", "is_superuser")
+
+_users = {}
+_users_lock = threading.Lock()
+
+
+def _version_key(user_id):
+    return f"token-version:{user_id}"
+
+
+def token_version(user_id):
+    """The current token version of an active user, or None for an inactive or deleted one.
+
+    Read through the default cache for ``AUTH_TOKEN_VERSION_TTL`` seconds, so revocations
+    reach other processes within that time when the cache isn't shared.
+    """
+    key = _version_key(user_id)
+    version = cache.get(key)
+    if version is None:
+        version = _remember_version(key, _stored_versions(user_id).first())
+    return None if version < 0 else version
+
+
+async def atoken_version(user_id):
+    key = _version_key(user_id)
+    version = cache.get(key)
+    if version is None:
+        version = _remember_version(key, await _stored_versions(user_id).afirst())
+    return None if version < 0 else version
+
+
+def _stored_versions(user_id):
+    return User.objects.filter(pk=user_id, is_active=True).values_list(
+        Coalesce("token_version__version", 0), flat=True
+    )
+
+
+def _remember_version(key, version):
+    # -1 stands for no active user, so that it is cached as well
+    version = -1 if version is None else version
+    cache.set(key, version, settings.AUTH_TOKEN_VERSION_TTL)
+    return version
+
+
+def revoke_tokens(user_id):
+    """Invalidate every token issued to the user so far."""
+    version, created = TokenVersion.objects.get_or_create(user_id=user_id, defaults={"version": 1})
+    if not created:
+        TokenVersion.objects.filter(pk=user_id).update(version=F("version") + 1)
+    forget_user(user_id)
+
+
+def check_token_version(token):
+    """Raise AuthenticationFailed unless ``token`` carries its user's current version."""
+    user_id = token.get(api_settings.USER_ID_CLAIM)
+    _check_version(token, token_version(user_id))
+    return user_id
+
+
+async def acheck_token_version(token):
+    user_id = token.get(api_settings.USER_ID_CLAIM)
+    _check_version(token, await atoken_version(user_id))
+    return user_id
+
+
+def _check_version(token, version):
+    if version is None:
+        raise AuthenticationFailed(_("User not found or inactive"), code="user_inactive")
+    if token.get(VERSION_CLAIM, 0) != version:
+        raise AuthenticationFailed(_("Token has been revoked"), code="token_revoked")
+
+
+def cached_user(user_id):
+    """The full user, loaded at most once per ``AUTH_USER_CACHE_TTL`` seconds in this process."""
+    now = time.monotonic()
+    with _users_lock:
+        entry = _users.get(user_id)
+    if entry is not None and entry[0] > now:
+        return entry[1]
+    user = User.objects.get(pk=user_id)
+    with _users_lock:
+        if len(_users) >= settings.AUTH_USER_CACHE_SIZE:
+            _users.clear()
+        _users[user_id] = (now + settings.AUTH_USER_CACHE_TTL, user)
+    return user
+
+
+def forget_user(user_id):
+    """Drop the user's cached token version and, in this process, the cached user."""
+    cache.delete(_version_key(user_id))
+    with _users_lock:
+        _users.pop(user_id, None)
+
+
+def token_claims(user):
+    """Claims added to issued tokens so that requests can authenticate from them alone."""
+    claims = {name: getattr(user, name) for name in CLAIMS}
+    claims[VERSION_CLAIM] = token_version(user.pk) or 0
+    return claims
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """JWT authentication that builds the user from the token instead of loading it.
+
+    The token must carry its user's current version (see ``revoke_tokens``), which costs a
+    cache lookup rather than a query. Tokens issued without the claims fall back to the
+    cached full user.
+    """
+
+    def get_user(self, validated_token):
+        user_id = check_token_version(validated_token)
+        if not all(name in validated_token for name in CLAIMS):
+            return cached_user(int(user_id))
+        return self._claims_user(user_id, validated_token)
+
+    async def aauthenticate(self, request):
+        """``authenticate()`` for async views: the version lookup doesn't block the event loop."""
+        header = self.get_header(request)
+        raw_token = None if header is None else self.get_raw_token(header)
+        if raw_token is None:
+            return None
+        validated_token = self.get_validated_token(raw_token)
+        user_id = await acheck_token_version(validated_token)
+        if not all(name in validated_token for name in CLAIMS):
+            return await sync_to_async(cached_user)(int(user_id)), validated_token
+        return self._claims_user(user_id, validated_token), validated_token
+
+    def _claims_user(self, user_id, token):
+        # in the model's field order, as from_db expects
+        return ClaimsUser.from_db(
+            None,
+            ["id", "is_superuser", "is_staff", "is_active"],
+            [int(user_id), token["is_superuser"], token["is_staff"], True],
+        )
@@ -0,0 +1,38 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import models
+
+User = get_user_model()
+
+
+class TokenVersion(models.Model):
+    """The version stamped into a user's tokens; bumping it revokes every token issued before.
+
+    Users without a row are at version 0.
+    """
+
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, primary_key=True, related_name="token_version"
+    )
+    version = models.PositiveIntegerField(default=0)
+
+
+class ClaimsUser(User):
+    """A user built from access token claims, without a query.
+
+    Only the primary key and the ``is_staff``/``is_superuser`` flags are set; reading any other
+    field loads the full user through the short-lived in-process user cache.
+    """
+
+    class Meta:
+        proxy = True
+
+    def refresh_from_db(self, using=None, fields=None, from_queryset=None):
+        if fields is None or using is not None or from_queryset is not None:
+            return super().refresh_from_db(using, fields, from_queryset)
+        from .authentication import cached_user
+
+        user = cached_user(self.pk)
+        for name in fields:
+            field = self._meta.get_field(name)
+            setattr(self, field.attname, getattr(user, field.attname))
@@ -0,0 +1,25 @@
+from rest_framework_simplejwt.serializers import (
+    TokenObtainPairSerializer as BaseTokenObtainPairSerializer,
+    TokenRefreshSerializer as BaseTokenRefreshSerializer,
+)
+
+from .authentication import check_token_version, token_claims
+
+
+class TokenObtainPairSerializer(BaseTokenObtainPairSerializer):
+    """Issues tokens carrying the claims ``ClaimsJWTAuthentication`` builds the user from."""
+
+    @classmethod
+    def get_token(cls, user):
+        token = super().get_token(user)
+        for name, value in token_claims(user).items():
+            token[name] = value
+        return token
+
+
+class TokenRefreshSerializer(BaseTokenRefreshSerializer):
+    """Refuses refresh tokens that were revoked, instead of minting access tokens from them."""
+
+    def validate(self, attrs):
+        check_token_version(self.token_class(attrs["refresh"]))
+        return super().validate(attrs)
@@ -0,0 +1,32 @@
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .authentication import forget_user, revoke_tokens
+
+# changing any of these invalidates the tokens issued before
+REVOKING_FIELDS = ("password", "is_active", "is_staff", "is_superuser")
+
+
+@receiver(pre_save, sender=settings.AUTH_USER_MODEL)
+def user_saving(sender, instance, update_fields=None, **kwargs):
+    instance._revokes_tokens = False
+    if instance.pk is None or (update_fields is not None and not set(update_fields) & set(REVOKING_FIELDS)):
+        return
+    stored = sender.objects.filter(pk=instance.pk).values(*REVOKING_FIELDS).first()
+    instance._revokes_tokens = stored is not None and any(
+        stored[name] != getattr(instance, name) for name in REVOKING_FIELDS
+    )
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def user_saved(sender, instance, **kwargs):
+    if instance._revokes_tokens:
+        revoke_tokens(instance.pk)
+    else:
+        forget_user(instance.pk)
+
+
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def user_deleted(sender, instance, **kwargs):
+    forget_user(instance.pk)
@@ -0,0 +1,16 @@
+import pytest
+from django.core.cache import caches
+
+from apps.accounts import authentication
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    # the test database is rolled back without firing signals, so cached entries would leak
+    for cache in caches.all():
+        cache.clear()
+    authentication._users.clear()
+    yield
+    for cache in caches.all():
+        cache.clear()
+    authentication._users.clear()
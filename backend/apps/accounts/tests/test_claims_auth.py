@@ -0,0 +1,142 @@
+import pytest
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from apps.accounts.authentication import ClaimsJWTAuthentication, cached_user, forget_user
+from apps.accounts.models import ClaimsUser, TokenVersion
+from apps.assets.models import Asset
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture()
+def user():
+    return User.objects.create_user(username="claims", password="pass")
+
+
+def obtain(username="claims", password="pass"):
+    res = APIClient().post("/api/auth/token/", {"username": username, "password": password}, format="json")
+    assert res.status_code == 200
+    return res.json()
+
+
+def bearer(access):
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f"Bearer {access}")
+    return client
+
+
+def count_queries(client, url):
+    with CaptureQueriesContext(connection) as ctx:
+        res = client.get(url)
+    assert res.status_code == 200
+    return ctx.captured_queries
+
+
+def test_tokens_carry_claims(user):
+    access = AccessToken(obtain()["access"])
+    assert access["is_staff"] is False
+    assert access["is_superuser"] is False
+    assert access["ver"] == 0
+
+
+def test_requests_skip_the_user_lookup(user):
+    Asset.objects.create(owner=user, name="A")
+    client = bearer(obtain()["access"])
+    client.get("/api/assets/")  # warms the token version cache
+    queries = count_queries(client, "/api/assets/")
+    assert not any("auth_user" in query["sql"] for query in queries)
+    forced = APIClient()
+    forced.force_authenticate(user)
+    assert len(queries) == len(count_queries(forced, "/api/assets/"))
+    assert len(count_queries(client, "/api/assets/")) == len(queries)
+
+
+def test_claims_user(user):
+    user.is_staff = True
+    user.save()
+    token = AccessToken(obtain()["access"])
+    authenticated = ClaimsJWTAuthentication().get_user(token)
+    assert isinstance(authenticated, ClaimsUser)
+    assert authenticated.pk == user.pk and authenticated.is_staff and authenticated.is_active
+    assert Asset(owner=authenticated).owner_id == user.pk
+    # the remaining fields come from the user cache, one query for all of them
+    with CaptureQueriesContext(connection) as ctx:
+        assert authenticated.username == "claims"
+        assert ClaimsJWTAuthentication().get_user(token).email == ""
+    assert len(ctx.captured_queries) == 1
+    authenticated.refresh_from_db()
+    assert authenticated.date_joined == user.date_joined
+
+
+def test_staff_claim_grants_admin_endpoints(user):
+    assert bearer(obtain()["access"]).get("/api/admin/overview/").status_code == 403
+    user.is_staff = True
+    user.save()
+    assert bearer(obtain()["access"]).get("/api/admin/overview/").status_code == 200
+
+
+def test_tokens_without_claims_load_the_user(user):
+    token = AccessToken.for_user(user)
+    authenticated = ClaimsJWTAuthentication().get_user(token)
+    assert type(authenticated) is User and authenticated.pk == user.pk
+
+
+def test_revoke(user):
+    tokens = obtain()
+    client = bearer(tokens["access"])
+    assert client.post("/api/auth/token/revoke/").status_code == 204
+    res = client.get("/api/assets/")
+    assert res.status_code == 401
+    assert res.json()["detail"] == "Token has been revoked"
+    res = APIClient().post("/api/auth/token/refresh/", {"refresh": tokens["refresh"]}, format="json")
+    assert res.status_code == 401
+    assert TokenVersion.objects.get(user=user).version == 1
+    # new tokens carry the new version
+    assert bearer(obtain()["access"]).post("/api/auth/token/revoke/").status_code == 204
+    assert TokenVersion.objects.get(user=user).version == 2
+
+
+def test_refresh(user):
+    refresh = obtain()["refresh"]
+    res = APIClient().post("/api/auth/token/refresh/", {"refresh": refresh}, format="json")
+    assert res.status_code == 200
+    assert bearer(res.json()["access"]).get("/api/assets/").status_code == 200
+
+
+def test_credential_changes_revoke_tokens(user):
+    client = bearer(obtain()["access"])
+    assert client.get("/api/assets/").status_code == 200
+    user.first_name = "Unrelated"
+    user.save()
+    user.save(update_fields=["last_login"])
+    assert client.get("/api/assets/").status_code == 200
+    user.set_password("changed")
+    user.save()
+    assert client.get("/api/assets/").status_code == 401
+
+
+def test_inactive_and_deleted_users(user):
+    access = obtain()["access"]
+    other = User.objects.create_user(username="other", password="pass")
+    other_access = obtain("other")["access"]
+    user.is_active = False
+    user.save()
+    res = bearer(access).get("/api/assets/")
+    assert res.status_code == 401
+    assert res.json()["detail"] == "User not found or inactive"
+    other.delete()
+    assert bearer(other_access).get("/api/assets/").status_code == 401
+
+
+def test_user_cache(user, settings):
+    settings.AUTH_USER_CACHE_SIZE = 1
+    other = User.objects.create_user(username="other")
+    assert cached_user(user.pk) is cached_user(user.pk)
+    assert cached_user(other.pk).username == "other"
+    settings.AUTH_USER_CACHE_TTL = 0
+    forget_user(other.pk)
+    assert cached_user(other.pk) is not cached_user(other.pk)
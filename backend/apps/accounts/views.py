@@ -0,0 +1,13 @@
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from .authentication import revoke_tokens
+
+
+class TokenRevokeView(APIView):
+    """Log out everywhere: revoke every access and refresh token issued to the caller."""
+
+    def post(self, request):
+        revoke_tokens(request.user.pk)
+        return Response(status=status.HTTP_204_NO_CONTENT)
@@ -0,0 +1,126 @@
+from datetime import date, timedelta
+
+import numpy as np
+from django.db.models import Avg, F, Window
+from django.db.models.functions import RowNumber, Trunc
+
+from .projection import Contracts
+
+PERIODS = {"month": 1, "quarter": 3, "year": 12}
+AGGREGATES = ("last", "avg")
+
+
+def resample(values, period, agg):
+    """Return ``(asset_id, period_start, value)`` rows, one per asset and period, ordered by period.
+
+    ``last`` keeps the latest valuation of each period and ``avg`` averages them; both are
+    computed by the database, so only one row per asset and period is fetched.
+    """
+    bucket = Trunc("date", period)
+    values = values.order_by().annotate(period=bucket)
+    if agg == "avg":
+        values = values.values("asset_id", "period").annotate(value=Avg("value"))
+    else:
+        values = values.annotate(
+            rank=Window(RowNumber(), partition_by=[F("asset_id"), bucket], order_by=F("date").desc())
+        ).filter(rank=1)
+    return values.order_by("period", "asset_id").values_list("asset_id", "period", "value")
+
+
+def combine(rows):
+    """Sum per-asset rows, ordered by period, into ``(period_starts, totals)`` arrays.
+
+    An asset without a valuation in a period contributes its previous figure, so a gap in one
+    asset's history doesn't show up as a drop in the portfolio value: each row adds what its
+    asset gained since its previous row, and each period reads the running sum after its last.
+    """
+    rows = list(rows)
+    if not rows:
+        return np.array([], dtype="datetime64[D]"), np.array([], dtype=np.float64)
+    asset_ids, starts, values = (np.asarray(column) for column in zip(*rows))
+    starts, values = starts.astype("datetime64[D]"), values.astype(np.float64)
+    # stable, so each asset's rows stay in period order
+    order = np.argsort(asset_ids, kind="stable")
+    previous = np.zeros_like(values)
+    same_asset = asset_ids[order][1:] == asset_ids[order][:-1]
+    previous[order[1:]] = np.where(same_asset, values[order][:-1], 0)
+    totals = np.cumsum(values - previous)
+    last = np.append(starts[1:] != starts[:-1], True)
+    return starts[last], totals[last]
+
+
+def period_end(start, period):
+    month = start.month - 1 + PERIODS[period]
+    return date(start.year + month // 12, month % 12 + 1, 1) - timedelta(days=1)
+
+
+def period_ends(starts, period):
+    """``period_end()`` of each of the ``starts`` array."""
+    return (starts.astype("datetime64[M]") + PERIODS[period]).astype("datetime64[D]") - 1
+
+
+def _total_by(points, amounts, days, side):
+    """Sum of the ``amounts`` whose point is before each of ``days``, or on it with side="right"."""
+    order = np.argsort(points)
+    totals = np.concatenate(([0.0], np.cumsum(amounts[order])))
+    return totals[np.searchsorted(points[order], days, side=side)]
+
+
+def rent_roll(contracts, days):
+    """Monthly rent in force on each of ``days``, for ``Contracts``.
+
+    That is the rent of the contracts started by each day less that of those ended before it.
+    """
+    closed = ~np.isnat(contracts.ends)
+    started = _total_by(contracts.starts, contracts.rents, days, "right")
+    return started - _total_by(contracts.ends[closed], contracts.rents[closed], days, "left")
+
+
+def cagr(series):
+    """Compound annual growth from the first point to the last; None where it isn't defined."""
+    if len(series) < 2:
+        return None
+    (first_day, first), (last_day, last) = series[0], series[-1]
+    years = (last_day - first_day).days / 365.25
+    # a non-positive end value has no real root, and points on one day span no time
+    if first <= 0 or last <= 0 or years <= 0:
+        return None
+    return (float(last) / float(first)) ** (1 / years) - 1
+
+
+def drawdowns(values):
+    """Fall from the running peak at each point, as a fraction of that peak."""
+    peaks = np.maximum.accumulate(values)
+    return 1 - np.divide(values, peaks, out=np.ones_like(values), where=peaks > 0)
+
+
+def valuation_series(values, contracts, period="month", agg="last"):
+    """Resampled valuation series of ``values`` with yield against the rent roll of ``contracts``.
+
+    Each point carries the annualized rent in force at the end of its period and the resulting
+    yield; the summary figures are CAGR and the maximum and current drawdown of the series.
+    """
+    starts, totals = combine(resample(values, period, agg))
+    annual_rents = rent_roll(Contracts.load(contracts), period_ends(starts, period)) * 12
+    yields = np.divide(annual_rents, totals, out=np.zeros_like(totals), where=totals > 0)
+    falls = drawdowns(totals)
+    series = list(zip(starts.tolist(), totals.tolist()))
+    return {
+        "period": period,
+        "agg": agg,
+        "cagr": cagr(series),
+        "max_drawdown": falls.max().item() if len(falls) else None,
+        "current_drawdown": falls[-1].item() if len(falls) else None,
+        "series": [
+            {
+                "date": start,
+                "value": value,
+                "annual_rent": rent,
+                "rental_yield": rental_yield if value > 0 else None,
+                "drawdown": fall,
+            }
+            for (start, value), rent, rental_yield, fall in zip(
+                series, annual_rents.tolist(), yields.tolist(), falls.tolist()
+            )
+        ],
+    }
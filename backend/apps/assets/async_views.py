@@ -0,0 +1,108 @@
+import functools
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.http import Http404
+from django.utils.decorators import classonlymethod
+from rest_framework import exceptions
+from rest_framework.response import Response
+
+
+class AsyncReadMixin:
+    """Serve a viewset's actions that have an ``a<action>`` coroutine variant asynchronously.
+
+    With ``ASYNC_VIEWS`` (set by the ASGI entry point) the routes of those actions get a
+    coroutine view: authentication, the handler and its database queries run without holding
+    a thread while they wait. Other methods on the same routes run the synchronous view on a
+    thread, as Django would have. Under WSGI the viewset is left as it is.
+    """
+
+    @classonlymethod
+    def as_view(cls, actions=None, **initkwargs):
+        view = super().as_view(actions, **initkwargs)
+        action_map = dict(actions)
+        if "get" in action_map:
+            action_map.setdefault("head", action_map["get"])
+        async_methods = {
+            method
+            for method, action in action_map.items()
+            if iscoroutinefunction(getattr(cls, f"a{action}", None))
+        }
+        if not settings.ASYNC_VIEWS or not async_methods:
+            return view
+        sync_view = sync_to_async(view)
+
+        async def async_view(request, *args, **kwargs):
+            if request.method.lower() not in async_methods:
+                return await sync_view(request, *args, **kwargs)
+            self = cls(**initkwargs)
+            self.action_map = action_map
+            self.request = request
+            return await self.adispatch(request, *args, **kwargs)
+
+        # keeps csrf_exempt and what the router and schema generators read off the view
+        functools.update_wrapper(async_view, view)
+        return async_view
+
+    async def adispatch(self, request, *args, **kwargs):
+        """``dispatch()``, awaiting ``ainitial()`` and the ``a<action>`` handler."""
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+        try:
+            await self.ainitial(request, *args, **kwargs)
+            response = await getattr(self, f"a{self.action}")(request, *args, **kwargs)
+        except Exception as exc:
+            response = self.handle_exception(exc)
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
+
+    async def ainitial(self, request, *args, **kwargs):
+        """``initial()``, awaiting authentication."""
+        self.format_kwarg = self.get_format_suffix(**kwargs)
+        request.accepted_renderer, request.accepted_media_type = self.perform_content_negotiation(request)
+        request.version, request.versioning_scheme = self.determine_version(request, *args, **kwargs)
+        await self.aperform_authentication(request)
+        self.check_permissions(request)
+        self.check_throttles(request)
+
+    async def aperform_authentication(self, request):
+        """``Request._authenticate()``, with authenticators' ``aauthenticate`` where they have one."""
+        for authenticator in request.authenticators:
+            authenticate = getattr(authenticator, "aauthenticate", None) or sync_to_async(
+                authenticator.authenticate
+            )
+            try:
+                user_auth_tuple = await authenticate(request)
+            except exceptions.APIException:
+                request._not_authenticated()
+                raise
+            if user_auth_tuple is not None:
+                request._authenticator = authenticator
+                request.user, request.auth = user_auth_tuple
+                return
+        request._not_authenticated()
+
+    async def aget_object(self):
+        queryset = self.filter_queryset(self.get_queryset())
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        try:
+            obj = await queryset.aget(**{self.lookup_field: self.kwargs[lookup_url_kwarg]})
+        except (queryset.model.DoesNotExist, TypeError, ValueError, DjangoValidationError):
+            raise Http404
+        self.check_object_permissions(self.request, obj)
+        return obj
+
+    async def alist(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        # DRF's paginators evaluate the page synchronously
+        page = await sync_to_async(self.paginate_queryset)(queryset)
+        if page is None:
+            return Response(self.get_serializer([obj async for obj in queryset], many=True).data)
+        return self.get_paginated_response(self.get_serializer(page, many=True).data)
+
+    async def aretrieve(self, request, *args, **kwargs):
+        return Response(self.get_serializer(await self.aget_object()).data)
@@ -0,0 +1,127 @@
+from django.conf import settings
+from django.db import transaction
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.parsers import JSONParser
+from rest_framework.response import Response
+
+from .parsers import NDJSONParser
+from .signals import assets_bulk_changed
+
+
+class BulkWriteMixin:
+    """``POST``/``PATCH``/``DELETE`` on ``<resource>/bulk/`` with a JSON array or NDJSON stream.
+
+    Items are validated one by one, but ownership of every referenced object is checked
+    with one query per related model, and rows are written with ``bulk_create`` /
+    ``bulk_update``. Invalid items are reported by index without aborting the batch.
+
+    Viewsets provide ``get_bulk_references()``, mapping each foreign key in the payload to
+    the queryset of objects the user may reference, and ``perform_bulk_create(rows)``,
+    returning ``(created, updated)`` counts. ``get_bulk_row_errors(rows)`` may yield
+    ``(index, errors)`` for checks across fields of the rows that passed the others.
+    """
+
+    bulk_serializer_class = None
+    bulk_update_fields = ()
+
+    @action(
+        detail=False,
+        methods=["post", "patch", "delete"],
+        url_path="bulk",
+        parser_classes=[JSONParser, NDJSONParser],
+    )
+    def bulk(self, request):
+        items = request.data
+        if not isinstance(items, list):
+            raise ValidationError({"non_field_errors": ["Expected a list of items."]})
+        if len(items) > settings.BULK_MAX_ITEMS:
+            raise ValidationError(
+                {"non_field_errors": [f"At most {settings.BULK_MAX_ITEMS} items per request."]}
+            )
+        result = {"created": 0, "updated": 0, "deleted": 0, "errors": []}
+        with transaction.atomic():
+            if request.method == "DELETE":
+                asset_ids = self._bulk_delete(items, result)
+            else:
+                partial = request.method == "PATCH"
+                rows = self._validate_bulk_items(items, partial, result["errors"])
+                if partial:
+                    asset_ids = self._bulk_update(rows, result)
+                else:
+                    result["created"], result["updated"] = self.perform_bulk_create(
+                        [row for _, row in rows]
+                    )
+                    asset_ids = {row["asset"] for _, row in rows}
+            assets_bulk_changed(asset_ids)
+        result["errors"].sort(key=lambda error: error["index"])
+        return Response(result)
+
+    def _validate_bulk_items(self, items, partial, errors):
+        rows = []
+        for index, item in enumerate(items):
+            serializer = self.bulk_serializer_class(data=item, partial=partial)
+            if not serializer.is_valid():
+                errors.append({"index": index, "errors": serializer.errors})
+            elif partial and "id" not in serializer.validated_data:
+                errors.append({"index": index, "errors": {"id": ["This field is required."]}})
+            else:
+                rows.append((index, serializer.validated_data))
+        for field, queryset in self.get_bulk_references().items():
+            referenced = {row[field] for _, row in rows if field in row}
+            allowed = set(queryset.filter(pk__in=referenced).values_list("pk", flat=True))
+            for index, row in rows:
+                if field in row and row[field] not in allowed:
+                    message = f'Invalid pk "{row[field]}" - object does not exist.'
+                    errors.append({"index": index, "errors": {field: [message]}})
+        rejected = {error["index"] for error in errors}
+        rows = [(index, row) for index, row in rows if index not in rejected]
+        row_errors = dict(self.get_bulk_row_errors(rows))
+        errors.extend({"index": index, "errors": error} for index, error in row_errors.items())
+        return [(index, row) for index, row in rows if index not in row_errors]
+
+    def get_bulk_row_errors(self, rows):
+        return ()
+
+    def _bulk_update(self, rows, result):
+        objects = self.get_queryset().in_bulk([row["id"] for _, row in rows])
+        asset_ids = {obj.asset_id for obj in objects.values()}
+        changed = []
+        fields = set()
+        for index, row in rows:
+            obj = objects.get(row["id"])
+            if obj is None:
+                result["errors"].append({"index": index, "errors": {"id": ["Not found."]}})
+                continue
+            for field in self.bulk_update_fields:
+                if field in row:
+                    # foreign keys arrive as primary keys
+                    attname = obj._meta.get_field(field).attname
+                    setattr(obj, attname, row[field])
+                    fields.add(attname)
+            asset_ids.add(obj.asset_id)
+            changed.append(obj)
+        if changed and fields:
+            self.get_queryset().model.objects.bulk_update(changed, sorted(fields))
+        result["updated"] = len(changed)
+        return asset_ids
+
+    def _bulk_delete(self, items, result):
+        ids = {}
+        for index, item in enumerate(items):
+            pk = item.get("id") if isinstance(item, dict) else item
+            if isinstance(pk, int) and not isinstance(pk, bool):
+                ids[pk] = index
+            else:
+                result["errors"].append(
+                    {"index": index, "errors": {"id": ["A valid integer is required."]}}
+                )
+        queryset = self.get_queryset().filter(pk__in=ids)
+        found = dict(queryset.values_list("pk", "asset_id"))
+        for pk, index in ids.items():
+            if pk not in found:
+                result["errors"].append({"index": index, "errors": {"id": ["Not found."]}})
+        # the per-row receivers leave a queryset delete to the assets_bulk_changed call in bulk()
+        _, deleted = queryset.model.objects.filter(pk__in=found).delete()
+        result["deleted"] = deleted.get(queryset.model._meta.label, 0)
+        return set(found.values())
@@ -0,0 +1,67 @@
+import hashlib
+
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+
+
+class ConditionalGetMixin:
+    """``ETag`` / ``Last-Modified`` on ``list`` and ``retrieve``, with ``304 Not Modified``
+    answered before the queryset is evaluated or anything is serialized.
+
+    Viewsets provide ``get_resource_version()``, returning ``(last_modified, token)`` for the
+    requested resource or ``None`` when it doesn't exist. ``token`` must change whenever the
+    representation does; ``last_modified`` only has one-second resolution and can't see
+    deletions, so clients should prefer ``If-None-Match``, which takes precedence. The async
+    ``alist`` and ``aretrieve`` use ``aget_resource_version()`` likewise. The version is kept
+    as ``resource_version`` for the response cache to reuse.
+    """
+
+    def list(self, request, *args, **kwargs):
+        return self._conditional(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self._conditional(super().retrieve, request, *args, **kwargs)
+
+    async def alist(self, request, *args, **kwargs):
+        return await self._aconditional(super().alist, request, *args, **kwargs)
+
+    async def aretrieve(self, request, *args, **kwargs):
+        return await self._aconditional(super().aretrieve, request, *args, **kwargs)
+
+    def _conditional(self, handler, request, *args, **kwargs):
+        self.resource_version = self.get_resource_version()
+        validators = self._validators(request, self.resource_version)
+        if validators is None:
+            return handler(request, *args, **kwargs)
+        response = get_conditional_response(request, **validators)
+        if response is None:
+            response = handler(request, *args, **kwargs)
+        return self._add_validators(response, **validators)
+
+    async def _aconditional(self, handler, request, *args, **kwargs):
+        self.resource_version = await self.aget_resource_version()
+        validators = self._validators(request, self.resource_version)
+        if validators is None:
+            return await handler(request, *args, **kwargs)
+        response = get_conditional_response(request, **validators)
+        if response is None:
+            response = await handler(request, *args, **kwargs)
+        return self._add_validators(response, **validators)
+
+    def _validators(self, request, version):
+        if version is None:
+            return None
+        last_modified, token = version
+        # the same URL renders differently per user and per negotiated format
+        key = f"{request.user.pk}:{request.accepted_renderer.format}:{token}"
+        etag = quote_etag(hashlib.md5(key.encode()).hexdigest())
+        return {"etag": etag, "last_modified": int(last_modified.timestamp()) if last_modified else None}
+
+    def _add_validators(self, response, etag, last_modified):
+        response["ETag"] = etag
+        if last_modified is not None:
+            response["Last-Modified"] = http_date(last_modified)
+        # stored by the browser only, and revalidated on every use
+        patch_cache_control(response, private=True, no_cache=True)
+        patch_vary_headers(response, ["Authorization"])
+        return response
@@ -0,0 +1,176 @@
+import hashlib
+import mimetypes
+import os
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage
+from django.core.files.uploadhandler import TemporaryFileUploadHandler
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from django.utils.http import content_disposition_header
+
+from .streaming import stream
+
+RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+BLOB_DIR = "blobs"
+
+
+class ChecksumUploadHandler(TemporaryFileUploadHandler):
+    """Spool uploads to a temporary file in ``DOCUMENT_UPLOAD_CHUNK_SIZE`` chunks, hashing them.
+
+    Nothing is kept in memory beyond one chunk, and the file system storage moves the
+    temporary file into place instead of copying it.
+    """
+
+    def __init__(self, request=None):
+        super().__init__(request)
+        self.chunk_size = settings.DOCUMENT_UPLOAD_CHUNK_SIZE
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.digest = hashlib.sha256()
+
+    def receive_data_chunk(self, raw_data, start):
+        self.digest.update(raw_data)
+        return super().receive_data_chunk(raw_data, start)
+
+    def file_complete(self, file_size):
+        file = super().file_complete(file_size)
+        file.sha256 = self.digest.hexdigest()
+        return file
+
+
+def file_digest(file):
+    """SHA-256 of an uploaded file, as computed while it was received when possible."""
+    digest = getattr(file, "sha256", None)
+    if digest is None:
+        hasher = hashlib.sha256()
+        for chunk in file.chunks(settings.DOCUMENT_UPLOAD_CHUNK_SIZE):
+            hasher.update(chunk)
+        digest = hasher.hexdigest()
+    return digest
+
+
+def blob_name(digest):
+    return f"{BLOB_DIR}/{digest[:2]}/{digest}"
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """Store each distinct content once, under ``blobs/`` and named by its SHA-256.
+
+    Saving content that is already stored only refreshes its modification time and returns
+    the existing name; two uploads of the same content racing each other overwrite the blob
+    with identical bytes.
+    Blobs are reference-counted by ``DocumentBlob`` and removed by ``gc_documents``.
+    """
+
+    def __init__(self, **kwargs):
+        super().__init__(allow_overwrite=True, **kwargs)
+
+    def get_available_name(self, name, max_length=None):
+        # the name is derived from the content in _save
+        return name
+
+    def _save(self, name, content):
+        name = blob_name(file_digest(content))
+        if self.exists(name):
+            # touched, so that gc_documents leaves a blob this upload is about to reference
+            os.utime(self.path(name))
+            return name
+        return super()._save(name, content)
+
+
+def document_storage():
+    return ContentAddressedStorage()
+
+
+def parse_range(header, size):
+    """Inclusive ``(first, last)`` byte positions for a single ``Range`` header.
+
+    Returns None when the whole file should be sent, which is also the answer to
+    multiple or malformed ranges, and raises ValueError when the range can't be satisfied.
+    """
+    match = RANGE_RE.match(header or "")
+    if match is None or match.groups() == ("", ""):
+        return None
+    first, last = match.groups()
+    if first == "":
+        # a suffix: the final ``last`` bytes
+        first, last = max(size - int(last), 0), size - 1
+        if size == 0 or first > last:
+            raise ValueError(header)
+        return first, last
+    first, last = int(first), min(int(last), size - 1) if last else size - 1
+    if first > last:
+        raise ValueError(header)
+    return first, last
+
+
+def read_range(file, first, last, chunk_size):
+    with file:
+        file.seek(first)
+        remaining = last - first + 1
+        while remaining > 0:
+            chunk = file.read(min(chunk_size, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+def document_response(request, document):
+    """Serve a document's file, streamed with ``Range`` support or handed to the reverse proxy.
+
+    ``DOCUMENT_DOWNLOAD_MODE`` picks ``stream`` (Django reads the file in
+    ``DOCUMENT_UPLOAD_CHUNK_SIZE`` blocks), ``x-accel-redirect`` (nginx or Caddy serve
+    ``DOCUMENT_ACCEL_PREFIX`` + the file name) or ``x-sendfile`` (the file's path).
+    """
+    name = document.filename or document.file.name.rsplit("/", 1)[-1]
+    content_type = mimetypes.guess_type(name)[0] or "application/octet-stream"
+    mode = settings.DOCUMENT_DOWNLOAD_MODE
+    if mode == "x-accel-redirect":
+        response = HttpResponse(content_type=content_type)
+        response["X-Accel-Redirect"] = settings.DOCUMENT_ACCEL_PREFIX + quote(document.file.name)
+    elif mode == "x-sendfile":
+        response = HttpResponse(content_type=content_type)
+        response["X-Sendfile"] = document.file.path
+    else:
+        response = _stream(request, document, content_type)
+    response["Content-Disposition"] = content_disposition_header(True, name)
+    if document.sha256:
+        response["ETag"] = f'"{document.sha256}"'
+    return response
+
+
+def _stream(request, document, content_type):
+    chunk_size = settings.DOCUMENT_UPLOAD_CHUNK_SIZE
+    size = document.file.size
+    etag = f'"{document.sha256}"' if document.sha256 else None
+    byte_range = None
+    if_range = request.headers.get("If-Range")
+    # a range conditioned on another version of the file gets the whole of this one
+    if not if_range or if_range == etag:
+        try:
+            byte_range = parse_range(request.headers.get("Range"), size)
+        except ValueError:
+            response = HttpResponse(status=416)
+            response["Content-Range"] = f"bytes */{size}"
+            return response
+    file = document.file.open("rb")
+    if byte_range is None and not settings.ASYNC_VIEWS:
+        response = FileResponse(file, content_type=content_type)
+        response.block_size = chunk_size
+    else:
+        # FileResponse would be read into memory whole under ASGI
+        first, last = byte_range or (0, size - 1)
+        response = StreamingHttpResponse(
+            stream(read_range(file, first, last, chunk_size)),
+            status=200 if byte_range is None else 206,
+            content_type=content_type,
+        )
+        if byte_range is not None:
+            response["Content-Range"] = f"bytes {first}-{last}/{size}"
+        response["Content-Length"] = last - first + 1
+    response["Accept-Ranges"] = "bytes"
+    return response
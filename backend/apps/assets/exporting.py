@@ -0,0 +1,68 @@
+import csv
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+
+from .models import Asset, MarketValue, Tenant, RentalContract
+
+# resource -> (model, exported columns); every model has its owner_id
+RESOURCES = {
+    "assets": (Asset, ["id", "name", "address", "description", "created_at"]),
+    "values": (MarketValue, ["id", "asset_id", "date", "value"]),
+    "tenants": (Tenant, ["id", "asset_id", "full_name", "email", "phone"]),
+    "contracts": (
+        RentalContract,
+        ["id", "asset_id", "tenant_id", "start_date", "end_date", "monthly_rent", "deposit", "notes"],
+    ),
+}
+FORMATS = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+
+
+def export_queryset(resource, owner_id=None, date_from=None, date_to=None):
+    """Rows of ``resource`` as value tuples, optionally scoped to an owner and a date range.
+
+    The range applies to valuation dates, to contracts running during it, and to asset
+    creation dates; tenants have no date and are not filtered by it.
+    """
+    model, columns = RESOURCES[resource]
+    queryset = model.objects.all()
+    if owner_id is not None:
+        queryset = queryset.filter(owner_id=owner_id)
+    if resource == "values":
+        if date_from:
+            queryset = queryset.filter(date__gte=date_from)
+        if date_to:
+            queryset = queryset.filter(date__lte=date_to)
+    elif resource == "contracts":
+        if date_from:
+            queryset = queryset.filter(Q(end_date__isnull=True) | Q(end_date__gte=date_from))
+        if date_to:
+            queryset = queryset.filter(start_date__lte=date_to)
+    elif resource == "assets":
+        if date_from:
+            queryset = queryset.filter(created_at__date__gte=date_from)
+        if date_to:
+            queryset = queryset.filter(created_at__date__lte=date_to)
+    return queryset.order_by("pk").values_list(*columns)
+
+
+class _Echo:
+    """File-like object whose write() hands the line back instead of buffering it."""
+
+    def write(self, value):
+        return value
+
+
+def stream_rows(resource, fmt, rows, chunk_size=2000):
+    """Yield the encoded export line by line; memory use doesn't grow with the row count."""
+    columns = RESOURCES[resource][1]
+    rows = rows.iterator(chunk_size=chunk_size)
+    if fmt == "csv":
+        writer = csv.writer(_Echo())
+        yield writer.writerow(columns)
+        for row in rows:
+            yield writer.writerow(row)
+    else:
+        for row in rows:
+            yield json.dumps(dict(zip(columns, row)), cls=DjangoJSONEncoder) + "\n"
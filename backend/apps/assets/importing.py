@@ -0,0 +1,163 @@
+import csv
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+
+from django.db import transaction
+from django.utils.dateparse import parse_date
+
+from .models import Asset, MarketValue, Tenant, RentalContract
+
+KINDS = ("values", "contracts")
+
+
+def read_chunks(handle, chunk_size):
+    """Yield ``(first_line, rows)`` chunks of CSV dict rows without reading the whole file."""
+    reader = csv.DictReader(handle)
+    line = 2  # the header is line 1
+    while True:
+        rows = list(islice(reader, chunk_size))
+        if not rows:
+            return
+        yield line, rows
+        line += len(rows)
+
+
+def load_chunk(kind, rows):
+    """Write one prepared chunk in its own transaction; safe to run in a worker process.
+
+    Contract tenants given by name only are found or created in the same transaction, so a
+    chunk that fails leaves none behind.
+    """
+    with transaction.atomic():
+        if kind == "values":
+            MarketValue.objects.bulk_create(
+                [MarketValue(asset_id=a, date=d, value=v) for a, d, v in rows],
+                update_conflicts=True,
+                unique_fields=["asset", "date"],
+                update_fields=["value"],
+            )
+        else:
+            named = _named_tenants({(a, name) for a, t, name, *_ in rows if t is None})
+            RentalContract.objects.bulk_create(
+                [
+                    RentalContract(
+                        asset_id=a,
+                        tenant_id=t or named[(a, name)],
+                        start_date=s,
+                        end_date=e,
+                        monthly_rent=r,
+                        deposit=dep,
+                        notes=n,
+                    )
+                    for a, t, name, s, e, r, dep, n in rows
+                ]
+            )
+    return len(rows)
+
+
+def _named_tenants(wanted):
+    """Map each ``(asset_id, full_name)`` in ``wanted`` to a tenant, creating the missing ones.
+
+    The assets are locked first, so chunks loaded in parallel don't both create a tenant.
+    """
+    if not wanted:
+        return {}
+    asset_ids = {a for a, _ in wanted}
+    list(Asset.objects.select_for_update().filter(pk__in=asset_ids).values_list("pk", flat=True))
+    found = {}
+    existing = Tenant.objects.filter(asset_id__in=asset_ids, full_name__in={name for _, name in wanted})
+    for pk, asset_id, name in existing.order_by("pk").values_list("pk", "asset_id", "full_name"):
+        found.setdefault((asset_id, name), pk)
+    missing = sorted(wanted - found.keys())
+    for tenant in Tenant.objects.bulk_create([Tenant(asset_id=a, full_name=name) for a, name in missing]):
+        found[(tenant.asset_id, tenant.full_name)] = tenant.pk
+    return found
+
+
+class PortfolioImporter:
+    """Turn CSV rows into plain tuples, resolving assets and tenants from in-memory maps.
+
+    Assets are referenced by id or name (``asset`` or ``asset_id`` column) and must belong
+    to the owner. Contract tenants are referenced by id or full name (``tenant`` or
+    ``tenant_id``); ``load_chunk`` creates unknown names on the contract's asset.
+    """
+
+    def __init__(self, owner, kind):
+        self.kind = kind
+        self.errors = []
+        self.assets = {}
+        for pk, name in Asset.objects.owned_by(owner).values_list("pk", "name"):
+            self.assets[str(pk)] = pk
+            self.assets.setdefault(name, pk)
+        self.tenant_ids = {}
+        self.tenant_names = {}
+        if kind == "contracts":
+            for pk, asset_id, name in Tenant.objects.owned_by(owner).values_list(
+                "pk", "asset_id", "full_name"
+            ):
+                self.tenant_ids[str(pk)] = (pk, asset_id)
+                self.tenant_names.setdefault((asset_id, name), pk)
+
+    def prepare(self, first_line, rows):
+        prepared = []
+        for line, row in enumerate(rows, start=first_line):
+            try:
+                prepared.append(self._prepare_row(row))
+            except ValueError as exc:
+                self.errors.append(f"line {line}: {exc}")
+        if self.kind == "values":
+            # last row wins for a repeated (asset, date): an upsert can't touch a row twice
+            prepared = list({(a, d): (a, d, v) for a, d, v in prepared}.values())
+        return prepared
+
+    def _prepare_row(self, row):
+        asset = (row.get("asset") or row.get("asset_id") or "").strip()
+        if asset not in self.assets:
+            raise ValueError(f"unknown asset {asset!r}")
+        asset_id = self.assets[asset]
+        if self.kind == "values":
+            return asset_id, _date(row, "date"), _decimal(row, "value")
+        tenant = (row.get("tenant") or row.get("tenant_id") or "").strip()
+        if not tenant:
+            raise ValueError("missing tenant")
+        # (asset, tenant id, tenant name) with the id None for a name to find or create
+        if tenant in self.tenant_ids:
+            tenant_id, tenant_asset_id = self.tenant_ids[tenant]
+            if tenant_asset_id != asset_id:
+                raise ValueError(f"tenant {tenant!r} is not a tenant of asset {asset!r}")
+        else:
+            tenant_id = self.tenant_names.get((asset_id, tenant))
+        return (
+            asset_id,
+            tenant_id,
+            None if tenant_id else tenant,
+            _date(row, "start_date"),
+            _date(row, "end_date", required=False),
+            _decimal(row, "monthly_rent"),
+            _decimal(row, "deposit", default="0"),
+            row.get("notes") or "",
+        )
+
+
+def _date(row, column, required=True):
+    raw = (row.get(column) or "").strip()
+    if not raw and not required:
+        return None
+    try:
+        value = parse_date(raw)
+    except ValueError:
+        value = None
+    if value is None:
+        raise ValueError(f"invalid {column} {raw!r}")
+    return value
+
+
+def _decimal(row, column, default=None):
+    raw = (row.get(column) or default or "").strip()
+    try:
+        value = Decimal(raw)
+    except InvalidOperation:
+        value = None
+    if value is None or not value.is_finite():
+        raise ValueError(f"invalid {column} {raw!r}")
+    return value
@@ -0,0 +1,206 @@
+import json
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.db.backends.signals import connection_created
+from rest_framework.serializers import BaseSerializer
+
+logger = logging.getLogger(__name__)
+
+# upper bounds of the wall-time histogram buckets, in milliseconds; the last bucket is open
+BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+
+_current = ContextVar("request_metrics", default=None)
+_routes = {}
+_lock = threading.Lock()
+
+
+class RequestMetrics:
+    """Counters for one request; also the ``execute_wrapper`` that feeds the DB ones."""
+
+    def __init__(self):
+        self.queries = 0
+        self.db = 0.0
+        self.serialize = 0.0
+        self.serializing = False
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db += time.perf_counter() - started
+            self.queries += 1
+
+
+def _instrument_serializers():
+    """Time ``serializer.data`` for the request in progress. Installed once, when enabled."""
+    if getattr(BaseSerializer.data.fget, "instrumented", False):
+        return
+    data = BaseSerializer.data.fget
+
+    def timed_data(self):
+        metrics = _current.get()
+        # nested serializers render through to_representation, but guard against .data in .data
+        if metrics is None or metrics.serializing:
+            return data(self)
+        metrics.serializing = True
+        started = time.perf_counter()
+        try:
+            return data(self)
+        finally:
+            metrics.serialize += time.perf_counter() - started
+            metrics.serializing = False
+
+    timed_data.instrumented = True
+    BaseSerializer.data = property(timed_data)
+
+
+def record(route, wall, metrics):
+    with _lock:
+        stats = _routes.get(route)
+        if stats is None:
+            stats = _routes[route] = {
+                "count": 0,
+                "wall": 0.0,
+                "max": 0.0,
+                "queries": 0,
+                "db": 0.0,
+                "serialize": 0.0,
+                "histogram": [0] * (len(BUCKETS_MS) + 1),
+            }
+        stats["count"] += 1
+        stats["wall"] += wall
+        stats["max"] = max(stats["max"], wall)
+        stats["queries"] += metrics.queries
+        stats["db"] += metrics.db
+        stats["serialize"] += metrics.serialize
+        stats["histogram"][bisect_left(BUCKETS_MS, wall * 1000)] += 1
+
+
+def snapshot():
+    """Per-route aggregates recorded by this process, times in milliseconds."""
+    with _lock:
+        routes = {
+            route: {
+                "count": stats["count"],
+                "mean_ms": round(stats["wall"] * 1000 / stats["count"], 3),
+                "max_ms": round(stats["max"] * 1000, 3),
+                "mean_queries": round(stats["queries"] / stats["count"], 2),
+                "mean_db_ms": round(stats["db"] * 1000 / stats["count"], 3),
+                "mean_serialize_ms": round(stats["serialize"] * 1000 / stats["count"], 3),
+                "histogram": list(stats["histogram"]),
+            }
+            for route, stats in sorted(_routes.items())
+        }
+    return {
+        "enabled": settings.REQUEST_METRICS_ENABLED,
+        "pid": os.getpid(),
+        "buckets_ms": list(BUCKETS_MS),
+        "routes": routes,
+    }
+
+
+def reset():
+    with _lock:
+        _routes.clear()
+
+
+def _execute(execute, sql, params, many, context):
+    # counts towards the request in progress: under ASGI its queries run on another thread,
+    # which the context variable follows but per-connection wrappers set up here wouldn't
+    metrics = _current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    return metrics(execute, sql, params, many, context)
+
+
+def _instrument_connection(connection, **kwargs):
+    if _execute not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_execute)
+
+
+def _instrument_connections():
+    """Time the queries of every connection, present and future. Installed once, when enabled."""
+    connection_created.connect(_instrument_connection, dispatch_uid="request_metrics")
+    for connection in connections.all(initialized_only=True):
+        _instrument_connection(connection)
+
+
+class RequestMetricsMiddleware:
+    """Per-request wall, DB and serializer time, as ``Server-Timing``, a log line and histograms.
+
+    Enabled by ``REQUEST_METRICS_ENABLED``; otherwise Django drops it from the chain at
+    startup. Put it first in ``MIDDLEWARE`` so the wall time covers the rest. Serializer time
+    overlaps DB time when querysets are evaluated lazily while serializing, and the body of a
+    streaming response is produced after the figures are taken.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.REQUEST_METRICS_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+        _instrument_serializers()
+        _instrument_connections()
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self._report(request, response, metrics, time.perf_counter() - started)
+
+    async def __acall__(self, request):
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self._report(request, response, metrics, time.perf_counter() - started)
+
+    def _report(self, request, response, metrics, wall):
+        match = request.resolver_match
+        route = f"{request.method} {match.view_name if match else 'unresolved'}"
+        response["Server-Timing"] = ", ".join(
+            [
+                f"total;dur={wall * 1000:.2f}",
+                f'db;dur={metrics.db * 1000:.2f};desc="{metrics.queries} queries"',
+                f"serialize;dur={metrics.serialize * 1000:.2f}",
+            ]
+        )
+        record(route, wall, metrics)
+        logger.info(
+            json.dumps(
+                {
+                    "event": "request",
+                    "route": route,
+                    "path": request.path,
+                    "status": response.status_code,
+                    "wall_ms": round(wall * 1000, 3),
+                    "queries": metrics.queries,
+                    "db_ms": round(metrics.db * 1000, 3),
+                    "serialize_ms": round(metrics.serialize * 1000, 3),
+                }
+            )
+        )
+        return response
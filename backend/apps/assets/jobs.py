@@ -0,0 +1,114 @@
+import logging
+import os
+import socket
+import time
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+HANDLERS = {}
+
+
+class PermanentFailure(Exception):
+    """Raised by a handler for a failure that retrying won't fix."""
+
+
+def handler(kind, on_give_up=None):
+    """Register the decorated function to run jobs of ``kind`` with their payload as kwargs.
+
+    ``on_give_up(**payload)`` is called once the job has failed for good.
+    """
+
+    def register(func):
+        HANDLERS[kind] = (func, on_give_up)
+        return func
+
+    return register
+
+
+def enqueue(kind, **payload):
+    return Job.objects.create(kind=kind, payload=payload, max_attempts=settings.JOB_MAX_ATTEMPTS)
+
+
+def backoff(attempts):
+    """Delay before retrying a job that failed its ``attempts``-th run, doubling each time."""
+    return timedelta(seconds=settings.JOB_RETRY_BACKOFF * 2 ** (attempts - 1))
+
+
+def claim(worker, limit):
+    """Mark up to ``limit`` due jobs as running for ``worker`` and return them.
+
+    Rows locked by another worker's claim are skipped rather than waited for. Jobs left
+    running past ``JOB_LEASE_SECONDS``, by a worker that died, are due again.
+    """
+    now = timezone.now()
+    Job.objects.filter(
+        status=Job.RUNNING, locked_at__lt=now - timedelta(seconds=settings.JOB_LEASE_SECONDS)
+    ).update(status=Job.QUEUED, locked_by="", locked_at=None)
+    with transaction.atomic():
+        ids = list(
+            Job.objects.filter(status=Job.QUEUED, run_after__lte=now)
+            .order_by("run_after", "id")
+            .select_for_update(skip_locked=True)
+            .values_list("id", flat=True)[:limit]
+        )
+        Job.objects.filter(id__in=ids).update(
+            status=Job.RUNNING, locked_by=worker, locked_at=now, attempts=F("attempts") + 1
+        )
+    return list(Job.objects.filter(id__in=ids).order_by("run_after", "id"))
+
+
+def run(job):
+    """Run one claimed job, then record its success, its next retry or its failure."""
+    func, on_give_up = HANDLERS[job.kind]
+    give_up = job.attempts > job.max_attempts
+    if give_up:
+        # its worker died on every attempt
+        job.last_error = "Lease expired on the last attempt"
+    else:
+        try:
+            func(**job.payload)
+        except Exception as exc:
+            logger.exception("Job %s (%s) failed on attempt %s", job.pk, job.kind, job.attempts)
+            job.last_error = traceback.format_exc()
+            give_up = isinstance(exc, PermanentFailure) or job.attempts >= job.max_attempts
+            if not give_up:
+                job.status = Job.QUEUED
+                job.run_after = timezone.now() + backoff(job.attempts)
+        else:
+            job.status = Job.DONE
+            job.last_error = ""
+    if give_up:
+        job.status = Job.FAILED
+        if on_give_up:
+            on_give_up(**job.payload)
+    job.locked_by = ""
+    job.locked_at = None
+    job.save(update_fields=["status", "run_after", "last_error", "locked_by", "locked_at", "updated_at"])
+    return job
+
+
+def work(index=0, batch=10, poll_interval=2.0, once=False):
+    """Claim and run due jobs, sleeping ``poll_interval`` seconds whenever none are due.
+
+    With ``once`` it returns, with the number of jobs run, as soon as none are due.
+    """
+    worker = f"{socket.gethostname()}:{os.getpid()}:{index}"
+    ran = 0
+    while True:
+        jobs = claim(worker, batch)
+        for job in jobs:
+            run(job)
+        ran += len(jobs)
+        if not jobs:
+            if once:
+                return ran
+            time.sleep(poll_interval)
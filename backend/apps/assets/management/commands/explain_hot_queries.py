@@ -0,0 +1,88 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.http import HttpRequest
+from rest_framework.request import Request
+
+from apps.assets.analytics import resample
+from apps.assets.models import MarketValue, RentalContract
+from apps.assets.views import (
+    AssetViewSet,
+    AssetDocumentViewSet,
+    MarketValueViewSet,
+    TenantViewSet,
+    RentalContractViewSet,
+)
+
+LIST_VIEWSETS = {
+    "assets": AssetViewSet,
+    "documents": AssetDocumentViewSet,
+    "values": MarketValueViewSet,
+    "tenants": TenantViewSet,
+    "contracts": RentalContractViewSet,
+}
+
+
+def viewset_queryset(viewset_class, action, user):
+    """The queryset a viewset builds for ``user``, without going through a URL."""
+    request = Request(HttpRequest())
+    request.user = user
+    view = viewset_class(request=request, action=action, format_kwarg=None, kwargs={})
+    return view.filter_queryset(view.get_queryset())
+
+
+def hot_queries(user):
+    """Yield ``(name, queryset)`` for the queries the API runs most, as it runs them."""
+    page = settings.REST_FRAMEWORK["PAGE_SIZE"] + 1
+    for name, viewset_class in LIST_VIEWSETS.items():
+        # the first page, ordered as the keyset paginator orders it
+        ordering = viewset_class.pagination_class.ordering
+        yield f"{name} list", viewset_queryset(viewset_class, "list", user).order_by(*ordering)[:page]
+    performance = viewset_queryset(AssetViewSet, "portfolio_performance", user)
+    yield "portfolio performance", performance.order_by("-performance", "id")
+    yield "active contracts", RentalContract.objects.owned_by(user).active()
+    yield "valuation series", resample(MarketValue.objects.owned_by(user), "month", "last")
+
+
+def explain(queryset, **options):
+    """EXPLAIN the queryset's SQL.
+
+    ``QuerySet.explain()`` puts the prefix inside the subquery Django wraps around filters on
+    window functions, so the compiled SQL is prefixed here instead.
+    """
+    connection = connections[queryset.db]
+    prefix = connection.ops.explain_query_prefix(**options)
+    sql, params = queryset.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f"{prefix} {sql}", params)
+        return "\n".join(" ".join(str(column) for column in row) for row in cursor.fetchall())
+
+
+class Command(BaseCommand):
+    help = (
+        "Print the database's EXPLAIN output for the hot asset queries, built for one owner "
+        "exactly as the viewsets build them, so plan regressions are visible."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--owner", required=True, help="Username whose queries are explained.")
+        parser.add_argument(
+            "--analyze", action="store_true", help="Run the queries too (EXPLAIN ANALYZE, PostgreSQL only)."
+        )
+
+    def handle(self, *args, owner, analyze, **options):
+        User = get_user_model()
+        try:
+            owner = User.objects.get_by_natural_key(owner)
+        except User.DoesNotExist:
+            raise CommandError(f"Unknown owner {owner!r}")
+        explain_options = {"analyze": True} if analyze else {}
+        for name, queryset in hot_queries(owner):
+            try:
+                plan = explain(queryset, **explain_options)
+            except ValueError as exc:
+                raise CommandError(exc)
+            self.stdout.write(self.style.MIGRATE_HEADING(f"== {name}"))
+            self.stdout.write(plan)
+            self.stdout.write("")
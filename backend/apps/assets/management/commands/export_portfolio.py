@@ -0,0 +1,42 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from apps.assets.exporting import FORMATS, RESOURCES, export_queryset, stream_rows
+
+
+def date_arg(value):
+    parsed = parse_date(value)
+    if parsed is None:
+        raise ValueError(value)
+    return parsed
+
+
+class Command(BaseCommand):
+    help = "Stream a portfolio resource as CSV or NDJSON without loading it into memory."
+
+    def add_arguments(self, parser):
+        parser.add_argument("resource", choices=sorted(RESOURCES))
+        parser.add_argument("--format", dest="fmt", choices=sorted(FORMATS), default="csv")
+        parser.add_argument("--owner", help="Username to export; all owners when omitted.")
+        parser.add_argument("--date-from", type=date_arg)
+        parser.add_argument("--date-to", type=date_arg)
+        parser.add_argument("--output", help="File to write; stdout when omitted.")
+        parser.add_argument("--chunk-size", type=int, default=2000)
+
+    def handle(self, *args, resource, fmt, owner, date_from, date_to, output, chunk_size, **options):
+        owner_id = None
+        if owner:
+            User = get_user_model()
+            try:
+                owner_id = User.objects.get_by_natural_key(owner).pk
+            except User.DoesNotExist:
+                raise CommandError(f"Unknown owner {owner!r}")
+        rows = export_queryset(resource, owner_id=owner_id, date_from=date_from, date_to=date_to)
+        lines = stream_rows(resource, fmt, rows, chunk_size=chunk_size)
+        if output:
+            with open(output, "w", newline="", encoding="utf-8") as handle:
+                handle.writelines(lines)
+        else:
+            for line in lines:
+                self.stdout.write(line, ending="")
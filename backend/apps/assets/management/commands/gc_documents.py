@@ -0,0 +1,88 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from apps.assets.documents import BLOB_DIR, document_storage
+from apps.assets.models import DocumentBlob
+
+
+def stored_blobs(storage):
+    """Yield the name of every file under the blob directory."""
+    if not storage.exists(BLOB_DIR):
+        return
+    for directory in storage.listdir(BLOB_DIR)[0]:
+        for name in storage.listdir(f"{BLOB_DIR}/{directory}")[1]:
+            yield f"{BLOB_DIR}/{directory}/{name}"
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete stored document blobs that no document references any more, and blob files "
+        "without a record, as left behind by uploads whose transaction rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--grace-minutes",
+            type=int,
+            default=60,
+            help="Keep blobs released or written more recently; an upload may still use them.",
+        )
+        parser.add_argument(
+            "--recount", action="store_true", help="Recompute reference counts from the documents."
+        )
+        parser.add_argument(
+            "--dry-run", action="store_true", help="Report without deleting anything."
+        )
+
+    def handle(self, *args, grace_minutes, recount, dry_run, **options):
+        storage = document_storage()
+        cutoff = timezone.now() - timedelta(minutes=grace_minutes)
+        with transaction.atomic():
+            if recount:
+                DocumentBlob.objects.recount()
+            # locked, so an upload acquiring one of them waits and then records it afresh
+            orphans = list(
+                DocumentBlob.objects.select_for_update()
+                .filter(refs=0)
+                .filter(
+                    Q(released_at__lt=cutoff) | Q(released_at__isnull=True, created_at__lt=cutoff)
+                )
+            )
+            DocumentBlob.objects.filter(pk__in=[blob.pk for blob in orphans]).delete()
+            removed = {blob.name for blob in orphans}
+            freed = sum(blob.size for blob in orphans)
+            known = set(DocumentBlob.objects.values_list("sha256", flat=True))
+            if dry_run:
+                transaction.set_rollback(True)
+        strays = {
+            name
+            for name in stored_blobs(storage)
+            if name not in removed
+            and name.rsplit("/", 1)[-1] not in known
+            and storage.get_modified_time(name) < cutoff
+        }
+        if not dry_run:
+            # only once the records are gone for good, and checked again file by file: an
+            # upload of the same content may have reused the file and recorded it since
+            for name in removed | strays:
+                if storage.exists(name) and not self.reused(storage, name, cutoff):
+                    storage.delete(name)
+        verb = "Would remove" if dry_run else "Removed"
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{verb} {len(removed)} orphaned blobs ({freed} bytes) "
+                f"and {len(strays)} unrecorded blob files"
+            )
+        )
+
+    def reused(self, storage, name, cutoff):
+        """Whether an upload has touched or recorded the blob file since it was found orphaned."""
+        digest = name.rsplit("/", 1)[-1]
+        return (
+            storage.get_modified_time(name) >= cutoff
+            or DocumentBlob.objects.filter(pk=digest).exists()
+        )
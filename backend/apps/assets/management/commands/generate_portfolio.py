@@ -0,0 +1,113 @@
+import random
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from apps.assets.models import Asset, MarketValue, Tenant, RentalContract
+from apps.assets.signals import assets_bulk_changed
+
+CENT = Decimal("0.01")
+
+
+def valuations(rng, start, end, step):
+    """A random walk of valuations from ``start`` to ``end``, one every ``step`` days."""
+    value = rng.uniform(100_000, 1_000_000)
+    day = start
+    while day <= end:
+        yield day, Decimal(value).quantize(CENT)
+        value *= 1 + rng.gauss(0.03 / 365 * step, 0.01 * step**0.5)
+        day += timedelta(days=step)
+
+
+def tenancies(rng, start, end):
+    """Consecutive ``(start, end)`` tenancies of one to three years with short vacancies between.
+
+    The last one is open-ended when it runs past ``end``.
+    """
+    day = start + timedelta(days=rng.randint(0, 90))
+    while day <= end:
+        last = day + timedelta(days=rng.randint(365, 3 * 365))
+        if last >= end:
+            yield day, None
+            return
+        yield day, last
+        day = last + timedelta(days=rng.randint(1, 90))
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate a reproducible benchmark portfolio: users owning assets with years of "
+        "market values, tenants and rental contracts. The same --seed gives the same data."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=3)
+        parser.add_argument("--assets", type=int, default=20, help="Assets per user.")
+        parser.add_argument("--years", type=int, default=10, help="Years of history up to today.")
+        parser.add_argument("--step-days", type=int, default=1, help="Days between valuations.")
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--prefix", default="bench", help="Usernames are <prefix>-<n>.")
+        parser.add_argument("--replace", action="store_true", help="Delete existing <prefix>- users first.")
+        parser.add_argument("--batch-size", type=int, default=5000)
+
+    def handle(self, *args, users, assets, years, step_days, seed, prefix, replace, batch_size, **options):
+        User = get_user_model()
+        existing = User.objects.filter(username__startswith=f"{prefix}-")
+        if existing.exists():
+            if not replace:
+                raise CommandError(f"Users named {prefix}-* already exist; pass --replace to regenerate.")
+            existing.delete()
+        rng = random.Random(seed)
+        end = date.today()
+        start = end - timedelta(days=365 * years)
+        started = time.perf_counter()
+        counts = {"values": 0, "contracts": 0}
+        with transaction.atomic():
+            owners = [User(username=f"{prefix}-{n}") for n in range(users)]
+            for owner in owners:
+                owner.set_unusable_password()
+            owners = User.objects.bulk_create(owners)
+            created = Asset.objects.bulk_create(
+                [
+                    Asset(owner=owner, name=f"Asset {n}", address=f"Via {rng.randint(1, 200)}, {owner.username}")
+                    for owner in owners
+                    for n in range(assets)
+                ]
+            )
+            for asset in created:
+                values = [
+                    MarketValue(asset=asset, date=day, value=value)
+                    for day, value in valuations(rng, start, end, step_days)
+                ]
+                MarketValue.objects.bulk_create(values, batch_size=batch_size)
+                counts["values"] += len(values)
+                spans = list(tenancies(rng, start, end))
+                tenants = Tenant.objects.bulk_create(
+                    [Tenant(asset=asset, full_name=f"Tenant {asset.pk}-{n}") for n in range(len(spans))]
+                )
+                rent = values[-1].value * Decimal(rng.uniform(0.03, 0.07)) / 12
+                RentalContract.objects.bulk_create(
+                    [
+                        RentalContract(
+                            asset=asset,
+                            tenant=tenant,
+                            start_date=first,
+                            end_date=last,
+                            monthly_rent=rent.quantize(CENT),
+                            deposit=(rent * 3).quantize(CENT),
+                        )
+                        for tenant, (first, last) in zip(tenants, spans)
+                    ]
+                )
+                counts["contracts"] += len(spans)
+            assets_bulk_changed([asset.pk for asset in created])
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Generated {len(owners)} users, {len(created)} assets, {counts['values']} values and "
+                f"{counts['contracts']} contracts in {time.perf_counter() - started:.1f}s"
+            )
+        )
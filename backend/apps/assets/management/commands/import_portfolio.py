@@ -0,0 +1,87 @@
+import multiprocessing
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import django
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.assets.importing import KINDS, PortfolioImporter, load_chunk, read_chunks
+from apps.assets.signals import assets_bulk_changed
+
+# swapped out in tests, where worker processes can't see the test database
+executor_class = ProcessPoolExecutor
+
+
+def load_parallel(kind, chunks, workers, committed):
+    """Write chunks from ``workers`` processes, keeping at most two chunks per worker queued.
+
+    The assets of every chunk that commits are added to ``committed``, even if another fails.
+    """
+    futures = {}
+    pending = set()
+    try:
+        # spawned workers open their own database connections instead of inheriting ours
+        with executor_class(
+            max_workers=workers, mp_context=multiprocessing.get_context("spawn"), initializer=django.setup
+        ) as pool:
+            for chunk in chunks:
+                if len(pending) >= workers * 2:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        future.result()
+                future = pool.submit(load_chunk, kind, chunk)
+                futures[future] = {row[0] for row in chunk}
+                pending.add(future)
+        return sum(future.result() for future in futures)
+    finally:
+        # leaving the pool waited for every submitted chunk
+        for future, asset_ids in futures.items():
+            if future.exception() is None:
+                committed.update(asset_ids)
+
+
+class Command(BaseCommand):
+    help = (
+        "Bulk-load MarketValue history or RentalContract records from CSV, streaming the file "
+        "in chunks that are each written in one transaction."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("kind", choices=KINDS)
+        parser.add_argument("path", help="CSV file with a header row.")
+        parser.add_argument("--owner", required=True, help="Username owning the referenced assets.")
+        parser.add_argument("--chunk-size", type=int, default=5000)
+        parser.add_argument("--workers", type=int, default=1, help="Processes writing chunks in parallel.")
+
+    def handle(self, *args, kind, path, owner, chunk_size, workers, **options):
+        User = get_user_model()
+        try:
+            owner = User.objects.get_by_natural_key(owner)
+        except User.DoesNotExist:
+            raise CommandError(f"Unknown owner {owner!r}")
+        importer = PortfolioImporter(owner, kind)
+        started = time.perf_counter()
+        committed = set()
+        try:
+            with open(path, newline="", encoding="utf-8") as handle:
+                chunks = (importer.prepare(line, rows) for line, rows in read_chunks(handle, chunk_size))
+                if workers > 1:
+                    loaded = load_parallel(kind, chunks, workers, committed)
+                else:
+                    loaded = 0
+                    for chunk in chunks:
+                        loaded += load_chunk(kind, chunk)
+                        committed.update(row[0] for row in chunk)
+        finally:
+            # the chunks that committed stand even when a later one failed
+            assets_bulk_changed(committed)
+        elapsed = time.perf_counter() - started
+        for error in importer.errors:
+            self.stderr.write(error)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Imported {loaded} {kind} rows ({len(importer.errors)} skipped) in {elapsed:.2f}s "
+                f"({loaded / elapsed:.0f} rows/s)"
+            )
+        )
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from apps.assets.models import Asset, AssetSummary
+from apps.assets.response_cache import invalidate_all
+from apps.assets.stats import invalidate_overview
+
+
+class Command(BaseCommand):
+    help = "Recompute every AssetSummary from the MarketValue and RentalContract rows."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, batch_size, **options):
+        total = 0
+        last_pk = 0
+        while True:
+            ids = list(
+                Asset.objects.filter(pk__gt=last_pk).order_by("pk").values_list("pk", flat=True)[:batch_size]
+            )
+            if not ids:
+                break
+            with transaction.atomic():
+                total += AssetSummary.objects.sync(ids)
+            last_pk = ids[-1]
+        invalidate_overview()
+        invalidate_all()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {total} asset summaries"))
@@ -0,0 +1,31 @@
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from apps.assets.models import AssetSummary, MarketValue, RentalContract
+from apps.assets.response_cache import invalidate_all
+from apps.assets.stats import invalidate_overview
+
+
+class Command(BaseCommand):
+    help = (
+        "Refresh the summaries of assets whose contracts started or ended, or whose valuations "
+        "became current, since the previous run. Schedule it daily."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=1, help="Days since the previous run.")
+
+    def handle(self, *args, days, **options):
+        today = date.today()
+        since = today - timedelta(days=days)
+        # a contract is active through its end_date, so it lapses the day after
+        contracts = RentalContract.objects.filter(
+            Q(start_date__gt=since, start_date__lte=today) | Q(end_date__gte=since, end_date__lt=today)
+        ).values("asset")
+        values = MarketValue.objects.filter(date__gt=since, date__lte=today).values("asset")
+        updated = AssetSummary.objects.filter(Q(asset__in=contracts) | Q(asset__in=values)).refresh(today)
+        invalidate_overview()
+        invalidate_all()
+        self.stdout.write(self.style.SUCCESS(f"Rolled over {updated} asset summaries"))
@@ -0,0 +1,38 @@
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.core.management.base import BaseCommand
+
+from apps.assets.jobs import work
+
+# swapped out in tests, where worker processes can't see the test database
+executor_class = ProcessPoolExecutor
+
+
+class Command(BaseCommand):
+    help = (
+        "Run background jobs (document processing) from the database queue in a pool of "
+        "worker processes, outside the web workers. Runs until stopped unless --once is given."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--processes", type=int, default=2, help="Worker processes.")
+        parser.add_argument("--batch", type=int, default=10, help="Jobs claimed at a time per worker.")
+        parser.add_argument(
+            "--poll-interval", type=float, default=2.0, help="Seconds to wait when no job is due."
+        )
+        parser.add_argument("--once", action="store_true", help="Exit once no job is due.")
+
+    def handle(self, *args, processes, batch, poll_interval, once, **options):
+        if processes > 1:
+            # spawned workers open their own database connections instead of inheriting ours
+            context = multiprocessing.get_context("spawn")
+            with executor_class(max_workers=processes, mp_context=context, initializer=django.setup) as pool:
+                futures = [
+                    pool.submit(work, index, batch, poll_interval, once) for index in range(processes)
+                ]
+                ran = sum(future.result() for future in futures)
+        else:
+            ran = work(0, batch, poll_interval, once)
+        self.stdout.write(self.style.SUCCESS(f"Ran {ran} jobs"))
@@ -0,0 +1,28 @@
+from django.db import migrations, models
+from django.conf import settings
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("assets", "0001_initial"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="asset",
+            index=models.Index(fields=["owner", "-created_at", "id"], name="assets_asset_owner_created_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="assetdocument",
+            index=models.Index(fields=["-uploaded_at", "id"], name="assets_doc_uploaded_id_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="marketvalue",
+            index=models.Index(fields=["-date", "id"], name="assets_mv_date_id_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="rentalcontract",
+            index=models.Index(fields=["-start_date", "id"], name="assets_rc_start_id_idx"),
+        ),
+    ]
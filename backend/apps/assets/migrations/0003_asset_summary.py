@@ -0,0 +1,49 @@
+from django.db import migrations, models
+import django.db.models.deletion
+
+from apps.assets.models import AssetSummaryQuerySet
+
+
+def backfill_summaries(apps, schema_editor):
+    Asset = apps.get_model("assets", "Asset")
+    AssetSummary = apps.get_model("assets", "AssetSummary")
+    ids = Asset.objects.values_list("pk", flat=True).iterator()
+    AssetSummary.objects.bulk_create([AssetSummary(asset_id=pk) for pk in ids], batch_size=1000)
+    # computed as rebuild_asset_summaries does; the subqueries read only columns that
+    # exist at this migration
+    AssetSummaryQuerySet(AssetSummary).refresh()
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("assets", "0002_keyset_pagination_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="AssetSummary",
+            fields=[
+                (
+                    "asset",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="summary",
+                        serialize=False,
+                        to="assets.asset",
+                    ),
+                ),
+                ("latest_value", models.DecimalField(blank=True, decimal_places=2, max_digits=12, null=True)),
+                ("latest_value_date", models.DateField(blank=True, null=True)),
+                ("current_monthly_rent", models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ("active_contracts", models.PositiveIntegerField(default=0)),
+                ("is_occupied", models.BooleanField(default=False)),
+                ("refreshed_on", models.DateField(blank=True, null=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "indexes": [models.Index(fields=["is_occupied"], name="assets_summary_occupied_idx")],
+            },
+        ),
+        migrations.RunPython(backfill_summaries, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,53 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("assets", "0004_updated_at"),
+    ]
+
+    operations = [
+        # listings are scoped by owner, so a global order index is never read for them; 0009
+        # adds owner-prefixed ones in listing order
+        migrations.RemoveIndex(model_name="assetdocument", name="assets_doc_uploaded_id_idx"),
+        migrations.RemoveIndex(model_name="marketvalue", name="assets_mv_date_id_idx"),
+        migrations.RemoveIndex(model_name="rentalcontract", name="assets_rc_start_id_idx"),
+        migrations.AddIndex(
+            model_name="asset",
+            index=models.Index(fields=["owner", "-updated_at"], name="assets_asset_owner_updated_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="assetdocument",
+            index=models.Index(fields=["asset", "-uploaded_at", "id"], name="assets_doc_asset_uploaded_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="tenant",
+            index=models.Index(fields=["asset", "id"], name="assets_tenant_asset_id_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="rentalcontract",
+            index=models.Index(fields=["asset", "-start_date", "id"], name="assets_rc_asset_start_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="rentalcontract",
+            index=models.Index(
+                condition=models.Q(("end_date__isnull", True)),
+                fields=["asset", "start_date"],
+                name="assets_rc_open_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="rentalcontract",
+            index=models.Index(
+                condition=models.Q(("end_date__isnull", False)),
+                fields=["asset", "end_date", "start_date"],
+                name="assets_rc_asset_end_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="rentalcontract",
+            index=models.Index(
+                condition=models.Q(("end_date__isnull", False)), fields=["end_date"], name="assets_rc_end_date_idx"
+            ),
+        ),
+    ]
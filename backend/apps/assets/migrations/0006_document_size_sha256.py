@@ -0,0 +1,20 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("assets", "0005_hot_query_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="assetdocument",
+            name="size",
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="assetdocument",
+            name="sha256",
+            field=models.CharField(blank=True, max_length=64),
+        ),
+    ]
@@ -0,0 +1,31 @@
+import apps.assets.documents
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("assets", "0006_document_size_sha256"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DocumentBlob",
+            fields=[
+                ("sha256", models.CharField(max_length=64, primary_key=True, serialize=False)),
+                ("size", models.PositiveBigIntegerField()),
+                ("refs", models.PositiveIntegerField(default=0)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("released_at", models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name="assetdocument",
+            name="filename",
+            field=models.CharField(blank=True, max_length=255),
+        ),
+        migrations.AlterField(
+            model_name="assetdocument",
+            name="file",
+            field=models.FileField(storage=apps.assets.documents.document_storage, upload_to="asset_docs/"),
+        ),
+    ]
@@ -0,0 +1,61 @@
+from django.db import migrations, models
+import django.utils.timezone
+
+PROCESSING_STATUSES = [("pending", "pending"), ("processing", "processing"), ("ready", "ready"), ("failed", "failed")]
+JOB_STATUSES = [("queued", "queued"), ("running", "running"), ("done", "done"), ("failed", "failed")]
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("assets", "0007_document_blobs"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="assetdocument",
+            name="processing_status",
+            field=models.CharField(blank=True, choices=PROCESSING_STATUSES, max_length=16),
+        ),
+        migrations.AddField(
+            model_name="assetdocument",
+            name="processing_error",
+            field=models.TextField(blank=True),
+        ),
+        migrations.AddField(
+            model_name="assetdocument",
+            name="text",
+            field=models.TextField(blank=True),
+        ),
+        migrations.AddField(
+            model_name="assetdocument",
+            name="thumbnail",
+            field=models.ImageField(blank=True, upload_to="thumbnails/"),
+        ),
+        migrations.CreateModel(
+            name="Job",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("kind", models.CharField(max_length=64)),
+                ("payload", models.JSONField(default=dict)),
+                ("status", models.CharField(choices=JOB_STATUSES, default="queued", max_length=16)),
+                ("attempts", models.PositiveIntegerField(default=0)),
+                ("max_attempts", models.PositiveIntegerField(default=5)),
+                ("run_after", models.DateTimeField(default=django.utils.timezone.now)),
+                ("locked_by", models.CharField(blank=True, max_length=128)),
+                ("locked_at", models.DateTimeField(blank=True, null=True)),
+                ("last_error", models.TextField(blank=True)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        condition=models.Q(("status", "queued")), fields=["run_after", "id"], name="assets_job_due_idx"
+                    ),
+                    models.Index(
+                        condition=models.Q(("status", "running")), fields=["locked_at"], name="assets_job_lease_idx"
+                    ),
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,64 @@
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+import django.db.models.deletion
+
+CHILD_MODELS = ("assetdocument", "marketvalue", "tenant", "rentalcontract")
+
+
+def owner_field(null=False):
+    return models.ForeignKey(
+        db_index=False,
+        editable=False,
+        null=null,
+        on_delete=django.db.models.deletion.CASCADE,
+        related_name="+",
+        to=settings.AUTH_USER_MODEL,
+    )
+
+
+def copy_owners(apps, schema_editor):
+    Asset = apps.get_model("assets", "Asset")
+    owners = Asset.objects.filter(pk=OuterRef("asset_id")).values("owner_id")[:1]
+    for name in CHILD_MODELS:
+        apps.get_model("assets", name).objects.update(owner_id=Subquery(owners))
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("assets", "0008_document_processing_jobs"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        # nullable until every row has its copy
+        *(
+            migrations.AddField(model_name=name, name="owner", field=owner_field(null=True))
+            for name in CHILD_MODELS
+        ),
+        migrations.RunPython(copy_owners, migrations.RunPython.noop),
+        *(
+            migrations.AlterField(model_name=name, name="owner", field=owner_field())
+            for name in CHILD_MODELS
+        ),
+        migrations.AddIndex(
+            model_name="assetdocument",
+            index=models.Index(
+                fields=["owner", "-uploaded_at", "id"], name="assets_doc_owner_uploaded_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="marketvalue",
+            index=models.Index(fields=["owner", "-date", "id"], name="assets_mv_owner_date_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="tenant",
+            index=models.Index(fields=["owner", "id"], name="assets_tenant_owner_id_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="rentalcontract",
+            index=models.Index(
+                fields=["owner", "-start_date", "id"], name="assets_rc_owner_start_idx"
+            ),
+        ),
+    ]
@@ -1,16 +1,122 @@
+from datetime import date
+from decimal import Decimal
+
 from django.db import models
+from django.utils import timezone
+from django.db.models import (
+    Case,
+    Count,
+    DecimalField,
+    Exists,
+    F,
+    FloatField,
+    OuterRef,
+    Q,
+    Subquery,
+    Sum,
+    Value,
+    When,
+)
+from django.db.models.functions import Cast, Coalesce
 from django.contrib.auth import get_user_model
 
+from .documents import blob_name, document_storage
 
 User = get_user_model()
 
 
+class AssetQuerySet(models.QuerySet):
+    def owned_by(self, user):
+        return self.filter(owner=user)
+
+    def with_performance(self, as_of=None):
+        """Annotate annual_income, market_value and performance (yield).
+
+        Without ``as_of`` the figures come from the materialized AssetSummary; with it they
+        are computed from the raw MarketValue and RentalContract rows as of that date.
+        """
+        if as_of is None:
+            return self._annotate_performance(
+                F("summary__latest_value"), F("summary__current_monthly_rent")
+            )
+        latest_value = (
+            MarketValue.objects.filter(asset=OuterRef("pk"), date__lte=as_of)
+            .order_by("-date")
+            .values("value")[:1]
+        )
+        monthly_rent = (
+            RentalContract.objects.active(as_of)
+            .filter(asset=OuterRef("pk"))
+            .order_by()
+            .values("asset")
+            .annotate(total=Sum("monthly_rent"))
+            .values("total")
+        )
+        return self._annotate_performance(Subquery(latest_value), Subquery(monthly_rent))
+
+    def _annotate_performance(self, market_value, monthly_rent):
+        money = DecimalField(max_digits=14, decimal_places=2)
+        return self.annotate(
+            market_value=Coalesce(market_value, Value(Decimal("0")), output_field=money),
+            annual_income=Coalesce(monthly_rent, Value(Decimal("0")), output_field=money) * 12,
+        ).annotate(
+            # a ratio rather than money: float division avoids SQLite's integer NUMERIC division
+            performance=Case(
+                When(
+                    market_value__gt=0,
+                    then=Cast("annual_income", FloatField()) / Cast("market_value", FloatField()),
+                ),
+                default=Value(0.0),
+                output_field=FloatField(),
+            )
+        )
+
+
+class AssetChildQuerySet(models.QuerySet):
+    def owned_by(self, user):
+        """Rows on ``user``'s assets, through their copy of the asset's owner.
+
+        No join is needed, so the owner-prefixed indexes serve the listings in page order,
+        and ``IsOwner`` can check ownership without loading the asset.
+        """
+        return self.filter(owner=user)
+
+    def bulk_create(self, objs, *args, **kwargs):
+        # save() copies the owner in a pre_save receiver; here rows without one get it from
+        # the asset they hold, or else with one query for the lot
+        objs = list(objs)
+        asset = self.model._meta.get_field("asset")
+        for obj in objs:
+            if obj.owner_id is None and asset.is_cached(obj):
+                obj.owner_id = obj.asset.owner_id
+        missing = {obj.asset_id for obj in objs if obj.owner_id is None}
+        if missing:
+            owners = dict(Asset.objects.filter(pk__in=missing).values_list("pk", "owner_id"))
+            for obj in objs:
+                if obj.owner_id is None:
+                    obj.owner_id = owners.get(obj.asset_id)
+        return super().bulk_create(objs, *args, **kwargs)
+
+
 class Asset(models.Model):
     owner = models.ForeignKey(User, on_delete=models.CASCADE, related_name="assets")
     name = models.CharField(max_length=255)
     address = models.CharField(max_length=500, blank=True)
     description = models.TextField(blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    # also bumped by every write to the asset's documents, values, tenants and contracts
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = AssetQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["owner", "-created_at", "id"], name="assets_asset_owner_created_idx"
+            ),
+            # Max(updated_at) per owner versions the conditional GETs
+            models.Index(fields=["owner", "-updated_at"], name="assets_asset_owner_updated_idx"),
+        ]
 
     def __str__(self):
         return self.name
@@ -18,42 +124,260 @@ class Asset(models.Model):
 
 class AssetDocument(models.Model):
     asset = models.ForeignKey(Asset, on_delete=models.CASCADE, related_name="documents")
-    file = models.FileField(upload_to="asset_docs/")
+    # the asset's owner, copied onto each child row for owned_by(); indexed in listing order
+    owner = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name="+", editable=False, db_index=False
+    )
+    # content-addressed: the stored name is the blob's, the uploaded one is kept in filename
+    file = models.FileField(upload_to="asset_docs/", storage=document_storage)
+    filename = models.CharField(max_length=255, blank=True)
     description = models.CharField(max_length=255, blank=True)
+    # computed while the upload streams in; blank for documents uploaded before they existed
+    size = models.PositiveBigIntegerField(default=0)
+    sha256 = models.CharField(max_length=64, blank=True)
+    # filled in by the process_document job; blank status for documents never queued
+    PENDING, PROCESSING, READY, FAILED = "pending", "processing", "ready", "failed"
+    PROCESSING_STATUSES = [(s, s) for s in (PENDING, PROCESSING, READY, FAILED)]
+    processing_status = models.CharField(max_length=16, choices=PROCESSING_STATUSES, blank=True)
+    processing_error = models.TextField(blank=True)
+    text = models.TextField(blank=True)
+    thumbnail = models.ImageField(upload_to="thumbnails/", blank=True)
     uploaded_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = AssetChildQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["asset", "-uploaded_at", "id"], name="assets_doc_asset_uploaded_idx"
+            ),
+            # the listing, in AssetDocumentPagination order
+            models.Index(
+                fields=["owner", "-uploaded_at", "id"], name="assets_doc_owner_uploaded_idx"
+            ),
+        ]
+
+
+class DocumentBlobQuerySet(models.QuerySet):
+    def acquire(self, sha256, size):
+        """Count one more document referencing the blob, recording the blob if it's new."""
+        if not self.filter(pk=sha256).update(refs=F("refs") + 1):
+            _, created = self.get_or_create(sha256=sha256, defaults={"size": size, "refs": 1})
+            if not created:
+                # another upload of the same content recorded it first
+                self.filter(pk=sha256).update(refs=F("refs") + 1)
+
+    def release(self, sha256):
+        self.filter(pk=sha256, refs__gt=0).update(refs=F("refs") - 1, released_at=timezone.now())
+
+    def recount(self):
+        """Recompute every reference count in this queryset from the documents."""
+        documents = (
+            AssetDocument.objects.filter(sha256=OuterRef("sha256"))
+            .order_by()
+            .values("sha256")
+            .annotate(n=Count("id"))
+            .values("n")
+        )
+        return self.update(refs=Coalesce(Subquery(documents), 0))
+
+
+class DocumentBlob(models.Model):
+    """A stored document content, shared by every ``AssetDocument`` with its checksum."""
+
+    sha256 = models.CharField(max_length=64, primary_key=True)
+    size = models.PositiveBigIntegerField()
+    refs = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    released_at = models.DateTimeField(null=True, blank=True)
+
+    objects = DocumentBlobQuerySet.as_manager()
+
+    @property
+    def name(self):
+        return blob_name(self.sha256)
 
 
 class MarketValue(models.Model):
     asset = models.ForeignKey(Asset, on_delete=models.CASCADE, related_name="values")
+    owner = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name="+", editable=False, db_index=False
+    )
     date = models.DateField()
     value = models.DecimalField(max_digits=12, decimal_places=2)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = AssetChildQuerySet.as_manager()
 
     class Meta:
         unique_together = ("asset", "date")
         ordering = ["-date"]
+        indexes = [
+            # the listing, in MarketValuePagination order
+            models.Index(fields=["owner", "-date", "id"], name="assets_mv_owner_date_idx"),
+        ]
 
 
 class Tenant(models.Model):
     asset = models.ForeignKey(Asset, on_delete=models.CASCADE, related_name="tenants")
+    owner = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name="+", editable=False, db_index=False
+    )
     full_name = models.CharField(max_length=255)
     email = models.EmailField(blank=True)
     phone = models.CharField(max_length=50, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = AssetChildQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["asset", "id"], name="assets_tenant_asset_id_idx"),
+            # the listing, in TenantPagination order
+            models.Index(fields=["owner", "id"], name="assets_tenant_owner_id_idx"),
+        ]
+
+
+class RentalContractQuerySet(AssetChildQuerySet):
+    def active(self, on=None):
+        """Contracts running on the given day (today by default)."""
+        on = on or date.today()
+        return self.filter(Q(end_date__isnull=True) | Q(end_date__gte=on), start_date__lte=on)
+
+    def running_between(self, first, last):
+        """Contracts running on any day from ``first`` to ``last``, both included."""
+        return self.filter(Q(end_date__isnull=True) | Q(end_date__gte=first), start_date__lte=last)
 
 
 class RentalContract(models.Model):
     tenant = models.ForeignKey(Tenant, on_delete=models.CASCADE, related_name="contracts")
     asset = models.ForeignKey(Asset, on_delete=models.CASCADE, related_name="contracts")
+    owner = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name="+", editable=False, db_index=False
+    )
     start_date = models.DateField()
     end_date = models.DateField(null=True, blank=True)
     monthly_rent = models.DecimalField(max_digits=10, decimal_places=2)
     deposit = models.DecimalField(max_digits=10, decimal_places=2, default=0)
     notes = models.TextField(blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = RentalContractQuerySet.as_manager()
 
     class Meta:
         ordering = ["-start_date"]
+        indexes = [
+            models.Index(fields=["asset", "-start_date", "id"], name="assets_rc_asset_start_idx"),
+            # the listing, in RentalContractPagination order, and the owner's active contracts
+            models.Index(fields=["owner", "-start_date", "id"], name="assets_rc_owner_start_idx"),
+            # active(): open-ended contracts, and bounded ones still running on the day
+            models.Index(
+                fields=["asset", "start_date"],
+                condition=Q(end_date__isnull=True),
+                name="assets_rc_open_idx",
+            ),
+            models.Index(
+                fields=["asset", "end_date", "start_date"],
+                condition=Q(end_date__isnull=False),
+                name="assets_rc_asset_end_idx",
+            ),
+            # rollover_asset_summaries looks up contracts that ended since the last run
+            models.Index(
+                fields=["end_date"],
+                condition=Q(end_date__isnull=False),
+                name="assets_rc_end_date_idx",
+            ),
+        ]
 
     @property
     def is_active(self) -> bool:
-        from datetime import date
+        return self.start_date <= date.today() and (
+            self.end_date is None or self.end_date >= date.today()
+        )
+
+
+class AssetSummaryQuerySet(models.QuerySet):
+    def refresh(self, as_of=None):
+        """Recompute every summary in this queryset with a single UPDATE."""
+        as_of = as_of or date.today()
+        values = MarketValue.objects.filter(asset=OuterRef("asset"), date__lte=as_of).order_by(
+            "-date"
+        )
+        active = (
+            RentalContract.objects.active(as_of)
+            .filter(asset=OuterRef("asset"))
+            .order_by()
+            .values("asset")
+        )
+        return self.update(
+            latest_value=Subquery(values.values("value")[:1]),
+            latest_value_date=Subquery(values.values("date")[:1]),
+            current_monthly_rent=Coalesce(
+                Subquery(active.annotate(total=Sum("monthly_rent")).values("total")),
+                Value(Decimal("0")),
+                output_field=DecimalField(max_digits=12, decimal_places=2),
+            ),
+            active_contracts=Coalesce(Subquery(active.annotate(n=Count("pk")).values("n")), 0),
+            is_occupied=Exists(active),
+            refreshed_on=as_of,
+            updated_at=timezone.now(),
+        )
+
+    def sync(self, asset_ids, as_of=None):
+        """Create missing summaries for ``asset_ids`` and refresh them."""
+        asset_ids = list(asset_ids)
+        self.bulk_create([AssetSummary(asset_id=pk) for pk in asset_ids], ignore_conflicts=True)
+        return self.filter(asset_id__in=asset_ids).refresh(as_of)
 
-        return self.start_date <= date.today() and (self.end_date is None or self.end_date >= date.today())
+
+class AssetSummary(models.Model):
+    """Denormalized per-asset figures, kept in step with MarketValue and RentalContract writes."""
+
+    asset = models.OneToOneField(
+        Asset, on_delete=models.CASCADE, primary_key=True, related_name="summary"
+    )
+    latest_value = models.DecimalField(max_digits=12, decimal_places=2, null=True, blank=True)
+    latest_value_date = models.DateField(null=True, blank=True)
+    current_monthly_rent = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    active_contracts = models.PositiveIntegerField(default=0)
+    is_occupied = models.BooleanField(default=False)
+    refreshed_on = models.DateField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = AssetSummaryQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["is_occupied"], name="assets_summary_occupied_idx"),
+        ]
+
+
+class Job(models.Model):
+    """A unit of background work, run by ``manage.py run_workers``; see ``apps.assets.jobs``."""
+
+    QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+    STATUSES = [(s, s) for s in (QUEUED, RUNNING, DONE, FAILED)]
+
+    kind = models.CharField(max_length=64)
+    payload = models.JSONField(default=dict)
+    status = models.CharField(max_length=16, choices=STATUSES, default=QUEUED)
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=5)
+    run_after = models.DateTimeField(default=timezone.now)
+    locked_by = models.CharField(max_length=128, blank=True)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            # what workers poll for: due jobs, and running ones whose lease may have expired
+            models.Index(
+                fields=["run_after", "id"], condition=Q(status="queued"), name="assets_job_due_idx"
+            ),
+            models.Index(
+                fields=["locked_at"], condition=Q(status="running"), name="assets_job_lease_idx"
+            ),
+        ]
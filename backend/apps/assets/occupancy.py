@@ -0,0 +1,133 @@
+from bisect import bisect_right
+from datetime import date, timedelta
+
+from .analytics import PERIODS, period_end
+
+DAY = timedelta(days=1)
+
+
+def period_start(day, period):
+    """First day of the ``period`` (a key of ``PERIODS``) that contains ``day``."""
+    months = PERIODS[period]
+    return date(day.year, (day.month - 1) // months * months + 1, 1)
+
+
+def periods(first, last, period):
+    """``(start, end)`` of every ``period`` from the one containing ``first`` to ``last``'s."""
+    bounds = []
+    start = period_start(first, period)
+    while start <= last:
+        end = period_end(start, period)
+        bounds.append((start, end))
+        start = end + DAY
+    return bounds
+
+
+def occupied_spells(contracts, first, last):
+    """Merge ``(asset_id, start_date, end_date)`` rows, ordered by asset and start, into spells.
+
+    Yields ``(asset_id, start, end)`` for each run of days from ``first`` to ``last`` that some
+    contract of the asset covers, in one pass: a contract starting by the day after the
+    current spell's end (open-ended ones have none) extends it, overlapping or back to back.
+    """
+    asset = start = end = None
+    for asset_id, contract_start, contract_end in contracts:
+        contract_end = min(contract_end or last, last)
+        contract_start = max(contract_start, first)
+        if contract_start > contract_end:
+            continue
+        if asset_id == asset and contract_start <= end + DAY:
+            end = max(end, contract_end)
+            continue
+        if asset is not None:
+            yield asset, start, end
+        asset, start, end = asset_id, contract_start, contract_end
+    if asset is not None:
+        yield asset, start, end
+
+
+def timeline(spells, first, last):
+    """One asset's spells, with the vacant runs between them, covering ``first`` to ``last``."""
+    runs = []
+    day = first
+    for _, start, end in spells:
+        if start > day:
+            runs.append({"start": day, "end": start - DAY, "occupied": False})
+        runs.append({"start": start, "end": end, "occupied": True})
+        day = end + DAY
+    if day <= last:
+        runs.append({"start": day, "end": last, "occupied": False})
+    return runs
+
+
+def occupied_days(spells, bounds):
+    """Days of each period in ``bounds`` that ``spells`` cover, spell by spell.
+
+    A spell only visits the periods it overlaps, found by bisecting their starts.
+    """
+    starts = [start for start, _ in bounds]
+    days = [0] * len(bounds)
+    for _, start, end in spells:
+        index = bisect_right(starts, start) - 1
+        while index < len(bounds) and bounds[index][0] <= end:
+            period_first, period_last = bounds[index]
+            days[index] += (min(end, period_last) - max(start, period_first)).days + 1
+            index += 1
+    return days
+
+
+def _series(bounds, occupied, assets):
+    """Vacant days and occupancy rate of each period, and the rate over all of them."""
+    series = []
+    for (start, end), days in zip(bounds, occupied):
+        capacity = ((end - start).days + 1) * assets
+        series.append(
+            {
+                "start": start,
+                "end": end,
+                "vacant_days": capacity - days,
+                "occupancy_rate": days / capacity if capacity else None,
+            }
+        )
+    capacity = ((bounds[-1][1] - bounds[0][0]).days + 1) * assets
+    return series, sum(occupied) / capacity if capacity else None
+
+
+def asset_occupancy(contracts, first, last, period="month"):
+    """Occupied and vacant runs of one asset's ``contracts``, and its vacancy per ``period``.
+
+    ``contracts`` are ``(asset_id, start_date, end_date)`` rows ordered by start; the window
+    runs from the start of the period containing ``first`` to the end of ``last``'s.
+    """
+    bounds = periods(first, last, period)
+    first, last = bounds[0][0], bounds[-1][1]
+    spells = list(occupied_spells(contracts, first, last))
+    series, rate = _series(bounds, occupied_days(spells, bounds), 1)
+    return {
+        "date_from": first,
+        "date_to": last,
+        "period": period,
+        "occupancy_rate": rate,
+        "timeline": timeline(spells, first, last),
+        "periods": series,
+    }
+
+
+def portfolio_occupancy(assets, contracts, first, last, period="month"):
+    """Vacant asset-days and occupancy rate per ``period`` of ``assets`` assets.
+
+    ``contracts`` are their ``(asset_id, start_date, end_date)`` rows ordered by asset and
+    start, scanned once; every asset counts for the whole window.
+    """
+    bounds = periods(first, last, period)
+    first, last = bounds[0][0], bounds[-1][1]
+    spells = occupied_spells(contracts, first, last)
+    series, rate = _series(bounds, occupied_days(spells, bounds), assets)
+    return {
+        "date_from": first,
+        "date_to": last,
+        "period": period,
+        "assets": assets,
+        "occupancy_rate": rate,
+        "periods": series,
+    }
@@ -0,0 +1,119 @@
+from base64 import b64decode, b64encode
+from functools import reduce
+from operator import or_
+from urllib import parse
+
+from django.core.exceptions import ImproperlyConfigured, ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination, _reverse_ordering
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(CursorPagination):
+    """Cursor pagination over a stable ordering; the last field must be unique.
+
+    The cursor holds the value of every ordering field in the row a page continues from, and
+    the page filters on all of them as a row comparison, ``(date, id) < (d, i)`` with each
+    field in its own direction. Rows tied on the leading fields therefore cost no offset,
+    however many of them there are.
+    """
+
+    page_size_query_param = "page_size"
+    max_page_size = 500
+    ordering = ("-id",)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        model = queryset.model
+        if not model._meta.get_field(self.ordering[-1].lstrip("-")).unique:
+            raise ImproperlyConfigured(f"{type(self).__name__}.ordering must end in a unique field.")
+
+        self.cursor = self.decode_cursor(request)
+        reverse, position = self.cursor or (False, None)
+        ordering = _reverse_ordering(self.ordering) if reverse else self.ordering
+        queryset = queryset.order_by(*ordering)
+        if position is not None:
+            queryset = queryset.filter(self._after(model, ordering, position))
+
+        # one more row than the page tells whether another page follows
+        results = list(queryset[: self.page_size + 1])
+        self.page = results[: self.page_size]
+        following = len(results) > self.page_size
+        if reverse:
+            self.page.reverse()
+        # links lead on from the page's first and last rows; a cursor past the end has none
+        self.has_next = bool(self.page) and (position is not None if reverse else following)
+        self.has_previous = bool(self.page) and (following if reverse else position is not None)
+        return self.page
+
+    def _after(self, model, ordering, position):
+        """Rows after ``position`` in ``ordering``: tied on the first k fields, past on the next."""
+        if len(position) != len(ordering):
+            raise NotFound(self.invalid_cursor_message)
+        try:
+            values = [
+                model._meta.get_field(field.lstrip("-")).to_python(raw)
+                for field, raw in zip(ordering, position)
+            ]
+        except ValidationError:
+            raise NotFound(self.invalid_cursor_message)
+        conditions = []
+        for k, field in enumerate(ordering):
+            tied = {name.lstrip("-"): value for name, value in zip(ordering[:k], values)}
+            lookup = "lt" if field.startswith("-") else "gt"
+            conditions.append(Q(**tied, **{f"{field.lstrip('-')}__{lookup}": values[k]}))
+        return reduce(or_, conditions)
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        return self._link(False, self.page[-1])
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        return self._link(True, self.page[0])
+
+    def _link(self, reverse, instance):
+        tokens = {"p": [str(getattr(instance, field.lstrip("-"))) for field in self.ordering]}
+        if reverse:
+            tokens["r"] = "1"
+        encoded = b64encode(parse.urlencode(tokens, doseq=True).encode()).decode("ascii")
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def decode_cursor(self, request):
+        """``(reverse, position)`` of the request's cursor, or None on the first page."""
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+        try:
+            tokens = parse.parse_qs(b64decode(encoded.encode("ascii"), validate=True).decode("ascii"))
+            reverse = bool(int(tokens.get("r", ["0"])[0]))
+            position = tokens["p"]
+        except (TypeError, ValueError, KeyError):
+            raise NotFound(self.invalid_cursor_message)
+        return reverse, position
+
+
+class AssetPagination(KeysetPagination):
+    ordering = ("-created_at", "id")
+
+
+class AssetDocumentPagination(KeysetPagination):
+    ordering = ("-uploaded_at", "id")
+
+
+class MarketValuePagination(KeysetPagination):
+    ordering = ("-date", "id")
+
+
+class TenantPagination(KeysetPagination):
+    ordering = ("id",)
+
+
+class RentalContractPagination(KeysetPagination):
+    ordering = ("-start_date", "id")
@@ -0,0 +1,100 @@
+import io
+import mimetypes
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, UnidentifiedImageError
+from pypdf import PdfReader
+from pypdf.errors import PdfReadError
+
+from .documents import file_digest
+from .jobs import PermanentFailure, handler
+from .models import AssetDocument
+from .signals import touch_asset
+
+# extracted text beyond this many characters isn't kept
+TEXT_LIMIT = 1_000_000
+THUMBNAIL_SIZE = (256, 256)
+
+
+def content_type(document):
+    return mimetypes.guess_type(document.filename or document.file.name)[0] or ""
+
+
+def verify(document, results):
+    """Re-hash the stored file: it must still be the content that was uploaded."""
+    with document.file.open("rb") as file:
+        if file_digest(file) != document.sha256:
+            raise PermanentFailure(f"Stored file doesn't match checksum {document.sha256}")
+
+
+def extract_text(document, results):
+    kind = content_type(document)
+    if kind == "application/pdf":
+        try:
+            with document.file.open("rb") as file:
+                pages = PdfReader(file).pages
+                text = "\n".join(page.extract_text() for page in pages)
+        except PdfReadError as exc:
+            raise PermanentFailure(f"Unreadable PDF: {exc}")
+    elif kind.startswith("text/"):
+        with document.file.open("rb") as file:
+            text = file.read(TEXT_LIMIT * 4).decode("utf-8", errors="replace")
+    else:
+        return
+    results["text"] = text[:TEXT_LIMIT]
+
+
+def thumbnail(document, results):
+    if document.thumbnail:
+        # made from the document's previous file
+        document.thumbnail.delete(save=False)
+        results["thumbnail"] = ""
+    if not content_type(document).startswith("image/"):
+        return
+    try:
+        with document.file.open("rb") as file, Image.open(file) as image:
+            image.thumbnail(THUMBNAIL_SIZE)
+            output = io.BytesIO()
+            image.convert("RGB").save(output, "JPEG", quality=85)
+    except (UnidentifiedImageError, OSError) as exc:
+        raise PermanentFailure(f"Unreadable image: {exc}")
+    results["thumbnail"] = default_storage.save(
+        f"thumbnails/{document.pk}.jpg", ContentFile(output.getvalue())
+    )
+
+
+STEPS = {"verify": verify, "text": extract_text, "thumbnail": thumbnail}
+
+
+def _save(document, **fields):
+    """Record results unless the file was replaced meanwhile; its own job will follow."""
+    if AssetDocument.objects.filter(pk=document.pk, sha256=document.sha256).update(**fields):
+        # the status is part of the cached document and asset payloads
+        touch_asset(AssetDocument, document)
+
+
+def processing_failed(document_id, sha256):
+    document = AssetDocument.objects.filter(pk=document_id, sha256=sha256).first()
+    if document is not None:
+        _save(document, processing_status=AssetDocument.FAILED)
+
+
+@handler("process_document", on_give_up=processing_failed)
+def process_document(document_id, sha256):
+    """Run the ``DOCUMENT_PROCESSING`` steps on a document's file."""
+    document = AssetDocument.objects.filter(pk=document_id, sha256=sha256).first()
+    if document is None:
+        # deleted, or given another file since this job was queued
+        return
+    _save(document, processing_status=AssetDocument.PROCESSING)
+    results = {}
+    try:
+        for step in settings.DOCUMENT_PROCESSING:
+            STEPS[step](document, results)
+    except Exception as exc:
+        # pending a retry; processing_failed marks it failed once the job gives up
+        _save(document, processing_status=AssetDocument.PENDING, processing_error=str(exc))
+        raise
+    _save(document, processing_status=AssetDocument.READY, processing_error="", **results)
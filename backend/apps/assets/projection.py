@@ -0,0 +1,141 @@
+from datetime import date, timedelta
+
+import numpy as np
+
+MAX_MONTHS = 120
+# the last day a MAX_MONTHS projection can start on with every month bound still a date
+LAST_START = (np.datetime64(date.max, "M") - MAX_MONTHS + 1).astype(date) - timedelta(days=1)
+# metrics in money, rounded to cents; the others are counts
+MONEY = ("income", "deposits", "expiring_rent")
+
+
+class Contracts:
+    """Contract columns as arrays; ``ends`` are NaT for open-ended contracts."""
+
+    def __init__(self, asset_ids, starts, ends, rents, deposits):
+        self.asset_ids = np.asarray(asset_ids, dtype=np.int64)
+        self.starts = np.asarray(starts, dtype="datetime64[D]")
+        self.ends = np.asarray(ends, dtype="datetime64[D]")
+        self.rents = np.asarray(rents, dtype=np.float64)
+        self.deposits = np.asarray(deposits, dtype=np.float64)
+
+    @classmethod
+    def load(cls, queryset):
+        """The contracts of ``queryset``, fetched with a single query."""
+        rows = queryset.order_by().values_list("asset_id", "start_date", "end_date", "monthly_rent", "deposit")
+        return cls(*(zip(*rows) if rows else ((),) * 5))
+
+
+def month_bounds(start, months):
+    """First days of the ``months`` months from ``start``'s month on, then of the month after."""
+    first = np.datetime64(start, "M")
+    return np.arange(first, first + months + 1).astype("datetime64[D]")
+
+
+def _overlap(starts, ends, month_starts, month_ends):
+    """Days each ``[start, end)`` interval has in each ``[month_start, month_end)``, intervals × months."""
+    return np.clip(
+        np.minimum(ends[:, None], month_ends) - np.maximum(starts[:, None], month_starts), 0, None
+    )
+
+
+def _per_asset(rows, values, assets):
+    """Sum the rows of an intervals × months array into an assets × months one."""
+    months = values.shape[1]
+    cells = (rows[:, None] * months + np.arange(months)).ravel()
+    weights = values.ravel().astype(np.float64)
+    return np.bincount(cells, weights=weights, minlength=assets * months).reshape(assets, months)
+
+
+def _merge(rows, starts, ends):
+    """Union of each asset's ``[start, end)`` intervals, as ``(rows, starts, ends)`` of disjoint ones.
+
+    Sorted by asset then start, an interval opens a new run when it starts past the furthest
+    end so far. Shifting every asset's days past the previous one's lets one running maximum
+    over all the intervals restart at each asset.
+    """
+    if not len(rows):
+        return rows, starts, ends
+    order = np.lexsort((starts, rows))
+    rows, starts, ends = rows[order], starts[order], ends[order]
+    shift = rows * (ends.max() + 1)
+    reach = np.maximum.accumulate(ends + shift)
+    opens = np.ones(len(rows), dtype=bool)
+    opens[1:] = starts[1:] + shift[1:] > reach[:-1]
+    first = np.flatnonzero(opens)
+    return rows[first], starts[first], np.maximum.reduceat(ends + shift, first) - shift[first]
+
+
+def project(asset_ids, contracts, start, months):
+    """Month by month rent roll of ``asset_ids`` from ``start``'s month on.
+
+    ``contracts`` are the assets' ``Contracts``. Each metric is an assets × months array:
+    ``income`` is the rent due, pro rata to the days each contract runs in the month;
+    ``deposits`` are those held on its last day; ``expiring_contracts`` and
+    ``expiring_rent`` count the contracts ending in it and their monthly rent; and
+    ``vacant_days`` are the days no contract covers.
+    """
+    asset_ids = np.asarray(asset_ids, dtype=np.int64)
+    bounds = month_bounds(start, months)
+    # days since the first of the projection, from here on
+    edges = (bounds - bounds[0]).astype(np.int64)
+    month_starts, month_ends, horizon = edges[:-1], edges[1:], edges[-1]
+
+    # each contract's row in asset_ids, if it has one
+    by_id = np.argsort(asset_ids)
+    position = np.searchsorted(asset_ids[by_id], contracts.asset_ids)
+    known = position < len(asset_ids)
+    known[known] = asset_ids[by_id[position[known]]] == contracts.asset_ids[known]
+
+    open_ended = np.isnat(contracts.ends)
+    # exclusive ends, the open ones and any past the horizon's capped just after it
+    ends = (contracts.ends - bounds[0]).astype(np.int64) + 1
+    ends = np.where(open_ended, horizon + 1, np.minimum(ends, horizon + 1))
+    starts = (contracts.starts - bounds[0]).astype(np.int64)
+    keep = known & (starts < horizon) & (ends > 0)
+    rows = by_id[position[keep]]
+    starts, ends, open_ended = np.maximum(starts[keep], 0), ends[keep], open_ended[keep]
+    rents, deposits = contracts.rents[keep], contracts.deposits[keep]
+
+    last_days = month_ends - 1
+    month_days = month_ends - month_starts
+    running = _overlap(starts, ends, month_starts, month_ends)
+    held = (starts[:, None] <= last_days) & (ends[:, None] > last_days)
+    expiring = ~open_ended[:, None] & (ends[:, None] > month_starts) & (ends[:, None] <= month_ends)
+    merged_rows, merged_starts, merged_ends = _merge(rows, starts, ends)
+    occupied = _overlap(merged_starts, merged_ends, month_starts, month_ends)
+
+    assets = len(asset_ids)
+    return bounds[:-1], {
+        "income": _per_asset(rows, rents[:, None] * running / month_days, assets),
+        "deposits": _per_asset(rows, deposits[:, None] * held, assets),
+        "expiring_contracts": _per_asset(rows, expiring, assets),
+        "expiring_rent": _per_asset(rows, rents[:, None] * expiring, assets),
+        "vacant_days": month_days - _per_asset(merged_rows, occupied, assets),
+    }
+
+
+def project_cashflow(assets, contracts, start=None, months=12, per_asset=True):
+    """``project()`` the ``(id, name)`` pairs of ``assets`` as the cash-flow endpoint renders it.
+
+    Of the ``contracts`` queryset, only those running during the projection are loaded.
+    """
+    start = start or date.today()
+    bounds = month_bounds(start, months)
+    contracts = Contracts.load(contracts.running_between(bounds[0].item(), (bounds[-1] - 1).item()))
+    assets = list(assets)
+    month_starts, result = project([pk for pk, _ in assets], contracts, start, months)
+    rounded = {
+        metric: values.round(2) if metric in MONEY else values.astype(np.int64)
+        for metric, values in result.items()
+    }
+    data = {
+        "months": month_starts.tolist(),
+        "portfolio": {metric: values.sum(axis=0).round(2).tolist() for metric, values in rounded.items()},
+    }
+    if per_asset:
+        data["assets"] = [
+            {"id": pk, "name": name, **{metric: values[index].tolist() for metric, values in rounded.items()}}
+            for index, (pk, name) in enumerate(assets)
+        ]
+    return data
@@ -0,0 +1,114 @@
+import random
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import MiddlewareNotUsed
+
+_current = ContextVar("db_routing", default=None)
+
+
+class RequestRouting:
+    """Where the request in progress reads from; set up by ``DatabaseRoutingMiddleware``."""
+
+    def __init__(self):
+        self.replica = None
+        self.wrote = False
+
+
+def _sticky_key(user_id):
+    return f"db:primary:{user_id}"
+
+
+def stick_to_primary(user_id):
+    """Keep the user's reads on the primary until the replicas have caught up with a write."""
+    cache.set(_sticky_key(user_id), True, settings.DATABASE_REPLICA_STICKY_SECONDS)
+
+
+def read_from_replica(user):
+    """Send the rest of the request's reads to a replica, unless ``user`` wrote lately.
+
+    Views opt in once they know the request is safe and who makes it; reads before that,
+    authentication's included, stay on the primary.
+    """
+    routing = _current.get()
+    if routing is None or routing.wrote or cache.get(_sticky_key(user.pk)):
+        return
+    routing.replica = random.choice(settings.DATABASE_REPLICAS)
+
+
+class ReplicaRouter:
+    """Reads of opted-in requests from their replica; everything else, writes always, on default.
+
+    A request that writes reads from the primary from then on, and the middleware keeps its
+    user there for ``DATABASE_REPLICA_STICKY_SECONDS``, so nobody misses their own changes
+    behind replication lag. Other users may see them a little late.
+    """
+
+    def db_for_read(self, model, **hints):
+        routing = _current.get()
+        if routing is None or routing.wrote:
+            return None
+        return routing.replica
+
+    def db_for_write(self, model, **hints):
+        routing = _current.get()
+        if routing is not None:
+            routing.wrote = True
+        # explicitly, or Django would save an instance back to the replica it was read from
+        return "default"
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # replicas hold the primary's data, so objects read from either may be related
+        return True
+
+
+class DatabaseRoutingMiddleware:
+    """Scope ``ReplicaRouter``'s decisions to the request, and make its user's writes sticky.
+
+    Without ``DATABASE_REPLICAS`` Django drops it from the chain at startup. The body of a
+    streaming response is produced after it returns, from the primary unless the view picked
+    the database of its queryset beforehand.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.DATABASE_REPLICAS:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        routing = RequestRouting()
+        token = _current.set(routing)
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        if routing.wrote:
+            self._stick(request)
+        return response
+
+    async def __acall__(self, request):
+        routing = RequestRouting()
+        token = _current.set(routing)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        if routing.wrote:
+            # the user may still be the session's lazy one, loaded from the database
+            await sync_to_async(self._stick)(request)
+        return response
+
+    def _stick(self, request):
+        # REST framework sets the user it authenticated on the request too
+        user = getattr(request, "user", None)
+        if user is not None and user.is_authenticated:
+            stick_to_primary(user.pk)
@@ -0,0 +1,152 @@
+import functools
+import hashlib
+import time
+from datetime import date
+
+from asgiref.sync import iscoroutinefunction
+from django.core.cache import caches
+from django.http import HttpResponse
+
+from .models import Asset
+
+CACHE_ALIAS = "responses"
+GENERATION_KEY = "assets:responses:generation"
+COUNTER_KEY = "assets:responses:{}"
+_UNSET = object()
+
+
+def response_cache():
+    return caches[CACHE_ALIAS]
+
+
+def _owner_generation_key(owner_id):
+    return f"{GENERATION_KEY}:{owner_id}"
+
+
+def generation(owner_id):
+    """The owner's current cache generation, combined with the global one.
+
+    Invalidating deletes the counters; the next read starts a new generation from the clock,
+    so a counter lost to eviction can never resurrect entries from an older generation.
+    """
+    cache = response_cache()
+    keys = [GENERATION_KEY, _owner_generation_key(owner_id)]
+    found = cache.get_many(keys)
+    missing = {key: time.time_ns() for key in keys if key not in found}
+    if missing:
+        cache.set_many(missing, None)
+    found.update(missing)
+    return ":".join(str(found[key]) for key in keys)
+
+
+def invalidate_owners(owner_ids):
+    response_cache().delete_many([_owner_generation_key(pk) for pk in set(owner_ids)])
+
+
+def invalidate_assets(asset_ids):
+    invalidate_owners(Asset.objects.filter(pk__in=asset_ids).values_list("owner_id", flat=True).distinct())
+
+
+def invalidate_all():
+    """Drop every user's entries, for changes that come from the calendar rather than a write."""
+    response_cache().delete(GENERATION_KEY)
+
+
+def _count(name):
+    cache = response_cache()
+    key = COUNTER_KEY.format(name)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, None)
+
+
+def get_counters():
+    counters = response_cache().get_many([COUNTER_KEY.format("hits"), COUNTER_KEY.format("misses")])
+    hits = counters.get(COUNTER_KEY.format("hits"), 0)
+    misses = counters.get(COUNTER_KEY.format("misses"), 0)
+    return {"hits": hits, "misses": misses, "hit_rate": hits / (hits + misses) if hits + misses else 0}
+
+
+def cache_response(handler):
+    """Serve a view method's rendered response from the per-user response cache.
+
+    Entries are keyed by user, generation, resource version, date, path and negotiated format,
+    and are stored once the response has been rendered. The view's ``get_resource_version()``
+    token (reused from ``ConditionalGetMixin`` when it has looked it up) changes with every
+    write to the user's assets, so a process whose cache missed another's invalidation never
+    serves a stale entry; the date does the same for responses that depend on today. Signals
+    bumping the owner's generation drop the entries early where the cache is shared, and the
+    backend's own eviction (LRU for locmem and Redis) bounds its memory. Coroutine methods
+    are wrapped by a coroutine; the cache is called from the event loop either way.
+    """
+    if iscoroutinefunction(handler):
+
+        @functools.wraps(handler)
+        async def awrapped(view, request, *args, **kwargs):
+            version = getattr(view, "resource_version", _UNSET)
+            if version is _UNSET:
+                version = await view.aget_resource_version()
+            key, response = _lookup(request, version)
+            if response is None:
+                response = _store(key, await handler(view, request, *args, **kwargs))
+            return response
+
+        return awrapped
+
+    @functools.wraps(handler)
+    def wrapped(view, request, *args, **kwargs):
+        version = getattr(view, "resource_version", _UNSET)
+        if version is _UNSET:
+            version = view.get_resource_version()
+        key, response = _lookup(request, version)
+        if response is None:
+            response = _store(key, handler(view, request, *args, **kwargs))
+        return response
+
+    return wrapped
+
+
+def _lookup(request, version):
+    """The request's cache key, and its cached response if there is one."""
+    token = version[1] if version else None
+    path = f"{request.get_full_path()}:{request.accepted_renderer.format}:{token}:{date.today()}"
+    key = f"assets:response:{request.user.pk}:{generation(request.user.pk)}:" + hashlib.md5(
+        path.encode()
+    ).hexdigest()
+    entry = response_cache().get(key)
+    if entry is None:
+        _count("misses")
+        return key, None
+    _count("hits")
+    return key, HttpResponse(entry["content"], content_type=entry["content_type"])
+
+
+def _store(key, response):
+    # errors are raised rather than returned, so only successful responses get here
+    response.add_post_render_callback(
+        lambda rendered: response_cache().set(
+            key, {"content": rendered.content, "content_type": rendered["Content-Type"]}
+        )
+    )
+    return response
+
+
+class CachedResponseMixin:
+    """Per-user response caching for ``list`` and ``retrieve`` and their async variants."""
+
+    @cache_response
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    @cache_response
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
+
+    @cache_response
+    async def alist(self, request, *args, **kwargs):
+        return await super().alist(request, *args, **kwargs)
+
+    @cache_response
+    async def aretrieve(self, request, *args, **kwargs):
+        return await super().aretrieve(request, *args, **kwargs)
@@ -1,29 +1,66 @@
 from rest_framework import serializers
-from .models import Asset, AssetDocument, MarketValue, Tenant, RentalContract
+from .models import Asset, AssetDocument, AssetSummary, MarketValue, Tenant, RentalContract
+
+
+class OwnedPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """Only accept objects owned by the requesting user, looked up through ``owned_by()``."""
+
+    def get_queryset(self):
+        return super().get_queryset().owned_by(self.context["request"].user)
 
 
 class AssetDocumentSerializer(serializers.ModelSerializer):
+    serializer_related_field = OwnedPrimaryKeyRelatedField
+
     class Meta:
         model = AssetDocument
-        fields = ["id", "file", "description", "uploaded_at"]
-        read_only_fields = ["id", "uploaded_at"]
+        fields = [
+            "id",
+            "asset",
+            "file",
+            "filename",
+            "description",
+            "size",
+            "sha256",
+            "processing_status",
+            "processing_error",
+            "thumbnail",
+            "uploaded_at",
+            "updated_at",
+        ]
+        read_only_fields = [
+            "id",
+            "filename",
+            "size",
+            "sha256",
+            "processing_status",
+            "processing_error",
+            "thumbnail",
+            "uploaded_at",
+            "updated_at",
+        ]
 
 
 class MarketValueSerializer(serializers.ModelSerializer):
+    serializer_related_field = OwnedPrimaryKeyRelatedField
+
     class Meta:
         model = MarketValue
-        fields = ["id", "date", "value"]
-        read_only_fields = ["id"]
+        fields = ["id", "asset", "date", "value", "updated_at"]
+        read_only_fields = ["id", "updated_at"]
 
 
 class TenantSerializer(serializers.ModelSerializer):
+    serializer_related_field = OwnedPrimaryKeyRelatedField
+
     class Meta:
         model = Tenant
-        fields = ["id", "full_name", "email", "phone"]
-        read_only_fields = ["id"]
+        fields = ["id", "asset", "full_name", "email", "phone", "updated_at"]
+        read_only_fields = ["id", "updated_at"]
 
 
 class RentalContractSerializer(serializers.ModelSerializer):
+    serializer_related_field = OwnedPrimaryKeyRelatedField
     is_active = serializers.BooleanField(read_only=True)
 
     class Meta:
@@ -38,11 +75,55 @@ class RentalContractSerializer(serializers.ModelSerializer):
             "deposit",
             "notes",
             "is_active",
+            "updated_at",
+        ]
+        read_only_fields = ["id", "is_active", "updated_at"]
+
+
+class MarketValueBulkSerializer(serializers.Serializer):
+    """Bulk item: plain fields so validation doesn't query the database per item."""
+
+    id = serializers.IntegerField(required=False)
+    asset = serializers.IntegerField()
+    date = serializers.DateField()
+    value = serializers.DecimalField(max_digits=12, decimal_places=2)
+
+
+class RentalContractBulkSerializer(serializers.Serializer):
+    id = serializers.IntegerField(required=False)
+    tenant = serializers.IntegerField()
+    asset = serializers.IntegerField()
+    start_date = serializers.DateField()
+    end_date = serializers.DateField(required=False, allow_null=True, default=None)
+    monthly_rent = serializers.DecimalField(max_digits=10, decimal_places=2)
+    deposit = serializers.DecimalField(max_digits=10, decimal_places=2, default=0)
+    notes = serializers.CharField(required=False, allow_blank=True, default="")
+
+
+class AssetSummarySerializer(serializers.ModelSerializer):
+    class Meta:
+        model = AssetSummary
+        fields = [
+            "latest_value",
+            "latest_value_date",
+            "current_monthly_rent",
+            "active_contracts",
+            "is_occupied",
+            "refreshed_on",
         ]
-        read_only_fields = ["id", "is_active"]
+        read_only_fields = fields
 
 
 class AssetSerializer(serializers.ModelSerializer):
+    """Asset with its summary and, on request, its nested relations.
+
+    ``fields`` and ``expand`` in the context (``?fields=`` / ``?expand=``, parsed by the view)
+    select the top-level fields and the relations to embed; without them every field is kept.
+    """
+
+    expandable_fields = ("documents", "values", "tenants")
+
+    summary = AssetSummarySerializer(read_only=True)
     documents = AssetDocumentSerializer(many=True, read_only=True)
     values = MarketValueSerializer(many=True, read_only=True)
     tenants = TenantSerializer(many=True, read_only=True)
@@ -56,14 +137,122 @@ class AssetSerializer(serializers.ModelSerializer):
             "address",
             "description",
             "created_at",
+            "updated_at",
+            "summary",
             "documents",
             "values",
             "tenants",
         ]
-        read_only_fields = ["id", "created_at", "owner"]
+        read_only_fields = ["id", "created_at", "updated_at", "owner"]
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        fields = self.context.get("fields")
+        expand = self.context.get("expand", self.expandable_fields)
+        for name in list(self.fields):
+            if name in self.expandable_fields:
+                keep = name in expand
+            else:
+                keep = fields is None or name in fields
+            if not keep:
+                self.fields.pop(name)
+        if self.context.get("values_limit") and "values" in self.fields:
+            # the view prefetches only the latest valuations, into latest_values
+            self.fields["values"] = MarketValueSerializer(
+                many=True, read_only=True, source="latest_values"
+            )
 
     def create(self, validated_data):
         request = self.context.get("request")
         if request and request.user and request.user.is_authenticated:
             validated_data["owner"] = request.user
         return super().create(validated_data)
+
+
+class AssetPerformanceSerializer(serializers.Serializer):
+    """Read-only view of an asset annotated by ``Asset.objects.with_performance``."""
+
+    annual_income = serializers.DecimalField(
+        max_digits=None, decimal_places=2, coerce_to_string=False
+    )
+    market_value = serializers.DecimalField(
+        max_digits=None, decimal_places=2, coerce_to_string=False
+    )
+    performance = serializers.DecimalField(
+        max_digits=None, decimal_places=4, coerce_to_string=False
+    )
+
+
+class PortfolioPerformanceSerializer(AssetPerformanceSerializer):
+    id = serializers.IntegerField(read_only=True)
+    name = serializers.CharField(read_only=True)
+
+
+class ValuationPointSerializer(serializers.Serializer):
+    date = serializers.DateField()
+    value = serializers.DecimalField(max_digits=None, decimal_places=2, coerce_to_string=False)
+    annual_rent = serializers.DecimalField(
+        max_digits=None, decimal_places=2, coerce_to_string=False
+    )
+    rental_yield = serializers.DecimalField(
+        max_digits=None, decimal_places=4, coerce_to_string=False, allow_null=True
+    )
+    drawdown = serializers.DecimalField(max_digits=None, decimal_places=4, coerce_to_string=False)
+
+
+class ValuationSeriesSerializer(serializers.Serializer):
+    """Read-only view of ``analytics.valuation_series``."""
+
+    period = serializers.CharField()
+    agg = serializers.CharField()
+    cagr = serializers.DecimalField(
+        max_digits=None, decimal_places=4, coerce_to_string=False, allow_null=True
+    )
+    max_drawdown = serializers.DecimalField(
+        max_digits=None, decimal_places=4, coerce_to_string=False, allow_null=True
+    )
+    current_drawdown = serializers.DecimalField(
+        max_digits=None, decimal_places=4, coerce_to_string=False, allow_null=True
+    )
+    series = ValuationPointSerializer(many=True)
+
+
+class OccupancyRunSerializer(serializers.Serializer):
+    start = serializers.DateField()
+    end = serializers.DateField()
+    occupied = serializers.BooleanField()
+
+
+class OccupancyPeriodSerializer(serializers.Serializer):
+    start = serializers.DateField()
+    end = serializers.DateField()
+    vacant_days = serializers.IntegerField()
+    occupancy_rate = serializers.DecimalField(
+        max_digits=None, decimal_places=4, coerce_to_string=False, allow_null=True
+    )
+
+
+class PortfolioOccupancySerializer(serializers.Serializer):
+    """Read-only view of ``occupancy.portfolio_occupancy``."""
+
+    date_from = serializers.DateField()
+    date_to = serializers.DateField()
+    period = serializers.CharField()
+    assets = serializers.IntegerField()
+    occupancy_rate = serializers.DecimalField(
+        max_digits=None, decimal_places=4, coerce_to_string=False, allow_null=True
+    )
+    periods = OccupancyPeriodSerializer(many=True)
+
+
+class AssetOccupancySerializer(serializers.Serializer):
+    """Read-only view of ``occupancy.asset_occupancy``."""
+
+    date_from = serializers.DateField()
+    date_to = serializers.DateField()
+    period = serializers.CharField()
+    occupancy_rate = serializers.DecimalField(
+        max_digits=None, decimal_places=4, coerce_to_string=False
+    )
+    timeline = OccupancyRunSerializer(many=True)
+    periods = OccupancyPeriodSerializer(many=True)
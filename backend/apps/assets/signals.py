@@ -0,0 +1,167 @@
+import os
+
+from django.db.models import QuerySet
+from django.db.models.signals import post_delete, post_init, post_save, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .documents import file_digest
+from .jobs import enqueue
+from .models import (
+    Asset,
+    AssetDocument,
+    AssetSummary,
+    DocumentBlob,
+    MarketValue,
+    Tenant,
+    RentalContract,
+)
+from .response_cache import invalidate_assets, invalidate_owners
+from .stats import invalidate_overview
+
+
+@receiver([post_save, post_delete], sender=Asset)
+@receiver([post_save, post_delete], sender=RentalContract)
+def overview_changed(sender, **kwargs):
+    invalidate_overview()
+
+
+@receiver(post_save, sender=Asset)
+def create_summary(sender, instance, created, **kwargs):
+    if created:
+        AssetSummary.objects.create(asset=instance)
+
+
+@receiver(post_init, sender=AssetDocument)
+@receiver(post_init, sender=MarketValue)
+@receiver(post_init, sender=Tenant)
+@receiver(post_init, sender=RentalContract)
+def asset_row_loaded(sender, instance, **kwargs):
+    # the asset a row was loaded under, so moving it updates the asset it left as well
+    instance._stored_asset_id = instance.__dict__.get("asset_id")
+
+
+def affected_assets(instance):
+    """The row's asset and, if it was moved to another, the one it was loaded under."""
+    return sorted({pk for pk in (instance._stored_asset_id, instance.asset_id) if pk is not None})
+
+
+@receiver(pre_save, sender=AssetDocument)
+@receiver(pre_save, sender=MarketValue)
+@receiver(pre_save, sender=Tenant)
+@receiver(pre_save, sender=RentalContract)
+def copy_asset_owner(sender, instance, **kwargs):
+    # owned_by() filters on the row's copy of its asset's owner
+    if instance.owner_id is None or instance.asset_id != instance._stored_asset_id:
+        instance.owner_id = instance.asset.owner_id
+
+
+def deleted_in_bulk(sender, origin=None, **kwargs):
+    """Whether the row goes in a delete() of a queryset of its own model.
+
+    Bulk writes call ``assets_bulk_changed`` once for their rows instead.
+    """
+    return isinstance(origin, QuerySet) and origin.model is sender
+
+
+@receiver(post_save, sender=MarketValue)
+@receiver(post_save, sender=RentalContract)
+def summary_source_saved(sender, instance, **kwargs):
+    AssetSummary.objects.sync(affected_assets(instance))
+
+
+@receiver(post_delete, sender=MarketValue)
+@receiver(post_delete, sender=RentalContract)
+def summary_source_deleted(sender, instance, **kwargs):
+    if deleted_in_bulk(sender, **kwargs):
+        return
+    # update only: when the asset itself is being deleted its summary row may already be gone
+    AssetSummary.objects.filter(asset_id=instance.asset_id).refresh()
+
+
+@receiver([post_save, post_delete], sender=AssetDocument)
+@receiver([post_save, post_delete], sender=MarketValue)
+@receiver([post_save, post_delete], sender=Tenant)
+@receiver([post_save, post_delete], sender=RentalContract)
+def touch_asset(sender, instance, **kwargs):
+    if deleted_in_bulk(sender, **kwargs):
+        return
+    # the asset's updated_at versions its nested payload for conditional GETs
+    Asset.objects.filter(pk__in=affected_assets(instance)).update(updated_at=timezone.now())
+    # a row only moves between assets of the same owner
+    invalidate_owners([instance.owner_id])
+
+
+@receiver(post_save, sender=AssetDocument)
+@receiver(post_save, sender=MarketValue)
+@receiver(post_save, sender=Tenant)
+@receiver(post_save, sender=RentalContract)
+def asset_row_saved(sender, instance, **kwargs):
+    # after the receivers above: a later save moves the row from where it is now
+    instance._stored_asset_id = instance.asset_id
+
+
+@receiver(pre_save, sender=AssetDocument)
+def document_file_saving(sender, instance, **kwargs):
+    file = instance.file
+    if file and not file._committed:
+        # before the storage names the file after its content
+        instance.filename = os.path.basename(file.name)[:255]
+        instance.size = file.size
+        instance.sha256 = file_digest(file.file)
+        instance.processing_status = AssetDocument.PENDING
+        instance.processing_error = ""
+        instance.text = ""
+
+
+@receiver(post_init, sender=AssetDocument)
+def document_loaded(sender, instance, **kwargs):
+    # read from __dict__ so a deferred field isn't loaded
+    instance._stored_sha256 = instance.__dict__.get("sha256", "")
+
+
+@receiver(post_save, sender=AssetDocument)
+def document_saved(sender, instance, **kwargs):
+    # the checksum changes only when a new file is stored
+    if instance.sha256 != instance._stored_sha256:
+        DocumentBlob.objects.acquire(instance.sha256, instance.size)
+        if instance._stored_sha256:
+            DocumentBlob.objects.release(instance._stored_sha256)
+        instance._stored_sha256 = instance.sha256
+        # one INSERT, in the upload's transaction; run_workers does the processing
+        enqueue("process_document", document_id=instance.pk, sha256=instance.sha256)
+
+
+@receiver(post_delete, sender=AssetDocument)
+def document_deleted(sender, instance, **kwargs):
+    if instance._stored_sha256:
+        DocumentBlob.objects.release(instance._stored_sha256)
+    if instance.thumbnail:
+        instance.thumbnail.delete(save=False)
+
+
+@receiver(post_init, sender=Asset)
+def asset_loaded(sender, instance, **kwargs):
+    instance._stored_owner_id = instance.__dict__.get("owner_id")
+
+
+@receiver([post_save, post_delete], sender=Asset)
+def asset_changed(sender, instance, **kwargs):
+    previous = instance._stored_owner_id
+    if kwargs.get("created") is False and previous not in (None, instance.owner_id):
+        # handed to another owner: so are its rows, and the previous owner's cache is stale
+        for model in (AssetDocument, MarketValue, Tenant, RentalContract):
+            model.objects.filter(asset=instance).update(owner_id=instance.owner_id)
+        invalidate_owners([previous])
+    instance._stored_owner_id = instance.owner_id
+    invalidate_owners([instance.owner_id])
+
+
+def assets_bulk_changed(asset_ids):
+    """Do once what the per-row receivers above do, for writes that bypass signals and for
+    the queryset deletes they leave to it."""
+    if asset_ids:
+        AssetSummary.objects.sync(asset_ids)
+        Asset.objects.filter(pk__in=asset_ids).update(updated_at=timezone.now())
+        invalidate_assets(asset_ids)
+        invalidate_overview()
@@ -0,0 +1,38 @@
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import Asset, AssetSummary, RentalContract
+
+OVERVIEW_CACHE_KEY = "assets:admin-overview"
+
+
+def compute_overview():
+    total_assets = Asset.objects.count()
+    total_users = Asset.objects.values("owner").distinct().count()
+    total_contracts = RentalContract.objects.count()
+    occupied_assets = AssetSummary.objects.filter(is_occupied=True).count()
+    return {
+        "total_assets": total_assets,
+        "total_users": total_users,
+        "total_contracts": total_contracts,
+        "occupancy_rate": (occupied_assets / total_assets) if total_assets else 0,
+    }
+
+
+def get_overview(fresh=False):
+    """Return ``(stats, age_in_seconds)``, recomputing only on a cache miss or when ``fresh``.
+
+    Writes invalidate the entry through signals; the timeout bounds how long contracts
+    starting or ending with the calendar (no write involved) can be reported stale.
+    """
+    entry = None if fresh else cache.get(OVERVIEW_CACHE_KEY)
+    if entry is None:
+        entry = {"stats": compute_overview(), "computed_at": time.time()}
+        cache.set(OVERVIEW_CACHE_KEY, entry, settings.ADMIN_OVERVIEW_CACHE_TIMEOUT)
+    return entry["stats"], time.time() - entry["computed_at"]
+
+
+def invalidate_overview():
+    cache.delete(OVERVIEW_CACHE_KEY)
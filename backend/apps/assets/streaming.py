@@ -0,0 +1,28 @@
+from itertools import islice
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+
+def stream(iterable, batch=1):
+    """A response body producing ``iterable``'s items, without buffering them under ASGI.
+
+    Django's ASGI handler reads a synchronous body into memory in one go before sending it.
+    With ``ASYNC_VIEWS`` the items are pulled ``batch`` at a time on the request's thread,
+    which also holds the database cursor an iterator may be reading from.
+    """
+    if not settings.ASYNC_VIEWS:
+        return iterable
+    return _aiterate(iter(iterable), batch)
+
+
+async def _aiterate(iterator, batch):
+    take = sync_to_async(lambda: list(islice(iterator, batch)))
+    try:
+        while items := await take():
+            for item in items:
+                yield item
+    finally:
+        close = getattr(iterator, "close", None)
+        if close is not None:
+            await sync_to_async(close)()
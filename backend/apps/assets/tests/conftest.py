@@ -0,0 +1,37 @@
+import importlib
+
+import pytest
+from django.core.cache import caches
+from django.urls import clear_url_caches
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    # the test database is rolled back without firing signals, so cached entries would leak
+    for cache in caches.all():
+        cache.clear()
+    yield
+    for cache in caches.all():
+        cache.clear()
+
+
+def reload_urls():
+    import apps.assets.urls
+    import config.urls
+
+    importlib.reload(apps.assets.urls)
+    importlib.reload(config.urls)
+    clear_url_caches()
+
+
+@pytest.fixture()
+def async_views(settings):
+    """Call to rebuild the URLconf with the async views, as the ASGI entry point would."""
+
+    def enable():
+        settings.ASYNC_VIEWS = True
+        reload_urls()
+
+    yield enable
+    settings.ASYNC_VIEWS = False
+    reload_urls()
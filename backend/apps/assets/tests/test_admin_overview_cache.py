@@ -0,0 +1,86 @@
+import pytest
+from datetime import date, timedelta
+from rest_framework.test import APIClient
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from apps.assets.models import Asset, Tenant, RentalContract
+
+pytestmark = pytest.mark.django_db
+
+TODAY = date.today()
+
+
+@pytest.fixture()
+def admin_client():
+    admin = User.objects.create_user(username="staff", password="pass", is_staff=True)
+    client = APIClient()
+    client.force_authenticate(admin)
+    return client
+
+
+@pytest.fixture()
+def owner():
+    return User.objects.create_user(username="landlord", password="pass")
+
+
+def overview(client, query=""):
+    res = client.get(f"/api/admin/overview/{query}")
+    assert res.status_code == 200
+    return res.json()
+
+
+def test_overview_is_served_from_cache(admin_client, owner):
+    Asset.objects.create(owner=owner, name="A")
+    first = overview(admin_client)
+    assert first["total_assets"] == 1
+    with CaptureQueriesContext(connection) as ctx:
+        second = overview(admin_client)
+    assert not any("assets_" in q["sql"] for q in ctx.captured_queries)
+    assert second["total_assets"] == 1
+    assert second["cache_age"] >= 0
+
+
+def test_writes_invalidate_the_cache(admin_client, owner):
+    asset = Asset.objects.create(owner=owner, name="A")
+    assert overview(admin_client)["total_contracts"] == 0
+    tenant = Tenant.objects.create(asset=asset, full_name="T")
+    contract = RentalContract.objects.create(
+        tenant=tenant, asset=asset, start_date=TODAY, monthly_rent="1.00"
+    )
+    assert overview(admin_client)["total_contracts"] == 1
+    contract.delete()
+    assert overview(admin_client)["total_contracts"] == 0
+    asset.delete()
+    assert overview(admin_client)["total_assets"] == 0
+
+
+def test_fresh_bypasses_the_cache(admin_client, owner):
+    Asset.objects.create(owner=owner, name="A")
+    overview(admin_client)
+    # bulk update skips signals, so only a fresh read sees it
+    Asset.objects.all().update(owner=User.objects.create_user(username="b", password="pass"))
+    Asset.objects.bulk_create([Asset(owner=owner, name="B")])
+    assert overview(admin_client)["total_assets"] == 1
+    body = overview(admin_client, "?fresh=1")
+    assert body["total_assets"] == 2
+    assert body["total_users"] == 2
+    assert body["cache_age"] == 0
+
+
+def test_occupancy_counts_only_active_contracts(admin_client, owner):
+    occupied = Asset.objects.create(owner=owner, name="Occupied")
+    vacant = Asset.objects.create(owner=owner, name="Vacant")
+    for asset, end in ((occupied, None), (vacant, TODAY - timedelta(days=1))):
+        tenant = Tenant.objects.create(asset=asset, full_name="T")
+        RentalContract.objects.create(
+            tenant=tenant,
+            asset=asset,
+            start_date=TODAY - timedelta(days=30),
+            end_date=end,
+            monthly_rent="1.00",
+        )
+    body = overview(admin_client)
+    assert body["total_contracts"] == 2
+    assert body["occupancy_rate"] == 0.5
@@ -0,0 +1,108 @@
+import pytest
+from datetime import date, timedelta
+from rest_framework.test import APIClient
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from apps.assets.models import Asset, AssetDocument, MarketValue, Tenant
+from apps.assets.serializers import AssetSerializer
+
+pytestmark = pytest.mark.django_db
+
+TODAY = date.today()
+
+
+@pytest.fixture()
+def user():
+    return User.objects.create_user(username="sparse", password="pass")
+
+
+@pytest.fixture()
+def client(user):
+    client = APIClient()
+    client.force_authenticate(user)
+    return client
+
+
+@pytest.fixture()
+def asset(user):
+    asset = Asset.objects.create(owner=user, name="Loft", address="Via Roma 1")
+    AssetDocument.objects.create(asset=asset, file="asset_docs/deed.pdf")
+    for days in range(5):
+        MarketValue.objects.create(asset=asset, date=TODAY - timedelta(days=days), value=f"{1000 - days}.00")
+    Tenant.objects.create(asset=asset, full_name="T")
+    return asset
+
+
+def fetch(client, query):
+    with CaptureQueriesContext(connection) as ctx:
+        res = client.get(f"/api/assets/{query}")
+    assert res.status_code == 200, res.content
+    return res.json()["results"][0], [q["sql"] for q in ctx.captured_queries]
+
+
+def test_relations_are_opt_in_and_not_queried(client, asset):
+    row, queries = fetch(client, "")
+    assert "documents" not in row and "values" not in row and "tenants" not in row
+    assert row["summary"]["latest_value"] == "1000.00"
+    relations = ("assets_assetdocument", "assets_marketvalue", "assets_tenant")
+    assert not any(table in sql for sql in queries for table in relations)
+
+
+def test_expand_embeds_only_the_requested_relations(client, asset):
+    row, queries = fetch(client, "?expand=tenants,documents")
+    assert [t["full_name"] for t in row["tenants"]] == ["T"]
+    assert len(row["documents"]) == 1
+    assert "values" not in row
+    assert not any("assets_marketvalue" in sql for sql in queries)
+
+
+def test_fields_select_top_level_fields(client, asset):
+    row, queries = fetch(client, "?fields=id,name,address")
+    assert row == {"id": asset.id, "name": "Loft", "address": "Via Roma 1"}
+    # without the summary there is no join for it either
+    assert not any("assets_assetsummary" in sql for sql in queries[1:])
+    row, _ = fetch(client, "?fields=name&expand=tenants")
+    assert set(row) == {"name", "tenants"}
+
+
+def test_values_limit_embeds_the_latest_valuations(client, user, asset):
+    other = Asset.objects.create(owner=user, name="Flat")
+    for days in range(3):
+        MarketValue.objects.create(asset=other, date=TODAY - timedelta(days=days), value="1.00")
+    res = client.get("/api/assets/", {"values_limit": 2, "fields": "name"})
+    assert res.status_code == 200
+    by_name = {row["name"]: row["values"] for row in res.json()["results"]}
+    assert [v["date"] for v in by_name["Loft"]] == [str(TODAY), str(TODAY - timedelta(days=1))]
+    assert len(by_name["Flat"]) == 2
+    detail = client.get(f"/api/assets/{asset.id}/", {"values_limit": 1, "expand": "values"}).json()
+    assert [v["value"] for v in detail["values"]] == ["1000.00"]
+
+
+@pytest.mark.parametrize(
+    "query",
+    [
+        {"fields": "name,secret"},
+        {"expand": "owner"},
+        {"fields": "values"},
+        {"values_limit": "0"},
+        {"values_limit": "x"},
+        {"values_limit": "501"},
+        {"values_limit": str(10**30)},
+    ],
+)
+def test_invalid_selection_is_rejected(client, asset, query):
+    res = client.get("/api/assets/", query)
+    assert res.status_code == 400
+    assert set(res.json()) == set(query)
+
+
+def test_serializer_keeps_every_field_without_a_selection(asset):
+    assert {"documents", "values", "tenants", "summary"} <= set(AssetSerializer(asset).data)
+
+
+def test_serializer_saves_without_a_request(user):
+    serializer = AssetSerializer(data={"name": "Shed"})
+    assert serializer.is_valid()
+    assert serializer.save(owner=user).owner == user
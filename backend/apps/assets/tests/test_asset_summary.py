@@ -0,0 +1,156 @@
+import pytest
+from datetime import date, timedelta
+from decimal import Decimal
+from django.core.management import call_command
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from rest_framework.test import APIClient
+from django.contrib.auth.models import User
+
+from apps.assets.models import Asset, AssetSummary, MarketValue, Tenant, RentalContract
+
+pytestmark = pytest.mark.django_db
+
+TODAY = date.today()
+
+
+@pytest.fixture()
+def user():
+    return User.objects.create_user(username="summary", password="pass")
+
+
+@pytest.fixture()
+def client(user):
+    client = APIClient()
+    client.force_authenticate(user)
+    return client
+
+
+@pytest.fixture()
+def asset(user):
+    return Asset.objects.create(owner=user, name="S")
+
+
+@pytest.fixture()
+def tenant(asset):
+    return Tenant.objects.create(asset=asset, full_name="T")
+
+
+def summary(asset):
+    return AssetSummary.objects.get(asset=asset)
+
+
+def test_summary_follows_values_and_contracts(asset, tenant):
+    assert summary(asset).is_occupied is False
+    MarketValue.objects.create(asset=asset, date=TODAY - timedelta(days=5), value="900.00")
+    MarketValue.objects.create(asset=asset, date=TODAY + timedelta(days=5), value="999.00")
+    contract = RentalContract.objects.create(
+        tenant=tenant, asset=asset, start_date=TODAY, monthly_rent="100.00"
+    )
+    s = summary(asset)
+    assert s.latest_value == Decimal("900.00")
+    assert s.latest_value_date == TODAY - timedelta(days=5)
+    assert s.current_monthly_rent == Decimal("100.00")
+    assert s.active_contracts == 1
+    assert s.is_occupied is True
+    contract.delete()
+    s = summary(asset)
+    assert s.is_occupied is False
+    assert s.current_monthly_rent == 0
+
+
+def test_deleting_an_asset_removes_its_summary(asset, tenant):
+    MarketValue.objects.create(asset=asset, date=TODAY, value="1.00")
+    RentalContract.objects.create(tenant=tenant, asset=asset, start_date=TODAY, monthly_rent="1.00")
+    asset.delete()
+    assert not AssetSummary.objects.exists()
+
+
+def test_api_writes_keep_summary_in_sync(client, asset):
+    res = client.post(
+        "/api/values/", {"asset": asset.id, "date": TODAY.isoformat(), "value": "500.00"}, format="json"
+    )
+    assert summary(asset).latest_value == Decimal("500.00")
+    client.patch(f"/api/values/{res.data['id']}/", {"value": "600.00"}, format="json")
+    assert summary(asset).latest_value == Decimal("600.00")
+    client.delete(f"/api/values/{res.data['id']}/")
+    assert summary(asset).latest_value is None
+
+
+def test_asset_list_embeds_summary(client, asset, tenant):
+    RentalContract.objects.create(tenant=tenant, asset=asset, start_date=TODAY, monthly_rent="100.00")
+    body = client.get("/api/assets/").json()["results"][0]
+    assert body["summary"]["is_occupied"] is True
+    assert body["summary"]["current_monthly_rent"] == "100.00"
+
+
+def test_rebuild_command(asset, tenant, user):
+    other = Asset.objects.bulk_create([Asset(owner=user, name="Bulk")])[0]
+    MarketValue.objects.bulk_create([MarketValue(asset=other, date=TODAY, value="7.00")])
+    AssetSummary.objects.filter(asset=asset).update(is_occupied=True)
+    call_command("rebuild_asset_summaries", "--batch-size", "1")
+    assert summary(asset).is_occupied is False
+    assert summary(other).latest_value == Decimal("7.00")
+
+
+def test_rollover_command_picks_up_calendar_changes(asset, tenant):
+    other = Asset.objects.create(owner=asset.owner, name="Untouched")
+    RentalContract.objects.bulk_create(
+        [
+            RentalContract(tenant=tenant, asset=asset, start_date=TODAY, monthly_rent="50.00"),
+            RentalContract(
+                tenant=tenant,
+                asset=asset,
+                start_date=TODAY - timedelta(days=90),
+                end_date=TODAY - timedelta(days=1),
+                monthly_rent="70.00",
+            ),
+        ]
+    )
+    call_command("rollover_asset_summaries")
+    assert summary(asset).current_monthly_rent == Decimal("50.00")
+    assert summary(other).refreshed_on is None
+
+
+def test_moving_a_row_updates_both_assets(client, asset, tenant):
+    other = Asset.objects.create(owner=asset.owner, name="Other")
+    other_tenant = Tenant.objects.create(asset=other, full_name="U")
+    value = MarketValue.objects.create(asset=asset, date=TODAY, value="500.00")
+    contract = RentalContract.objects.create(tenant=tenant, asset=asset, start_date=TODAY, monthly_rent="100.00")
+    stamp = Asset.objects.get(pk=asset.pk).updated_at
+
+    res = client.patch(f"/api/values/{value.pk}/", {"asset": other.pk}, format="json")
+    assert res.status_code == 200
+    assert summary(asset).latest_value is None
+    assert summary(other).latest_value == Decimal("500.00")
+    assert Asset.objects.get(pk=asset.pk).updated_at > stamp
+
+    contract.asset, contract.tenant = other, other_tenant
+    contract.save()
+    assert summary(asset).is_occupied is False
+    assert summary(other).current_monthly_rent == Decimal("100.00")
+    # a later move starts from where the row is now
+    contract.asset, contract.tenant = asset, tenant
+    contract.save()
+    assert summary(asset).is_occupied is True
+    assert summary(other).is_occupied is False
+
+
+@pytest.mark.django_db(transaction=True)
+def test_migration_backfills_summaries_of_existing_assets():
+    before = [("assets", "0002_keyset_pagination_indexes")]
+    executor = MigrationExecutor(connection)
+    executor.migrate(before)
+    old = executor.loader.project_state(before).apps
+    owner = old.get_model("auth", "User").objects.create(username="old")
+    asset = old.get_model("assets", "Asset").objects.create(owner=owner, name="Old")
+    old.get_model("assets", "MarketValue").objects.create(asset=asset, date=TODAY, value="3.00")
+    tenant = old.get_model("assets", "Tenant").objects.create(asset=asset, full_name="T")
+    old.get_model("assets", "RentalContract").objects.create(
+        asset=asset, tenant=tenant, start_date=TODAY, monthly_rent="40.00"
+    )
+
+    executor = MigrationExecutor(connection)
+    executor.migrate(executor.loader.graph.leaf_nodes())
+    s = AssetSummary.objects.get(asset_id=asset.pk)
+    assert (s.latest_value, s.current_monthly_rent, s.is_occupied) == (Decimal("3.00"), Decimal("40.00"), True)
@@ -1,6 +1,11 @@
 import pytest
+from datetime import date
 from rest_framework.test import APIClient
 from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from apps.assets.models import Asset, MarketValue, Tenant, RentalContract
 
 pytestmark = pytest.mark.django_db
 
@@ -32,8 +37,8 @@ def test_create_and_retrieve_asset(api_client, user):
 
     res = client.get("/api/assets/")
     assert res.status_code == 200
-    assert len(res.data) == 1
-    assert res.data[0]["id"] == asset_id
+    assert len(res.data["results"]) == 1
+    assert res.data["results"][0]["id"] == asset_id
 
 
 def test_only_owner_can_access_assets(api_client, user):
@@ -49,10 +54,28 @@ def test_only_owner_can_access_assets(api_client, user):
     client2 = auth_client(APIClient(), other)
     res2 = client2.get("/api/assets/")
     assert res2.status_code == 200
-    assert len(res2.data) == 0
+    assert len(res2.data["results"]) == 0
 
 
 def test_healthcheck(api_client):
     res = api_client.get("/health/")
     assert res.status_code == 200
     assert res.json()["status"] == "ok"
+
+
+def test_performance_query_count_is_fixed(api_client, user):
+    client = auth_client(api_client, user)
+    asset = Asset.objects.create(owner=user, name="House C")
+    for month in range(1, 13):
+        MarketValue.objects.create(asset=asset, date=date(2023, month, 1), value=f"{month}00000.00")
+        tenant = Tenant.objects.create(asset=asset, full_name=f"T{month}")
+        RentalContract.objects.create(
+            tenant=tenant, asset=asset, start_date=date(2023, month, 1), monthly_rent="100.00"
+        )
+    with CaptureQueriesContext(connection) as ctx:
+        res = client.get(f"/api/assets/{asset.id}/performance/")
+    assert res.status_code == 200
+    assert res.json()["annual_income"] == 14400.0
+    # the response cache's version, then the asset with every figure annotated, whatever
+    # the number of valuations and contracts
+    assert len(ctx.captured_queries) == 2
@@ -0,0 +1,220 @@
+import json
+from datetime import date
+
+import pytest
+from asgiref.sync import async_to_sync, iscoroutinefunction
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.core.files.base import ContentFile
+from django.core.handlers.asgi import ASGIHandler
+from django.db import connection
+from django.test import AsyncClient, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from apps.accounts.serializers import TokenObtainPairSerializer
+from apps.assets import instrumentation
+from apps.assets.models import Asset, AssetDocument, MarketValue, RentalContract, Tenant
+from apps.assets.response_cache import get_counters
+from apps.assets.streaming import stream
+from apps.assets.views import AssetViewSet
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture()
+def user():
+    return User.objects.create_user(username="async", password="pass")
+
+
+@pytest.fixture()
+def token(user):
+    return str(TokenObtainPairSerializer.get_token(user).access_token)
+
+
+@pytest.fixture()
+def asset(user):
+    asset = Asset.objects.create(owner=user, name="Loft", address="Via Roma 1")
+    MarketValue.objects.create(asset=asset, date=date(2024, 1, 1), value="200000.00")
+    tenant = Tenant.objects.create(asset=asset, full_name="Ada")
+    RentalContract.objects.create(
+        asset=asset, tenant=tenant, start_date=date(2023, 1, 1), monthly_rent="1000.00", deposit="0"
+    )
+    return asset
+
+
+async def _fetch(method, path, headers):
+    response = await getattr(AsyncClient(), method)(path, headers=headers)
+    if response.streaming:
+        response.body = b"".join([part async for part in response])
+    else:
+        response.body = response.content
+    return response
+
+
+def fetch(path, token=None, method="get", **headers):
+    if token:
+        headers["authorization"] = f"Bearer {token}"
+    return async_to_sync(_fetch)(method, path, headers)
+
+
+def test_asgi_entry_point(monkeypatch):
+    # the entry point defaults ASYNC_VIEWS on; the settings are loaded already either way
+    monkeypatch.setenv("ASYNC_VIEWS", "false")
+    import config.asgi
+
+    assert isinstance(config.asgi.application, ASGIHandler)
+
+
+def test_only_asset_reads_become_coroutines(async_views):
+    assert not iscoroutinefunction(resolve("/api/assets/").func)
+    async_views()
+    assert iscoroutinefunction(resolve("/api/assets/").func)
+    assert iscoroutinefunction(resolve("/api/assets/1/").func)
+    assert iscoroutinefunction(resolve("/api/assets/1/performance/").func)
+    assert resolve("/api/assets/1/performance/").func.csrf_exempt
+    assert not iscoroutinefunction(resolve("/api/assets/performance/").func)
+    assert not iscoroutinefunction(resolve("/api/values/").func)
+    assert not iscoroutinefunction(AssetViewSet.as_view({"post": "create"}))
+
+
+def test_async_reads_match_sync(async_views, user, token, asset):
+    Asset.objects.create(owner=User.objects.create_user(username="other"), name="Not mine")
+    sync = APIClient()
+    sync.force_authenticate(user)
+    paths = [
+        "/api/assets/",
+        "/api/assets/?expand=values,tenants&fields=name",
+        "/api/assets/?values_limit=1",
+        f"/api/assets/{asset.pk}/",
+        f"/api/assets/{asset.pk}/performance/",
+    ]
+    expected = {}
+    for path in paths:
+        with CaptureQueriesContext(connection) as ctx:
+            expected[path] = sync.get(path).json()
+        expected[path, "queries"] = len(ctx.captured_queries)
+    async_views()
+    fetch("/api/assets/", token)  # warms the token version cache
+    caches["responses"].clear()
+    for path in paths:
+        with CaptureQueriesContext(connection) as ctx:
+            response = fetch(path, token)
+        assert response.status_code == 200, path
+        assert json.loads(response.body) == expected[path]
+        assert len(ctx.captured_queries) == expected[path, "queries"], path
+
+
+def test_async_conditional_and_cached_responses(async_views, token, asset):
+    async_views()
+    first = fetch(f"/api/assets/{asset.pk}/", token)
+    assert first.status_code == 200
+    assert fetch(f"/api/assets/{asset.pk}/", token, if_none_match=first["ETag"]).status_code == 304
+    assert fetch(f"/api/assets/{asset.pk}/", token).status_code == 200
+    assert fetch(f"/api/assets/{asset.pk}/performance/", token).status_code == 200
+    assert fetch(f"/api/assets/{asset.pk}/performance/", token, method="head").status_code == 200
+    assert get_counters()["hits"] == 2
+
+
+def test_async_errors(async_views, user, token, asset):
+    other = Asset.objects.create(owner=User.objects.create_user(username="other"), name="Not mine")
+    async_views()
+    assert fetch("/api/assets/").status_code == 401
+    assert fetch("/api/assets/", authorization="Basic abc").status_code == 401
+    assert fetch("/api/assets/", "not-a-token").status_code == 401
+    assert fetch(f"/api/assets/{other.pk}/", token).status_code == 404
+    assert fetch(f"/api/assets/{other.pk}/performance/", token).status_code == 404
+    assert fetch("/api/assets/abc/", token).status_code == 404
+    user.set_password("changed")
+    user.save()
+    assert fetch("/api/assets/", token).status_code == 401
+
+
+def test_async_authentication_variants(async_views, user, asset):
+    async_views()
+    # tokens issued without the claims load the user
+    assert fetch("/api/assets/", str(AccessToken.for_user(user))).status_code == 200
+    # the synchronous authenticators run on a thread
+    forced = APIClient()
+    forced.force_authenticate(user)
+    assert forced.get("/api/assets/").status_code == 200
+
+
+def test_writes_on_async_routes_stay_sync(async_views, user, asset):
+    async_views()
+    client = APIClient()
+    client.force_authenticate(user)
+    res = client.post("/api/assets/", {"name": "New"}, format="json")
+    assert res.status_code == 201
+    assert client.patch(f"/api/assets/{asset.pk}/", {"name": "Renamed"}, format="json").status_code == 200
+
+
+def test_unpaginated_async_list(async_views, monkeypatch, token, asset):
+    monkeypatch.setattr(AssetViewSet, "pagination_class", None)
+    async_views()
+    response = fetch("/api/assets/", token)
+    assert [item["id"] for item in json.loads(response.body)] == [asset.pk]
+
+
+def test_request_metrics_in_async_chain(async_views, settings, token, asset):
+    settings.REQUEST_METRICS_ENABLED = True
+    # AsyncClient loads the chain on its event loop's thread, after the test database
+    # connection was opened; servers load it at startup, before any connection
+    instrumentation._instrument_connection(connection)
+    async_views()
+    response = fetch("/api/assets/", token)
+    assert response.status_code == 200
+    assert 'desc="0 queries"' not in response["Server-Timing"]
+
+
+@override_settings(WHITENOISE_AUTOREFRESH=True, WHITENOISE_USE_FINDERS=True)
+def test_static_files_in_async_chain():
+    with pytest.warns(Warning, match="synchronous iterators"):
+        response = fetch("/static/admin/css/base.css")
+    assert response.status_code == 200
+    assert b"body" in response.body
+    assert fetch("/static/admin/css/missing.css").status_code == 404
+
+
+def test_streamed_bodies_under_asgi(settings, tmp_path, user, token, asset):
+    settings.MEDIA_ROOT = tmp_path
+    settings.DOCUMENT_UPLOAD_CHUNK_SIZE = 100
+    settings.ASYNC_VIEWS = True
+    content = bytes(range(256)) * 4
+    document = AssetDocument.objects.create(asset=asset, file=ContentFile(content, name="scan.bin"))
+    response = fetch(f"/api/documents/{document.pk}/download/", token)
+    assert response.status_code == 200
+    assert response["Content-Length"] == str(len(content))
+    assert response.body == content
+    response = fetch(f"/api/documents/{document.pk}/download/", token, range="bytes=10-509")
+    assert response.status_code == 206
+    assert response.body == content[10:510]
+    response = fetch("/api/export/values.csv", token)
+    assert response.body.decode().splitlines()[1].endswith("200000.00")
+
+
+def test_stream_closes_the_iterator():
+    closed = []
+
+    def produce():
+        try:
+            yield from range(10)
+        finally:
+            closed.append(True)
+
+    async def first_item():
+        body = stream(produce(), batch=3)
+        item = await anext(body)
+        await body.aclose()
+        return item
+
+    async def items():
+        return [item async for item in stream([1, 2, 3], batch=2)]
+
+    assert stream([1, 2]) == [1, 2]
+    with override_settings(ASYNC_VIEWS=True):
+        assert async_to_sync(first_item)() == 0
+        assert async_to_sync(items)() == [1, 2, 3]
+    assert closed == [True]
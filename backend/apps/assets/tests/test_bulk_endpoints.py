@@ -0,0 +1,178 @@
+import json
+import pytest
+from datetime import date, timedelta
+from decimal import Decimal
+from rest_framework.test import APIClient
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.test import override_settings
+
+from apps.assets.models import Asset, AssetSummary, MarketValue, Tenant, RentalContract
+
+pytestmark = pytest.mark.django_db
+
+TODAY = date.today()
+
+
+@pytest.fixture()
+def user():
+    return User.objects.create_user(username="bulk", password="pass")
+
+
+@pytest.fixture()
+def client(user):
+    client = APIClient()
+    client.force_authenticate(user)
+    return client
+
+
+@pytest.fixture()
+def asset(user):
+    return Asset.objects.create(owner=user, name="Bulk")
+
+
+@pytest.fixture()
+def foreign_asset():
+    other = User.objects.create_user(username="stranger", password="pass")
+    return Asset.objects.create(owner=other, name="Foreign")
+
+
+def values_payload(asset, days, value="100.00"):
+    return [{"asset": asset.id, "date": (TODAY - timedelta(days=d)).isoformat(), "value": value} for d in days]
+
+
+def test_bulk_create_values_reports_per_item_errors(client, asset, foreign_asset):
+    payload = values_payload(asset, range(3)) + [
+        {"asset": foreign_asset.id, "date": TODAY.isoformat(), "value": "1.00"},
+        {"asset": asset.id, "date": "not-a-date", "value": "1.00"},
+    ]
+    res = client.post("/api/values/bulk/", payload, format="json")
+    assert res.status_code == 200
+    body = res.json()
+    assert (body["created"], body["updated"], body["deleted"]) == (3, 0, 0)
+    assert [e["index"] for e in body["errors"]] == [3, 4]
+    assert "asset" in body["errors"][0]["errors"]
+    assert "date" in body["errors"][1]["errors"]
+    assert MarketValue.objects.filter(asset=foreign_asset).count() == 0
+    assert AssetSummary.objects.get(asset=asset).latest_value == Decimal("100.00")
+
+
+def test_bulk_create_values_upserts_on_asset_and_date(client, asset):
+    MarketValue.objects.create(asset=asset, date=TODAY, value="1.00")
+    payload = values_payload(asset, [0, 1], value="5.00") + values_payload(asset, [1], value="6.00")
+    body = client.post("/api/values/bulk/", payload, format="json").json()
+    assert (body["created"], body["updated"]) == (1, 1)
+    assert MarketValue.objects.get(asset=asset, date=TODAY).value == Decimal("5.00")
+    assert MarketValue.objects.get(asset=asset, date=TODAY - timedelta(days=1)).value == Decimal("6.00")
+
+
+def test_bulk_create_values_accepts_ndjson(client, asset):
+    lines = "\n".join(json.dumps(item) for item in values_payload(asset, range(4))) + "\n\n"
+    res = client.post("/api/values/bulk/", lines, content_type="application/x-ndjson")
+    assert res.json()["created"] == 4
+
+
+def test_bulk_rejects_malformed_ndjson(client, asset):
+    res = client.post("/api/values/bulk/", '{"asset": 1}\n{oops', content_type="application/x-ndjson")
+    assert res.status_code == 400
+    assert "line 2" in res.json()["detail"]
+
+
+def test_bulk_create_query_count_is_constant(client, asset):
+    with CaptureQueriesContext(connection) as small:
+        client.post("/api/values/bulk/", values_payload(asset, range(2)), format="json")
+    with CaptureQueriesContext(connection) as large:
+        client.post("/api/values/bulk/", values_payload(asset, range(10, 60)), format="json")
+    assert len(small.captured_queries) == len(large.captured_queries)
+
+
+def test_bulk_update_and_delete_values(client, asset, foreign_asset):
+    own = MarketValue.objects.create(asset=asset, date=TODAY, value="1.00")
+    foreign = MarketValue.objects.create(asset=foreign_asset, date=TODAY, value="1.00")
+    body = client.patch(
+        "/api/values/bulk/",
+        [{"id": own.id, "value": "9.00"}, {"id": foreign.id, "value": "9.00"}, {"value": "9.00"}],
+        format="json",
+    ).json()
+    assert body["updated"] == 1
+    assert [e["index"] for e in body["errors"]] == [1, 2]
+    own.refresh_from_db()
+    foreign.refresh_from_db()
+    assert own.value == Decimal("9.00")
+    assert foreign.value == Decimal("1.00")
+    assert AssetSummary.objects.get(asset=asset).latest_value == Decimal("9.00")
+
+    body = client.delete(
+        "/api/values/bulk/", [own.id, {"id": foreign.id}, "x"], format="json"
+    ).json()
+    assert body["deleted"] == 1
+    assert [e["index"] for e in body["errors"]] == [1, 2]
+    assert MarketValue.objects.filter(pk=foreign.pk).exists()
+    assert AssetSummary.objects.get(asset=asset).latest_value is None
+
+
+def test_bulk_contracts(client, user, asset, foreign_asset):
+    tenant = Tenant.objects.create(asset=asset, full_name="T")
+    foreign_tenant = Tenant.objects.create(asset=foreign_asset, full_name="F")
+    payload = [
+        {"tenant": tenant.id, "asset": asset.id, "start_date": TODAY.isoformat(), "monthly_rent": "100.00"},
+        {"tenant": foreign_tenant.id, "asset": asset.id, "start_date": TODAY.isoformat(), "monthly_rent": "1.00"},
+    ]
+    body = client.post("/api/contracts/bulk/", payload, format="json").json()
+    assert body["created"] == 1
+    assert body["errors"][0]["index"] == 1 and "tenant" in body["errors"][0]["errors"]
+    assert AssetSummary.objects.get(asset=asset).is_occupied is True
+
+    contract = RentalContract.objects.get(asset=asset)
+    body = client.patch(
+        "/api/contracts/bulk/",
+        [{"id": contract.id, "end_date": (TODAY - timedelta(days=1)).isoformat()}, {"id": 0, "notes": "x"}],
+        format="json",
+    ).json()
+    assert body["updated"] == 1
+    assert body["errors"] == [{"index": 1, "errors": {"id": ["Not found."]}}]
+    assert AssetSummary.objects.get(asset=asset).is_occupied is False
+
+    assert client.delete("/api/contracts/bulk/", [contract.id], format="json").json()["deleted"] == 1
+
+
+def test_bulk_contract_tenant_must_be_the_assets(client, user, asset):
+    other = Asset.objects.create(owner=user, name="Other")
+    tenant = Tenant.objects.create(asset=other, full_name="Elsewhere")
+    row = {"tenant": tenant.id, "asset": asset.id, "start_date": TODAY.isoformat(), "monthly_rent": "1.00"}
+    body = client.post("/api/contracts/bulk/", [row, {**row, "asset": other.id}], format="json").json()
+    assert body["created"] == 1
+    assert body["errors"] == [{"index": 0, "errors": {"tenant": ["The tenant is not one of the asset's."]}}]
+    contract = RentalContract.objects.get()
+    assert contract.asset_id == other.id
+    moved = {"id": contract.id, "asset": asset.id, "tenant": tenant.id}
+    body = client.patch("/api/contracts/bulk/", [moved], format="json").json()
+    assert body["updated"] == 0
+    assert body["errors"][0]["errors"] == {"tenant": ["The tenant is not one of the asset's."]}
+
+
+def test_bulk_delete_query_count_is_constant(client, asset):
+    def delete(count):
+        client.post("/api/values/bulk/", values_payload(asset, range(count)), format="json")
+        ids = list(MarketValue.objects.values_list("pk", flat=True))
+        with CaptureQueriesContext(connection) as ctx:
+            body = client.delete("/api/values/bulk/", ids, format="json").json()
+        assert body["deleted"] == count
+        return len(ctx.captured_queries)
+
+    assert delete(2) == delete(20)
+    assert AssetSummary.objects.get(asset=asset).latest_value is None
+
+
+def test_bulk_rejects_non_list_and_oversized_payloads(client, asset):
+    res = client.post("/api/values/bulk/", {"asset": asset.id}, format="json")
+    assert res.status_code == 400
+    with override_settings(BULK_MAX_ITEMS=1):
+        res = client.post("/api/values/bulk/", values_payload(asset, range(2)), format="json")
+    assert res.status_code == 400
+
+
+def test_bulk_with_only_invalid_items_writes_nothing(client, asset):
+    body = client.patch("/api/values/bulk/", [{"id": "x"}], format="json").json()
+    assert body["updated"] == 0 and len(body["errors"]) == 1
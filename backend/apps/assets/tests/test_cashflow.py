@@ -0,0 +1,117 @@
+from datetime import date
+
+import pytest
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from apps.assets.models import Asset, RentalContract, Tenant
+from apps.assets.projection import Contracts, project
+
+pytestmark = pytest.mark.django_db
+
+URL = "/api/assets/cashflow/"
+
+
+@pytest.fixture()
+def user():
+    return User.objects.create_user(username="cashflow", password="pass")
+
+
+@pytest.fixture()
+def client(user):
+    client = APIClient()
+    client.force_authenticate(user)
+    return client
+
+
+def contract(asset, start, end, rent, deposit="0"):
+    tenant = Tenant.objects.create(asset=asset, full_name="T")
+    return RentalContract.objects.create(
+        asset=asset, tenant=tenant, start_date=start, end_date=end, monthly_rent=rent, deposit=deposit
+    )
+
+
+@pytest.fixture()
+def portfolio(user):
+    flat = Asset.objects.create(owner=user, name="Flat")
+    # ends on 15 January, and the next tenant overlaps it from the 10th, open-ended
+    contract(flat, date(2020, 1, 1), date(2026, 1, 15), "1000.00", "2000.00")
+    contract(flat, date(2026, 1, 10), None, "900.00", "1800.00")
+    shop = Asset.objects.create(owner=user, name="Shop")
+    # February only, then a tenant from after the projection
+    contract(shop, date(2026, 2, 1), date(2026, 2, 28), "500.00")
+    contract(shop, date(2027, 1, 1), None, "100.00")
+    Asset.objects.create(owner=user, name="Empty")
+    # somebody else's
+    other = Asset.objects.create(owner=User.objects.create_user(username="other"), name="Other")
+    contract(other, date(2026, 1, 1), None, "700.00")
+    return flat, shop
+
+
+def test_cashflow_projection(client, portfolio):
+    with CaptureQueriesContext(connection) as ctx:
+        res = client.get(URL, {"as_of": "2026-01-20", "months": 3})
+    assert res.status_code == 200
+    # the response cache's version of the assets, the assets and the contracts
+    assert len(ctx.captured_queries) == 3
+    data = res.json()
+    assert data["months"] == ["2026-01-01", "2026-02-01", "2026-03-01"]
+    flat, shop, empty = data["assets"]
+    assert [flat["name"], shop["name"], empty["name"]] == ["Flat", "Shop", "Empty"]
+    # 15 days at 1000 and 22 at 900, out of 31
+    assert flat["income"] == [1122.58, 900.0, 900.0]
+    assert flat["deposits"] == [1800.0, 1800.0, 1800.0]
+    assert flat["expiring_contracts"] == [1, 0, 0]
+    assert flat["expiring_rent"] == [1000.0, 0.0, 0.0]
+    assert flat["vacant_days"] == [0, 0, 0]
+    assert shop["income"] == [0.0, 500.0, 0.0]
+    assert shop["expiring_contracts"] == [0, 1, 0]
+    assert shop["vacant_days"] == [31, 0, 31]
+    assert empty["income"] == [0.0, 0.0, 0.0]
+    assert empty["vacant_days"] == [31, 28, 31]
+    assert data["portfolio"] == {
+        "income": [1122.58, 1400.0, 900.0],
+        "deposits": [1800.0, 1800.0, 1800.0],
+        "expiring_contracts": [1, 1, 0],
+        "expiring_rent": [1000.0, 500.0, 0.0],
+        "vacant_days": [62, 28, 62],
+    }
+
+
+def test_cashflow_options(client, portfolio):
+    res = client.get(URL, {"detail": "portfolio"})
+    assert res.status_code == 200
+    assert "assets" not in res.json()
+    assert len(res.json()["months"]) == 12
+    assert res.json()["months"][0] == date.today().replace(day=1).isoformat()
+    assert len(client.get(URL, {"months": 120}).json()["months"]) == 120
+    for params in ({"months": 0}, {"months": 121}, {"months": "x"}, {"detail": "x"}, {"as_of": "x"}):
+        assert client.get(URL, params).status_code == 400, params
+
+
+def test_cashflow_as_of_leaves_room_for_the_longest_projection(client, portfolio):
+    res = client.get(URL, {"as_of": "9989-12-31", "months": 120})
+    assert res.status_code == 200
+    assert res.json()["months"][-1] == "9999-11-01"
+    for as_of in ("9990-01-01", "9999-12-01"):
+        res = client.get(URL, {"as_of": as_of})
+        assert res.status_code == 400
+        assert list(res.json()) == ["as_of"]
+
+
+def test_cashflow_without_assets(client):
+    res = client.get(URL, {"months": 2})
+    assert res.json()["assets"] == []
+    assert res.json()["portfolio"]["income"] == [0.0, 0.0]
+
+
+def test_projection_skips_contracts_of_other_assets(portfolio):
+    flat, shop = portfolio
+    contracts = Contracts.load(RentalContract.objects.all())
+    # the other assets' contracts, with ids before and after the projected one's
+    months, result = project([shop.pk], contracts, date(2026, 1, 1), 2)
+    assert result["income"].tolist() == [[0.0, 500.0]]
+    months, result = project([], contracts, date(2026, 1, 1), 2)
+    assert result["income"].shape == (0, 2)
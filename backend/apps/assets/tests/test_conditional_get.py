@@ -0,0 +1,109 @@
+import pytest
+from datetime import date, timedelta
+from rest_framework.test import APIClient
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from apps.assets.models import Asset, AssetDocument, AssetSummary, MarketValue, Tenant
+from apps.assets.signals import assets_bulk_changed
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture()
+def user():
+    return User.objects.create_user(username="poller", password="pass")
+
+
+@pytest.fixture()
+def client(user):
+    client = APIClient()
+    client.force_authenticate(user)
+    return client
+
+
+@pytest.fixture()
+def asset(user):
+    asset = Asset.objects.create(owner=user, name="Loft")
+    MarketValue.objects.create(asset=asset, date=date(2020, 1, 1), value="1000.00")
+    return asset
+
+
+def revalidate(client, url, res):
+    return client.get(url, HTTP_IF_NONE_MATCH=res["ETag"])
+
+
+@pytest.mark.parametrize("detail", [False, True])
+def test_unchanged_resource_is_not_modified_without_serializing(client, asset, detail):
+    url = f"/api/assets/{asset.id}/" if detail else "/api/assets/"
+    res = client.get(url)
+    assert res.status_code == 200
+    assert res["Cache-Control"] == "private, no-cache"
+    assert "Authorization" in res["Vary"]
+    assert res.json()["updated_at"] if detail else res.json()["results"][0]["updated_at"]
+    with CaptureQueriesContext(connection) as ctx:
+        again = revalidate(client, url, res)
+    assert again.status_code == 304
+    assert again["ETag"] == res["ETag"]
+    assert again.content == b""
+    # only the version lookup runs
+    assert len(ctx.captured_queries) == 1
+
+
+def test_if_modified_since(client, asset):
+    res = client.get("/api/assets/")
+    assert client.get("/api/assets/", HTTP_IF_MODIFIED_SINCE=res["Last-Modified"]).status_code == 304
+    assert client.get("/api/assets/", HTTP_IF_MODIFIED_SINCE="Mon, 01 Jan 2001 00:00:00 GMT").status_code == 200
+
+
+@pytest.mark.parametrize(
+    "change",
+    [
+        lambda asset: Asset.objects.filter(pk=asset.pk).get().save(),
+        lambda asset: MarketValue.objects.create(asset=asset, date=date(2021, 1, 1), value="1.00"),
+        lambda asset: asset.values.get().delete(),
+        lambda asset: Tenant.objects.create(asset=asset, full_name="T"),
+        lambda asset: AssetDocument.objects.create(asset=asset, file="asset_docs/x.pdf"),
+        lambda asset: AssetSummary.objects.filter(asset=asset).refresh(date.today() + timedelta(days=1)),
+        lambda asset: assets_bulk_changed({asset.pk}),
+        lambda asset: Asset.objects.create(owner=asset.owner, name="Second"),
+    ],
+)
+def test_any_change_to_the_payload_changes_the_etag(client, asset, change):
+    res = client.get("/api/assets/")
+    detail = client.get(f"/api/assets/{asset.id}/")
+    change(asset)
+    assert revalidate(client, "/api/assets/", res).status_code == 200
+    if Asset.objects.filter(owner=asset.owner).count() == 1:
+        assert revalidate(client, f"/api/assets/{asset.id}/", detail).status_code == 200
+
+
+def test_deleting_an_asset_changes_the_list_etag(client, user, asset):
+    other = Asset.objects.create(owner=user, name="Second")
+    res = client.get("/api/assets/")
+    other.delete()
+    assert revalidate(client, "/api/assets/", res).status_code == 200
+
+
+def test_etag_differs_per_user_and_format(client, asset):
+    res = client.get("/api/assets/")
+    stranger = APIClient()
+    stranger.force_authenticate(User.objects.create_user(username="s", password="p"))
+    assert stranger.get("/api/assets/")["ETag"] != res["ETag"]
+    browsable = client.get("/api/assets/", HTTP_ACCEPT="text/html")
+    assert browsable["ETag"] != res["ETag"]
+
+
+def test_missing_or_foreign_asset_is_not_found(client):
+    other = Asset.objects.create(owner=User.objects.create_user(username="o", password="p"), name="F")
+    res = client.get(f"/api/assets/{other.id}/")
+    assert res.status_code == 404
+    assert "ETag" not in res
+    assert client.get("/api/assets/not-a-number/").status_code == 404
+
+
+def test_empty_portfolio_has_an_etag(client):
+    res = client.get("/api/assets/")
+    assert "Last-Modified" not in res
+    assert revalidate(client, "/api/assets/", res).status_code == 304
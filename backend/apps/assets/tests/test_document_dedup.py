@@ -0,0 +1,198 @@
+import io
+import os
+import pytest
+from datetime import timedelta
+from django.contrib.auth.models import User
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.assets.documents import blob_name, document_storage
+from apps.assets.management.commands import gc_documents
+from apps.assets.models import Asset, AssetDocument, DocumentBlob, DocumentBlobQuerySet
+
+pytestmark = pytest.mark.django_db
+
+BILL = b"electricity bill, March"
+
+
+@pytest.fixture(autouse=True)
+def media(settings, tmp_path):
+    settings.MEDIA_ROOT = tmp_path
+    return tmp_path
+
+
+@pytest.fixture()
+def user():
+    return User.objects.create_user(username="deduper", password="pass")
+
+
+@pytest.fixture()
+def client(user):
+    client = APIClient()
+    client.force_authenticate(user)
+    return client
+
+
+@pytest.fixture()
+def assets(user):
+    return [Asset.objects.create(owner=user, name=name) for name in ("Flat", "Garage")]
+
+
+@pytest.fixture()
+def writes(monkeypatch):
+    saved = []
+    save = FileSystemStorage._save
+
+    def counting(self, name, content):
+        saved.append(name)
+        return save(self, name, content)
+
+    monkeypatch.setattr(FileSystemStorage, "_save", counting)
+    return saved
+
+
+def upload(client, asset, name="bill.pdf", content=BILL):
+    file = SimpleUploadedFile(name, content, content_type="application/pdf")
+    res = client.post("/api/documents/", {"asset": asset.id, "file": file}, format="multipart")
+    assert res.status_code == 201
+    return AssetDocument.objects.get(pk=res.json()["id"])
+
+
+def gc(*args):
+    out = io.StringIO()
+    call_command("gc_documents", *args, stdout=out)
+    return out.getvalue()
+
+
+def blob_files(media):
+    return sorted(path.name for path in (media / "blobs").glob("*/*"))
+
+
+def test_identical_uploads_share_one_blob(client, assets, media, writes):
+    first = upload(client, assets[0], "bill.pdf")
+    second = upload(client, assets[1], "copy of bill.pdf")
+    assert first.file.name == second.file.name == blob_name(first.sha256)
+    assert (first.filename, second.filename) == ("bill.pdf", "copy of bill.pdf")
+    # the second upload found the blob and wrote nothing
+    assert len(writes) == 1
+    assert blob_files(media) == [first.sha256]
+    assert DocumentBlob.objects.get().refs == 2
+    res = client.get(f"/api/documents/{second.id}/download/")
+    assert 'filename="copy of bill.pdf"' in res["Content-Disposition"]
+    assert b"".join(res.streaming_content) == BILL
+
+
+def test_references_follow_deletes_and_replacements(client, assets):
+    first = upload(client, assets[0])
+    second = upload(client, assets[1])
+    client.delete(f"/api/documents/{first.id}/")
+    assert DocumentBlob.objects.get(pk=second.sha256).refs == 1
+    replacement = SimpleUploadedFile("bill-v2.pdf", b"corrected bill", content_type="application/pdf")
+    res = client.patch(f"/api/documents/{second.id}/", {"file": replacement}, format="multipart")
+    assert res.status_code == 200
+    assert res.json()["filename"] == "bill-v2.pdf"
+    refs = dict(DocumentBlob.objects.values_list("sha256", "refs"))
+    assert refs == {second.sha256: 0, res.json()["sha256"]: 1}
+    # saving without a new file leaves the counts alone
+    client.patch(f"/api/documents/{second.id}/", {"description": "fixed"}, format="multipart")
+    assert DocumentBlob.objects.get(pk=res.json()["sha256"]).refs == 1
+    # deleting the asset releases its documents too
+    assets[1].delete()
+    assert not DocumentBlob.objects.filter(refs__gt=0).exists()
+
+
+def test_files_saved_outside_uploads_are_hashed(assets):
+    document = AssetDocument.objects.create(asset=assets[0], file=ContentFile(BILL, name="bill.pdf"))
+    assert document.file.name == blob_name(document.sha256)
+    assert document.size == len(BILL)
+    assert DocumentBlob.objects.get().refs == 1
+
+
+def test_deleting_a_document_stored_before_blobs(assets):
+    document = AssetDocument.objects.create(asset=assets[0], file=ContentFile(BILL, name="bill.pdf"))
+    AssetDocument.objects.filter(pk=document.pk).update(sha256="")
+    AssetDocument.objects.get(pk=document.pk).delete()
+    assert DocumentBlob.objects.get().refs == 1
+
+
+def test_acquire_counts_a_blob_recorded_concurrently(monkeypatch):
+    update = DocumentBlobQuerySet.update
+
+    def racing(self, **kwargs):
+        # our UPDATE finds no row, then another upload of the same content records it
+        monkeypatch.setattr(DocumentBlobQuerySet, "update", update)
+        DocumentBlob.objects.create(sha256="a" * 64, size=1, refs=1)
+        return 0
+
+    monkeypatch.setattr(DocumentBlobQuerySet, "update", racing)
+    DocumentBlob.objects.acquire("a" * 64, 1)
+    assert DocumentBlob.objects.get().refs == 2
+
+
+def test_gc_removes_orphans_after_the_grace_period(client, assets, media):
+    kept = upload(client, assets[0], content=b"lease")
+    dropped = upload(client, assets[1])
+    client.delete(f"/api/documents/{dropped.id}/")
+    assert "Removed 0 orphaned blobs" in gc()
+    assert len(blob_files(media)) == 2
+    out = gc("--grace-minutes", "0", "--dry-run")
+    assert f"Would remove 1 orphaned blobs ({len(BILL)} bytes) and 0 unrecorded" in out
+    assert len(blob_files(media)) == 2
+    assert DocumentBlob.objects.count() == 2
+    assert "Removed 1 orphaned blobs" in gc("--grace-minutes", "0")
+    assert blob_files(media) == [kept.sha256]
+    assert list(DocumentBlob.objects.values_list("sha256", flat=True)) == [kept.sha256]
+    res = client.get(f"/api/documents/{kept.id}/download/")
+    assert b"".join(res.streaming_content) == b"lease"
+
+
+def test_gc_recounts_and_removes_unrecorded_files(client, assets, media):
+    kept = upload(client, assets[0])
+    DocumentBlob.objects.update(refs=0, released_at=None, created_at=timezone.now() - timedelta(days=1))
+    stray = media / "blobs" / "ff" / ("f" * 64)
+    stray.parent.mkdir(parents=True)
+    stray.write_bytes(b"rolled back")
+    old = (timezone.now() - timedelta(days=1)).timestamp()
+    os.utime(stray, (old, old))
+    assert "Removed 0 orphaned blobs (0 bytes) and 1 unrecorded blob files" in gc("--recount")
+    assert blob_files(media) == [kept.sha256]
+    assert DocumentBlob.objects.get().refs == 1
+
+
+@pytest.mark.parametrize("race", ["saved", "recorded"])
+def test_gc_keeps_blobs_reused_while_it_runs(monkeypatch, client, assets, media, race):
+    dropped = upload(client, assets[0])
+    client.delete(f"/api/documents/{dropped.id}/")
+    # and a record whose file is already gone
+    DocumentBlob.objects.create(sha256="e" * 64, size=1)
+    old = timezone.now() - timedelta(days=1)
+    DocumentBlob.objects.update(released_at=old, created_at=old)
+    path = media / dropped.file.name
+    os.utime(path, (old.timestamp(), old.timestamp()))
+    stored_blobs = gc_documents.stored_blobs
+    reused = []
+
+    def racing(storage):
+        # once the orphans' records are deleted, the same content is uploaded again: its
+        # storage finds the file in place, then the document is recorded
+        document_storage().save("bill.pdf", ContentFile(BILL))
+        if race == "recorded":
+            reused.append(upload(client, assets[1]))
+            # the touch alone isn't relied on
+            os.utime(path, (old.timestamp(), old.timestamp()))
+        return stored_blobs(storage)
+
+    monkeypatch.setattr(gc_documents, "stored_blobs", racing)
+    assert "Removed 2 orphaned blobs" in gc()
+    assert blob_files(media) == [dropped.sha256]
+    for document in reused:
+        res = client.get(f"/api/documents/{document.id}/download/")
+        assert b"".join(res.streaming_content) == BILL
+
+
+def test_gc_without_blobs():
+    assert "Removed 0 orphaned blobs (0 bytes) and 0 unrecorded blob files" in gc()
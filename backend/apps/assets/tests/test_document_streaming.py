@@ -0,0 +1,170 @@
+import hashlib
+import io
+import pytest
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from rest_framework.test import APIClient
+
+from apps.assets.documents import ChecksumUploadHandler, file_digest, parse_range, read_range
+from apps.assets.models import Asset, AssetDocument
+
+pytestmark = pytest.mark.django_db
+
+CONTENT = b"%PDF-1.4 " + bytes(range(256)) * 40
+
+
+@pytest.fixture(autouse=True)
+def media(settings, tmp_path):
+    settings.MEDIA_ROOT = tmp_path
+    settings.DOCUMENT_UPLOAD_CHUNK_SIZE = 1000
+
+
+@pytest.fixture()
+def user():
+    return User.objects.create_user(username="streamer", password="pass")
+
+
+@pytest.fixture()
+def client(user):
+    client = APIClient()
+    client.force_authenticate(user)
+    return client
+
+
+@pytest.fixture()
+def chunks(monkeypatch):
+    received = []
+    receive = ChecksumUploadHandler.receive_data_chunk
+
+    def counting(self, raw_data, start):
+        received.append(len(raw_data))
+        return receive(self, raw_data, start)
+
+    monkeypatch.setattr(ChecksumUploadHandler, "receive_data_chunk", counting)
+    return received
+
+
+@pytest.fixture()
+def document(client, user):
+    asset = Asset.objects.create(owner=user, name="Scans")
+    file = SimpleUploadedFile("deed.pdf", CONTENT, content_type="application/pdf")
+    res = client.post("/api/documents/", {"asset": asset.id, "file": file}, format="multipart")
+    assert res.status_code == 201
+    return AssetDocument.objects.get(pk=res.json()["id"])
+
+
+def body(res):
+    return b"".join(res.streaming_content)
+
+
+def test_upload_streams_in_chunks(chunks, document):
+    assert sum(chunks) == len(CONTENT)
+    assert len(chunks) >= len(CONTENT) // 1000
+
+
+def test_upload_records_size_and_checksum(client, document):
+    assert document.size == len(CONTENT)
+    assert document.sha256 == hashlib.sha256(CONTENT).hexdigest()
+    assert document.file.read() == CONTENT
+    res = client.patch(f"/api/documents/{document.id}/", {"description": "deed"}, format="multipart")
+    assert res.status_code == 200
+    assert res.json()["sha256"] == document.sha256
+    assert res.json()["size"] == len(CONTENT)
+
+
+def test_digest_of_a_file_not_hashed_on_upload():
+    assert file_digest(SimpleUploadedFile("a.txt", b"abc")) == hashlib.sha256(b"abc").hexdigest()
+
+
+def test_download_streams_the_whole_file(client, document):
+    res = client.get(f"/api/documents/{document.id}/download/")
+    assert res.status_code == 200
+    assert body(res) == CONTENT
+    assert res["Content-Type"] == "application/pdf"
+    assert res["Accept-Ranges"] == "bytes"
+    assert res["ETag"] == f'"{document.sha256}"'
+    assert res["Content-Disposition"].startswith("attachment;")
+
+
+@pytest.mark.parametrize(
+    "header,first,last",
+    [
+        ("bytes=10-19", 10, 19),
+        ("bytes=10000-", 10000, len(CONTENT) - 1),
+        ("bytes=-5", len(CONTENT) - 5, len(CONTENT) - 1),
+    ],
+)
+def test_download_range(client, document, header, first, last):
+    res = client.get(f"/api/documents/{document.id}/download/", HTTP_RANGE=header)
+    assert res.status_code == 206
+    assert body(res) == CONTENT[first : last + 1]
+    assert res["Content-Range"] == f"bytes {first}-{last}/{len(CONTENT)}"
+    assert res["Content-Length"] == str(last - first + 1)
+
+
+def test_unsatisfiable_range(client, document):
+    res = client.get(f"/api/documents/{document.id}/download/", HTTP_RANGE=f"bytes={len(CONTENT)}-")
+    assert res.status_code == 416
+    assert res["Content-Range"] == f"bytes */{len(CONTENT)}"
+
+
+def test_if_range(client, document):
+    url = f"/api/documents/{document.id}/download/"
+    res = client.get(url, HTTP_RANGE="bytes=0-3", HTTP_IF_RANGE=f'"{document.sha256}"')
+    assert res.status_code == 206
+    # a stale validator gets the current file, even when the range wouldn't fit it
+    res = client.get(url, HTTP_RANGE=f"bytes={len(CONTENT)}-", HTTP_IF_RANGE='"stale"')
+    assert res.status_code == 200
+    assert body(res) == CONTENT
+
+
+def test_download_through_the_proxy(client, document, settings):
+    url = f"/api/documents/{document.id}/download/"
+    settings.DOCUMENT_DOWNLOAD_MODE = "x-accel-redirect"
+    res = client.get(url)
+    assert res["X-Accel-Redirect"] == f"/protected-media/{document.file.name}"
+    assert res.content == b""
+    settings.DOCUMENT_DOWNLOAD_MODE = "x-sendfile"
+    res = client.get(url)
+    assert res["X-Sendfile"] == document.file.path
+    assert res["Content-Type"] == "application/pdf"
+
+
+def test_download_is_owner_only(document):
+    client = APIClient()
+    client.force_authenticate(User.objects.create_user(username="other", password="pass"))
+    assert client.get(f"/api/documents/{document.id}/download/").status_code == 404
+
+
+def test_download_of_a_document_without_checksum(client, document):
+    AssetDocument.objects.filter(pk=document.pk).update(sha256="")
+    res = client.get(f"/api/documents/{document.id}/download/")
+    assert "ETag" not in res
+    assert body(res) == CONTENT
+
+
+@pytest.mark.parametrize(
+    "header,expected",
+    [
+        (None, None),
+        ("bytes=-", None),
+        ("bytes=0-1,4-5", None),
+        ("items=0-1", None),
+        ("bytes=0-99", (0, 9)),
+        ("bytes=-99", (0, 9)),
+    ],
+)
+def test_parse_range(header, expected):
+    assert parse_range(header, 10) == expected
+
+
+@pytest.mark.parametrize(
+    "header,size", [("bytes=5-2", 10), ("bytes=10-", 10), ("bytes=-0", 10), ("bytes=-5", 0)]
+)
+def test_parse_range_unsatisfiable(header, size):
+    with pytest.raises(ValueError):
+        parse_range(header, size)
+
+
+def test_read_range_stops_at_end_of_file():
+    assert b"".join(read_range(io.BytesIO(b"abcdef"), 2, 20, 3)) == b"cdef"
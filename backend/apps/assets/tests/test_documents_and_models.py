@@ -35,7 +35,7 @@ def test_upload_document(client, user, asset):
     assert res.status_code == 201
     res = client.get("/api/documents/")
     assert res.status_code == 200
-    assert len(res.json()) == 1
+    assert len(res.json()["results"]) == 1
 
 
 def test_contract_is_active_property(asset):
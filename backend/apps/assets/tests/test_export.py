@@ -0,0 +1,106 @@
+import csv
+import io
+import json
+import pytest
+from datetime import date
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from rest_framework.test import APIClient
+from django.contrib.auth.models import User
+
+from apps.assets.models import Asset, MarketValue, Tenant, RentalContract
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture()
+def user():
+    return User.objects.create_user(username="exporter", password="pass")
+
+
+@pytest.fixture()
+def client(user):
+    client = APIClient()
+    client.force_authenticate(user)
+    return client
+
+
+@pytest.fixture()
+def portfolio(user):
+    asset = Asset.objects.create(owner=user, name="Flat, 1st floor")
+    for month in (1, 6, 12):
+        MarketValue.objects.create(asset=asset, date=date(2023, month, 1), value="1000.00")
+    tenant = Tenant.objects.create(asset=asset, full_name="Ann")
+    RentalContract.objects.create(
+        tenant=tenant, asset=asset, start_date=date(2020, 1, 1), end_date=date(2022, 12, 31), monthly_rent="1.00"
+    )
+    RentalContract.objects.create(tenant=tenant, asset=asset, start_date=date(2023, 1, 1), monthly_rent="2.00")
+    other = User.objects.create_user(username="else", password="pass")
+    foreign = Asset.objects.create(owner=other, name="Foreign")
+    MarketValue.objects.create(asset=foreign, date=date(2023, 1, 1), value="1.00")
+    return asset
+
+
+def body(res):
+    assert res.status_code == 200
+    return b"".join(res.streaming_content).decode()
+
+
+def test_csv_export_streams_own_rows(client, portfolio):
+    res = client.get("/api/export/values.csv?date_from=2023-02-01&date_to=2023-12-31")
+    assert res["Content-Type"] == "text/csv"
+    assert res["Content-Disposition"] == 'attachment; filename="values.csv"'
+    rows = list(csv.reader(io.StringIO(body(res))))
+    assert rows[0] == ["id", "asset_id", "date", "value"]
+    assert [r[2] for r in rows[1:]] == ["2023-06-01", "2023-12-01"]
+
+
+def test_ndjson_export(client, portfolio):
+    lines = body(client.get("/api/export/assets.ndjson")).splitlines()
+    assert [json.loads(line)["name"] for line in lines] == ["Flat, 1st floor"]
+    lines = body(client.get("/api/export/contracts.ndjson?date_from=2023-01-01")).splitlines()
+    assert [json.loads(line)["monthly_rent"] for line in lines] == ["2.00"]
+    lines = body(client.get("/api/export/assets.ndjson?date_from=2999-01-01&date_to=2999-01-02")).splitlines()
+    assert lines == []
+    lines = body(client.get("/api/export/contracts.ndjson?date_to=2021-01-01")).splitlines()
+    assert len(lines) == 1
+
+
+def test_staff_can_export_other_owners(portfolio):
+    staff = User.objects.create_user(username="auditor", password="pass", is_staff=True)
+    client = APIClient()
+    client.force_authenticate(staff)
+    assert len(body(client.get("/api/export/values.ndjson")).splitlines()) == 0
+    assert len(body(client.get(f"/api/export/values.ndjson?owner={portfolio.owner_id}")).splitlines()) == 3
+    assert len(body(client.get("/api/export/values.ndjson?owner=all")).splitlines()) == 4
+    for owner in ("", "0", "-1", "x"):
+        res = client.get("/api/export/values.ndjson", {"owner": owner})
+        assert res.status_code == 400, owner
+        assert "owner" in res.json()
+
+
+def test_export_rejects_unknown_resources_and_bad_dates(client, portfolio):
+    assert client.get("/api/export/users.csv").status_code == 404
+    assert client.get("/api/export/values.csv?date_from=soon").status_code == 400
+
+
+def test_export_command(portfolio, tmp_path):
+    out = io.StringIO()
+    call_command("export_portfolio", "tenants", "--owner", "exporter", stdout=out)
+    assert out.getvalue().splitlines() == ["id,asset_id,full_name,email,phone", f"{portfolio.tenants.get().id},{portfolio.id},Ann,,"]
+
+    target = tmp_path / "values.ndjson"
+    call_command(
+        "export_portfolio", "values", "--format", "ndjson", "--date-from", "2023-06-01", "--output", str(target)
+    )
+    assert len(target.read_text().splitlines()) == 2
+
+    with pytest.raises(CommandError):
+        call_command("export_portfolio", "values", "--owner", "nobody")
+
+
+def test_export_command_date_argument():
+    from apps.assets.management.commands.export_portfolio import date_arg
+
+    with pytest.raises(ValueError):
+        date_arg("2023-02-30x")
@@ -0,0 +1,59 @@
+import io
+import random
+import pytest
+from datetime import date, timedelta
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import CommandError
+
+from apps.assets.management.commands.generate_portfolio import tenancies
+from apps.assets.models import Asset, AssetSummary, MarketValue, RentalContract
+
+pytestmark = pytest.mark.django_db
+
+
+def run(*args):
+    out = io.StringIO()
+    call_command("generate_portfolio", *args, stdout=out)
+    return out.getvalue()
+
+
+def snapshot():
+    return list(
+        MarketValue.objects.order_by("asset__owner__username", "asset__name", "date").values_list(
+            "asset__owner__username", "asset__name", "date", "value"
+        )
+    )
+
+
+def test_generates_users_assets_and_history():
+    out = run("--users", "2", "--assets", "3", "--years", "2", "--step-days", "30")
+    assert User.objects.filter(username__startswith="bench-").count() == 2
+    assert Asset.objects.count() == 6
+    per_asset = 365 * 2 // 30 + 1
+    assert MarketValue.objects.count() == 6 * per_asset
+    assert RentalContract.objects.count() > 0
+    assert f"Generated 2 users, 6 assets, {6 * per_asset} values" in out
+    # summaries are built like any bulk change, so the portfolio reads are realistic
+    assert AssetSummary.objects.count() == 6
+    assert not User.objects.get(username="bench-0").has_usable_password()
+
+
+def test_same_seed_same_data_and_replace():
+    run("--users", "1", "--assets", "2", "--years", "1", "--step-days", "7", "--seed", "3")
+    first = snapshot()
+    with pytest.raises(CommandError, match="--replace"):
+        run("--users", "1")
+    run("--users", "1", "--assets", "2", "--years", "1", "--step-days", "7", "--seed", "3", "--replace")
+    assert snapshot() == first
+    run("--users", "1", "--assets", "2", "--years", "1", "--step-days", "7", "--seed", "4", "--replace")
+    assert snapshot() != first
+
+
+def test_tenancies_are_consecutive_and_last_is_open():
+    start, end = date(2000, 1, 1), date(2020, 1, 1)
+    spans = list(tenancies(random.Random(0), start, end))
+    assert spans[-1][1] is None
+    for (_, last), (first, _) in zip(spans, spans[1:]):
+        assert first > last
+    assert list(tenancies(random.Random(0), end + timedelta(days=91), end)) == []
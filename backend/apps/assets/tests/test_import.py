@@ -0,0 +1,162 @@
+import io
+import pytest
+from concurrent.futures import Future
+from datetime import date
+from decimal import Decimal
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.contrib.auth.models import User
+from django.db import DatabaseError
+
+from apps.assets.management.commands import import_portfolio
+from apps.assets.models import Asset, AssetSummary, MarketValue, Tenant, RentalContract
+
+pytestmark = pytest.mark.django_db
+
+
+class InlineExecutor:
+    """Runs submitted work immediately, standing in for the process pool."""
+
+    def __init__(self, max_workers, mp_context, initializer):
+        self.max_workers = max_workers
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def submit(self, fn, *args):
+        future = Future()
+        try:
+            future.set_result(fn(*args))
+        except Exception as exc:
+            future.set_exception(exc)
+        return future
+
+
+@pytest.fixture()
+def owner():
+    return User.objects.create_user(username="client", password="pass")
+
+
+@pytest.fixture()
+def asset(owner):
+    return Asset.objects.create(owner=owner, name="Loft")
+
+
+def write_csv(tmp_path, text):
+    path = tmp_path / "input.csv"
+    path.write_text(text)
+    return str(path)
+
+
+def run(*args):
+    out, err = io.StringIO(), io.StringIO()
+    call_command("import_portfolio", *args, stdout=out, stderr=err)
+    return out.getvalue(), err.getvalue()
+
+
+def test_import_values_upserts_and_reports_errors(tmp_path, owner, asset):
+    foreign = Asset.objects.create(owner=User.objects.create_user(username="x", password="p"), name="F")
+    MarketValue.objects.create(asset=asset, date=date(2020, 1, 1), value="1.00")
+    path = write_csv(
+        tmp_path,
+        "asset,date,value\n"
+        f"Loft,2020-01-01,100.00\n"
+        f"{asset.id},2020-02-01,200.00\n"
+        f"{asset.id},2020-02-01,250.00\n"
+        f"{foreign.id},2020-02-01,1.00\n"
+        "Loft,2020-02-30,1.00\n"
+        "Loft,2020-03-01,NaN\n"
+        "Loft,2020-03-02,n/a\n",
+    )
+    out, err = run("values", path, "--owner", "client", "--chunk-size", "2")
+    assert "Imported 3 values rows (4 skipped)" in out
+    assert "rows/s" in out
+    assert err.splitlines() == [
+        f"line 5: unknown asset '{foreign.id}'",
+        "line 6: invalid date '2020-02-30'",
+        "line 7: invalid value 'NaN'",
+        "line 8: invalid value 'n/a'",
+    ]
+    assert dict(MarketValue.objects.filter(asset=asset).values_list("date", "value")) == {
+        date(2020, 1, 1): Decimal("100.00"),
+        date(2020, 2, 1): Decimal("250.00"),
+    }
+    assert AssetSummary.objects.get(asset=asset).latest_value == Decimal("250.00")
+
+
+def test_import_contracts_creates_missing_tenants(tmp_path, owner, asset):
+    existing = Tenant.objects.create(asset=asset, full_name="Known")
+    path = write_csv(
+        tmp_path,
+        "asset_id,tenant,start_date,end_date,monthly_rent,deposit,notes\n"
+        f"{asset.id},{existing.id},2020-01-01,2020-12-31,500.00,,\n"
+        f"{asset.id},New Person,2021-01-01,,600.00,1200.00,renewed\n"
+        f"{asset.id},New Person,2022-01-01,,650.00,1200.00,\n"
+        f"{asset.id},,2022-01-01,,650.00,,\n",
+    )
+    out, err = run("contracts", path, "--owner", "client", "--chunk-size", "1")
+    assert "Imported 3 contracts rows (1 skipped)" in out
+    assert err.strip() == "line 5: missing tenant"
+    assert Tenant.objects.filter(asset=asset).count() == 2
+    newcomer = Tenant.objects.get(full_name="New Person")
+    assert RentalContract.objects.filter(tenant=newcomer).count() == 2
+    assert RentalContract.objects.get(notes="renewed").deposit == Decimal("1200.00")
+
+
+def test_import_contracts_rejects_tenants_of_other_assets(tmp_path, owner, asset):
+    shed = Asset.objects.create(owner=owner, name="Shed")
+    elsewhere = Tenant.objects.create(asset=shed, full_name="Elsewhere")
+    path = write_csv(
+        tmp_path,
+        "asset,tenant,start_date,end_date,monthly_rent,deposit,notes\n"
+        f"Loft,{elsewhere.id},2020-01-01,,500.00,,\n"
+        f"Shed,{elsewhere.id},2020-01-01,,500.00,,\n",
+    )
+    out, err = run("contracts", path, "--owner", "client")
+    assert "Imported 1 contracts rows (1 skipped)" in out
+    assert err.strip() == f"line 2: tenant '{elsewhere.id}' is not a tenant of asset 'Loft'"
+    assert list(RentalContract.objects.values_list("asset_id", flat=True)) == [shed.id]
+
+
+def test_import_in_parallel(tmp_path, owner, asset, monkeypatch):
+    monkeypatch.setattr(import_portfolio, "executor_class", InlineExecutor)
+    rows = "".join(f"Loft,2020-01-{day:02d},{day}.00\n" for day in range(1, 29))
+    path = write_csv(tmp_path, "asset,date,value\n" + rows)
+    out, _ = run("values", path, "--owner", "client", "--chunk-size", "3", "--workers", "2")
+    assert "Imported 28 values rows" in out
+    assert MarketValue.objects.filter(asset=asset).count() == 28
+
+
+@pytest.mark.parametrize("workers", ["1", "2"])
+def test_failed_chunk_leaves_no_tenants_and_keeps_the_committed_ones(
+    tmp_path, owner, asset, monkeypatch, workers
+):
+    monkeypatch.setattr(import_portfolio, "executor_class", InlineExecutor)
+    bulk_create = RentalContract.objects.bulk_create
+
+    def failing(contracts, **kwargs):
+        if any(contract.notes == "fails" for contract in contracts):
+            raise DatabaseError("constraint violated")
+        return bulk_create(contracts, **kwargs)
+
+    monkeypatch.setattr(RentalContract.objects, "bulk_create", failing)
+    path = write_csv(
+        tmp_path,
+        "asset,tenant,start_date,end_date,monthly_rent,deposit,notes\n"
+        "Loft,First,2020-01-01,,500.00,,\n"
+        "Loft,Second,2020-01-01,,600.00,,fails\n",
+    )
+    with pytest.raises(DatabaseError):
+        run("contracts", path, "--owner", "client", "--chunk-size", "1", "--workers", workers)
+    assert list(Tenant.objects.values_list("full_name", flat=True)) == ["First"]
+    assert RentalContract.objects.get().monthly_rent == Decimal("500.00")
+    # the first chunk's asset was still brought up to date
+    assert AssetSummary.objects.get(asset=asset).is_occupied
+
+
+def test_import_unknown_owner(tmp_path):
+    with pytest.raises(CommandError):
+        run("values", write_csv(tmp_path, "asset,date,value\n"), "--owner", "ghost")
@@ -0,0 +1,314 @@
+import io
+import pytest
+from concurrent.futures import Future
+from datetime import timedelta
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import DatabaseError, connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from PIL import Image
+from rest_framework.test import APIClient
+
+from apps.assets import jobs, processing
+from apps.assets.management.commands import run_workers
+from apps.assets.models import Asset, AssetDocument, Job
+
+pytestmark = pytest.mark.django_db
+
+
+def pdf(text):
+    """A one-page PDF showing ``text``."""
+    stream = f"BT /F1 12 Tf 72 720 Td ({text}) Tj ET"
+    objects = [
+        "<< /Type /Catalog /Pages 2 0 R >>",
+        "<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        "<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents 4 0 R "
+        "/Resources << /Font << /F1 5 0 R >> >> >>",
+        f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream",
+        "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    out = "%PDF-1.4\n"
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n{body}\nendobj\n"
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n"
+    out += "".join(f"{offset:010d} 00000 n \n" for offset in offsets)
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n"
+    return out.encode()
+
+
+def png(size=(800, 600)):
+    output = io.BytesIO()
+    Image.new("RGB", size, "teal").save(output, "PNG")
+    return output.getvalue()
+
+
+class InlineExecutor:
+    """Runs submitted work immediately, standing in for the process pool."""
+
+    def __init__(self, max_workers, mp_context, initializer):
+        self.max_workers = max_workers
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def submit(self, fn, *args):
+        future = Future()
+        future.set_result(fn(*args))
+        return future
+
+
+@pytest.fixture(autouse=True)
+def media(settings, tmp_path):
+    settings.MEDIA_ROOT = tmp_path
+    return tmp_path
+
+
+@pytest.fixture()
+def user():
+    return User.objects.create_user(username="worker", password="pass")
+
+
+@pytest.fixture()
+def client(user):
+    client = APIClient()
+    client.force_authenticate(user)
+    return client
+
+
+@pytest.fixture()
+def asset(user):
+    return Asset.objects.create(owner=user, name="Archive")
+
+
+def upload(client, asset, name, content):
+    file = SimpleUploadedFile(name, content)
+    res = client.post("/api/documents/", {"asset": asset.id, "file": file}, format="multipart")
+    assert res.status_code == 201
+    return res.json()
+
+
+def run_jobs(*args):
+    out = io.StringIO()
+    call_command("run_workers", "--once", "--processes", "1", *args, stdout=out)
+    return out.getvalue()
+
+
+def fetch(client, document):
+    return client.get(f"/api/documents/{document['id']}/").json()
+
+
+def test_upload_queues_processing(client, asset):
+    document = upload(client, asset, "notes.txt", b"boiler serviced")
+    assert document["processing_status"] == "pending"
+    job = Job.objects.get()
+    assert (job.kind, job.status) == ("process_document", Job.QUEUED)
+    assert job.payload == {"document_id": document["id"], "sha256": document["sha256"]}
+    assert "Ran 1 jobs" in run_jobs()
+    document = fetch(client, document)
+    assert document["processing_status"] == "ready"
+    assert document["processing_error"] == ""
+    assert AssetDocument.objects.get().text == "boiler serviced"
+    assert Job.objects.get().status == Job.DONE
+
+
+def test_upload_and_its_job_commit_together(monkeypatch, client, asset):
+    def unavailable(kind, **payload):
+        raise DatabaseError("job queue unavailable")
+
+    monkeypatch.setattr("apps.assets.signals.enqueue", unavailable)
+    file = SimpleUploadedFile("notes.txt", b"boiler serviced")
+    with pytest.raises(DatabaseError):
+        client.post("/api/documents/", {"asset": asset.id, "file": file}, format="multipart")
+    # no document is left that nothing would ever process
+    assert not AssetDocument.objects.exists()
+
+
+def test_upload_cost_does_not_depend_on_the_steps(client, asset, settings):
+    counts = []
+    for size, steps in (((800, 600), []), ((600, 800), ["verify", "text", "thumbnail"])):
+        settings.DOCUMENT_PROCESSING = steps
+        with CaptureQueriesContext(connection) as ctx:
+            upload(client, asset, "scan.png", png(size))
+        counts.append(len(ctx.captured_queries))
+    assert counts[0] == counts[1]
+
+
+def test_pdf_text_and_image_thumbnail(client, asset, media):
+    scan = upload(client, asset, "scan.png", png())
+    lease = upload(client, asset, "lease.pdf", pdf("Lease of the ground floor"))
+    other = upload(client, asset, "model.bin", b"\x00\x01")
+    assert "Ran 3 jobs" in run_jobs()
+    assert "Lease of the ground floor" in AssetDocument.objects.get(pk=lease["id"]).text
+    scan = fetch(client, scan)
+    assert scan["thumbnail"].endswith(f"/thumbnails/{scan['id']}.jpg")
+    with Image.open(media / "thumbnails" / f"{scan['id']}.jpg") as thumbnail:
+        assert max(thumbnail.size) == 256
+    other = AssetDocument.objects.get(pk=other["id"])
+    assert (other.processing_status, other.text, other.thumbnail.name) == ("ready", "", "")
+
+
+def test_a_new_file_replaces_the_thumbnail(client, asset, media):
+    scan = upload(client, asset, "scan.png", png())
+    run_jobs()
+    replacement = SimpleUploadedFile("scan.txt", b"now text")
+    client.patch(f"/api/documents/{scan['id']}/", {"file": replacement}, format="multipart")
+    assert fetch(client, scan)["processing_status"] == "pending"
+    run_jobs()
+    document = AssetDocument.objects.get()
+    assert (document.text, document.thumbnail.name) == ("now text", "")
+    assert not (media / "thumbnails" / f"{scan['id']}.jpg").exists()
+
+
+def test_deleting_a_document_deletes_its_thumbnail(client, asset, media):
+    scan = upload(client, asset, "scan.png", png())
+    run_jobs()
+    client.delete(f"/api/documents/{scan['id']}/")
+    assert not (media / "thumbnails" / f"{scan['id']}.jpg").exists()
+
+
+def test_jobs_for_deleted_or_replaced_files_do_nothing(client, asset):
+    gone = upload(client, asset, "gone.txt", b"gone")
+    kept = upload(client, asset, "kept.txt", b"first")
+    client.delete(f"/api/documents/{gone['id']}/")
+    client.patch(
+        f"/api/documents/{kept['id']}/", {"file": SimpleUploadedFile("kept.txt", b"second")}, format="multipart"
+    )
+    assert "Ran 3 jobs" in run_jobs()
+    assert AssetDocument.objects.get().text == "second"
+    assert set(Job.objects.values_list("status", flat=True)) == {Job.DONE}
+
+
+def test_results_for_a_file_replaced_while_processing_are_dropped(client, asset, monkeypatch):
+    upload(client, asset, "notes.txt", b"old")
+
+    def replaced(document, results):
+        results["text"] = "old"
+        AssetDocument.objects.filter(pk=document.pk).update(sha256="0" * 64, processing_status="pending")
+
+    monkeypatch.setitem(processing.STEPS, "text", replaced)
+    run_jobs()
+    document = AssetDocument.objects.get()
+    assert (document.processing_status, document.text) == ("pending", "")
+
+
+@pytest.mark.parametrize(
+    "name,content,error",
+    [
+        ("scan.png", b"not an image", "Unreadable image"),
+        ("lease.pdf", b"not a pdf", "Unreadable PDF"),
+    ],
+)
+def test_unreadable_files_fail_without_retrying(client, asset, name, content, error):
+    document = upload(client, asset, name, content)
+    run_jobs()
+    document = fetch(client, document)
+    assert document["processing_status"] == "failed"
+    assert document["processing_error"].startswith(error)
+    job = Job.objects.get()
+    assert (job.status, job.attempts) == (Job.FAILED, 1)
+    assert error in job.last_error
+
+
+def test_checksum_mismatch_fails(client, asset, media):
+    document = upload(client, asset, "notes.txt", b"original")
+    (media / AssetDocument.objects.get().file.name).write_bytes(b"tampered")
+    run_jobs()
+    assert fetch(client, document)["processing_error"].startswith("Stored file doesn't match")
+
+
+def test_transient_failures_are_retried_with_backoff(client, asset, settings, monkeypatch):
+    settings.JOB_MAX_ATTEMPTS = 2
+    document = upload(client, asset, "notes.txt", b"notes")
+    failures = []
+
+    def flaky(document, results):
+        failures.append(document.pk)
+        raise RuntimeError("storage hiccup")
+
+    monkeypatch.setitem(processing.STEPS, "text", flaky)
+    before = timezone.now()
+    assert "Ran 1 jobs" in run_jobs()
+    job = Job.objects.get()
+    assert (job.status, job.attempts) == (Job.QUEUED, 1)
+    assert job.run_after >= before + timedelta(seconds=settings.JOB_RETRY_BACKOFF)
+    assert fetch(client, document)["processing_status"] == "pending"
+    assert fetch(client, document)["processing_error"] == "storage hiccup"
+    # not due yet
+    assert "Ran 0 jobs" in run_jobs()
+    Job.objects.update(run_after=timezone.now())
+    run_jobs()
+    job.refresh_from_db()
+    assert (job.status, job.attempts) == (Job.FAILED, 2)
+    assert fetch(client, document)["processing_status"] == "failed"
+    assert len(failures) == 2
+
+
+def test_backoff_doubles(settings):
+    settings.JOB_RETRY_BACKOFF = 10
+    assert [jobs.backoff(n).total_seconds() for n in (1, 2, 3)] == [10, 20, 40]
+
+
+def test_jobs_of_dead_workers_are_taken_over(client, asset, settings):
+    settings.JOB_MAX_ATTEMPTS = 2
+    upload(client, asset, "notes.txt", b"notes")
+    stale = timezone.now() - timedelta(seconds=settings.JOB_LEASE_SECONDS + 1)
+    Job.objects.update(status=Job.RUNNING, locked_by="gone:1:0", locked_at=stale, attempts=1)
+    run_jobs()
+    assert Job.objects.get().status == Job.DONE
+    assert AssetDocument.objects.get().processing_status == "ready"
+    # a job whose worker died on its last attempt isn't run again
+    upload(client, asset, "other.txt", b"other")
+    Job.objects.filter(status=Job.QUEUED).update(status=Job.RUNNING, locked_at=stale, attempts=2)
+    run_jobs()
+    job = Job.objects.latest("id")
+    assert (job.status, job.last_error) == (Job.FAILED, "Lease expired on the last attempt")
+    assert AssetDocument.objects.latest("id").processing_status == "failed"
+
+
+def test_give_up_without_hook(settings):
+    settings.JOB_MAX_ATTEMPTS = 1
+    calls = []
+
+    def boom():
+        calls.append(1)
+        raise RuntimeError("boom")
+
+    jobs.handler("test.boom")(boom)
+    try:
+        jobs.enqueue("test.boom")
+        assert "Ran 1 jobs" in run_jobs()
+    finally:
+        del jobs.HANDLERS["test.boom"]
+    assert Job.objects.get().status == Job.FAILED
+    assert processing.processing_failed(document_id=0, sha256="") is None
+
+
+def test_pool_of_workers(client, asset, monkeypatch):
+    monkeypatch.setattr(run_workers, "executor_class", InlineExecutor)
+    for n in range(3):
+        upload(client, asset, f"{n}.txt", str(n).encode())
+    out = io.StringIO()
+    call_command("run_workers", "--once", "--processes", "2", "--batch", "1", stdout=out)
+    assert "Ran 3 jobs" in out.getvalue()
+    assert set(AssetDocument.objects.values_list("processing_status", flat=True)) == {"ready"}
+
+
+def test_idle_workers_poll(monkeypatch):
+    class Stop(Exception):
+        pass
+
+    def sleep(seconds):
+        assert seconds == 0.5
+        raise Stop
+
+    monkeypatch.setattr(jobs.time, "sleep", sleep)
+    with pytest.raises(Stop):
+        jobs.work(poll_interval=0.5)
@@ -17,7 +17,7 @@ def test_asset_str():
 def test_isowner_false_branch():
     user = User.objects.create_user(username="u", password="pass")
     other = User.objects.create_user(username="o", password="pass")
-    obj = SimpleNamespace(owner=other)
+    obj = SimpleNamespace(owner_id=other.pk)
     perm = IsOwner()
     req = SimpleNamespace(user=user)
     assert perm.has_object_permission(req, None, obj) is False
@@ -0,0 +1,182 @@
+from datetime import date, timedelta
+
+import pytest
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from apps.assets.models import Asset, RentalContract, Tenant
+from apps.assets.occupancy import occupied_spells, periods
+
+pytestmark = pytest.mark.django_db
+
+ADMIN_URL = "/api/admin/overview/occupancy/"
+WINDOW = {"date_from": "2026-01-15", "date_to": "2026-03-05"}
+
+
+@pytest.fixture()
+def user():
+    return User.objects.create_user(username="occupancy", password="pass")
+
+
+def client_for(user):
+    client = APIClient()
+    client.force_authenticate(user)
+    return client
+
+
+def contract(asset, start, end):
+    tenant = Tenant.objects.create(asset=asset, full_name="T")
+    return RentalContract.objects.create(
+        asset=asset, tenant=tenant, start_date=start, end_date=end, monthly_rent="100.00"
+    )
+
+
+@pytest.fixture()
+def flat(user):
+    flat = Asset.objects.create(owner=user, name="Flat")
+    # long over, and not yet started: neither is loaded
+    contract(flat, date(2024, 1, 1), date(2024, 12, 31))
+    contract(flat, date(2026, 5, 1), None)
+    # from before the window, then back to back, with another inside the second
+    contract(flat, date(2025, 6, 1), date(2026, 1, 10))
+    contract(flat, date(2026, 1, 11), date(2026, 1, 31))
+    contract(flat, date(2026, 1, 20), date(2026, 1, 25))
+    # vacant for half of February and part of March, then let for good
+    contract(flat, date(2026, 2, 15), date(2026, 3, 10))
+    contract(flat, date(2026, 3, 20), None)
+    return flat
+
+
+def test_asset_occupancy(user, flat):
+    with CaptureQueriesContext(connection) as ctx:
+        res = client_for(user).get(f"/api/assets/{flat.pk}/occupancy/", WINDOW)
+    assert res.status_code == 200
+    # the response cache's version of the asset, the asset and its contracts
+    assert len(ctx.captured_queries) == 3
+    data = res.json()
+    # widened to whole months
+    assert (data["date_from"], data["date_to"], data["period"]) == ("2026-01-01", "2026-03-31", "month")
+    assert data["timeline"] == [
+        {"start": "2026-01-01", "end": "2026-01-31", "occupied": True},
+        {"start": "2026-02-01", "end": "2026-02-14", "occupied": False},
+        {"start": "2026-02-15", "end": "2026-03-10", "occupied": True},
+        {"start": "2026-03-11", "end": "2026-03-19", "occupied": False},
+        {"start": "2026-03-20", "end": "2026-03-31", "occupied": True},
+    ]
+    assert data["periods"] == [
+        {"start": "2026-01-01", "end": "2026-01-31", "vacant_days": 0, "occupancy_rate": 1.0},
+        {"start": "2026-02-01", "end": "2026-02-28", "vacant_days": 14, "occupancy_rate": 0.5},
+        {"start": "2026-03-01", "end": "2026-03-31", "vacant_days": 9, "occupancy_rate": 0.7097},
+    ]
+    # 67 days out of 90
+    assert data["occupancy_rate"] == 0.7444
+
+
+def test_asset_occupancy_per_quarter(user, flat):
+    res = client_for(user).get(f"/api/assets/{flat.pk}/occupancy/", {**WINDOW, "period": "quarter"})
+    assert res.json()["periods"] == [
+        {"start": "2026-01-01", "end": "2026-03-31", "vacant_days": 23, "occupancy_rate": 0.7444},
+    ]
+
+
+def test_vacant_asset_by_default(user):
+    empty = Asset.objects.create(owner=user, name="Empty")
+    data = client_for(user).get(f"/api/assets/{empty.pk}/occupancy/").json()
+    today = date.today()
+    assert data["date_from"] == (today - timedelta(days=364)).replace(day=1).isoformat()
+    assert data["date_to"] >= today.isoformat()
+    assert data["occupancy_rate"] == 0.0
+    assert data["timeline"] == [{"start": data["date_from"], "end": data["date_to"], "occupied": False}]
+    assert len(data["periods"]) in (12, 13)
+
+
+def test_asset_occupancy_errors(user, flat):
+    client = client_for(user)
+    url = f"/api/assets/{flat.pk}/occupancy/"
+    for params in ({"date_from": "2026-02-01", "date_to": "2026-01-31"}, {"date_to": "x"}, {"period": "x"}):
+        assert client.get(url, params).status_code == 400, params
+    other = User.objects.create_user(username="other")
+    assert client_for(other).get(url).status_code == 404
+
+
+def test_portfolio_occupancy(user, flat):
+    shop = Asset.objects.create(owner=User.objects.create_user(username="other"), name="Shop")
+    contract(shop, date(2026, 2, 1), date(2026, 2, 28))
+    Asset.objects.create(owner=user, name="Empty")
+    staff = User.objects.create_user(username="staff", is_staff=True)
+    with CaptureQueriesContext(connection) as ctx:
+        res = client_for(staff).get(ADMIN_URL, WINDOW)
+    assert res.status_code == 200
+    # the asset count and every contract, one query each
+    assert len(ctx.captured_queries) == 2
+    data = res.json()
+    assert data["assets"] == 3
+    assert data["periods"] == [
+        {"start": "2026-01-01", "end": "2026-01-31", "vacant_days": 62, "occupancy_rate": 0.3333},
+        {"start": "2026-02-01", "end": "2026-02-28", "vacant_days": 42, "occupancy_rate": 0.5},
+        {"start": "2026-03-01", "end": "2026-03-31", "vacant_days": 71, "occupancy_rate": 0.2366},
+    ]
+    # 95 asset-days out of 270
+    assert data["occupancy_rate"] == 0.3519
+    assert client_for(user).get(ADMIN_URL).status_code == 403
+
+
+def test_portfolio_occupancy_without_assets():
+    staff = User.objects.create_user(username="staff", is_staff=True)
+    data = client_for(staff).get(ADMIN_URL, {**WINDOW, "period": "year"}).json()
+    assert data["assets"] == 0
+    assert data["occupancy_rate"] is None
+    assert data["periods"] == [
+        {"start": "2026-01-01", "end": "2026-12-31", "vacant_days": 0, "occupancy_rate": None},
+    ]
+
+
+def test_occupied_spells():
+    first, last = date(2026, 1, 1), date(2026, 1, 31)
+    contracts = [
+        (1, date(2026, 1, 1), date(2026, 1, 5)),
+        # outside the window
+        (1, date(2026, 3, 1), None),
+        (2, date(2025, 1, 1), date(2025, 12, 31)),
+        # a day apart from the first, then a day after its end: two spells
+        (2, date(2026, 1, 2), date(2026, 1, 3)),
+        (2, date(2026, 1, 5), None),
+    ]
+    assert list(occupied_spells(contracts, first, last)) == [
+        (1, date(2026, 1, 1), date(2026, 1, 5)),
+        (2, date(2026, 1, 2), date(2026, 1, 3)),
+        (2, date(2026, 1, 5), date(2026, 1, 31)),
+    ]
+    assert periods(date(2026, 5, 20), date(2026, 8, 1), "quarter") == [
+        (date(2026, 4, 1), date(2026, 6, 30)),
+        (date(2026, 7, 1), date(2026, 9, 30)),
+    ]
+
+
+@pytest.mark.parametrize(
+    "params, field",
+    [
+        ({"date_to": "9999-12-31", "period": "year"}, "date_to"),
+        ({"date_from": "9999-01-01", "date_to": "9999-01-31"}, "date_from"),
+        ({"date_to": "0001-06-30"}, "date_to"),
+        ({"date_from": "2016-12-31", "date_to": "2026-01-01"}, "date_from"),
+    ],
+)
+def test_occupancy_window_is_bounded(user, flat, params, field):
+    staff = User.objects.create_user(username="staff", is_staff=True)
+    for client, url in ((client_for(user), f"/api/assets/{flat.pk}/occupancy/"), (client_for(staff), ADMIN_URL)):
+        res = client.get(url, params)
+        assert res.status_code == 400, (url, params)
+        assert list(res.json()) == [field]
+
+
+def test_occupancy_window_edges(user, flat):
+    client = client_for(user)
+    url = f"/api/assets/{flat.pk}/occupancy/"
+    res = client.get(url, {"date_from": "9989-01-01", "date_to": "9998-12-31", "period": "year"})
+    assert res.status_code == 200
+    assert len(res.json()["periods"]) == 10
+    res = client.get(url, {"date_to": "0002-01-01", "period": "year"})
+    assert res.json()["date_from"] == "0001-01-01"
@@ -0,0 +1,114 @@
+import pytest
+from base64 import b64encode
+from datetime import date, timedelta
+from rest_framework.test import APIClient
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.exceptions import ImproperlyConfigured
+from rest_framework.request import Request
+
+from apps.assets.models import Asset, MarketValue, Tenant, RentalContract
+from apps.assets.pagination import KeysetPagination, TenantPagination
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture()
+def client():
+    return APIClient()
+
+
+@pytest.fixture()
+def user():
+    return User.objects.create_user(username="pager", password="pass")
+
+
+@pytest.fixture()
+def asset(user):
+    return Asset.objects.create(owner=user, name="Paged")
+
+
+def relative(link):
+    # links are absolute and carry the proxy prefix the test client does not expect
+    return link and link.split(settings.FORCE_SCRIPT_NAME or "testserver", 1)[1]
+
+
+def collect(client, url, page_size=2):
+    rows = []
+    while url:
+        res = client.get(url)
+        assert res.status_code == 200
+        body = res.json()
+        assert len(body["results"]) <= page_size
+        rows.extend(body["results"])
+        url = relative(body["next"])
+    return rows
+
+
+def test_values_are_paginated_by_date_then_id(client, user, asset):
+    client.force_authenticate(user)
+    today = date.today()
+    for i in range(5):
+        MarketValue.objects.create(asset=asset, date=today - timedelta(days=i), value="1.00")
+    rows = collect(client, "/api/values/?page_size=2")
+    assert [r["date"] for r in rows] == [(today - timedelta(days=i)).isoformat() for i in range(5)]
+
+
+def test_contract_pages_are_stable_with_duplicate_start_dates(client, user, asset):
+    client.force_authenticate(user)
+    tenant = Tenant.objects.create(asset=asset, full_name="T")
+    ids = [
+        RentalContract.objects.create(
+            tenant=tenant, asset=asset, start_date=date(2024, 1, 1), monthly_rent="1.00"
+        ).id
+        for _ in range(5)
+    ]
+    rows = collect(client, "/api/contracts/?page_size=2")
+    assert [r["id"] for r in rows] == sorted(ids)
+
+
+def test_page_size_is_capped(client, user, asset):
+    client.force_authenticate(user)
+    cap = TenantPagination.max_page_size
+    Tenant.objects.bulk_create([Tenant(asset=asset, full_name=f"T{i}") for i in range(cap + 1)])
+    res = client.get("/api/tenants/?page_size=100000")
+    assert res.status_code == 200
+    assert len(res.json()["results"]) == cap
+    assert res.json()["next"] is not None
+
+
+def test_more_ties_than_an_offset_could_skip(client, user):
+    client.force_authenticate(user)
+    assets = Asset.objects.bulk_create([Asset(owner=user, name=f"A{i}") for i in range(1300)])
+    day = date(2024, 1, 1)
+    MarketValue.objects.bulk_create([MarketValue(asset=asset, date=day, value="1.00") for asset in assets])
+    ids = sorted(MarketValue.objects.values_list("id", flat=True))
+    rows = collect(client, "/api/values/?page_size=500", page_size=500)
+    assert [row["id"] for row in rows] == ids
+    # and back again from the second page
+    second = client.get(relative(client.get("/api/values/?page_size=500").json()["next"])).json()
+    assert [row["id"] for row in second["results"]] == ids[500:1000]
+    first = client.get(relative(second["previous"])).json()
+    assert [row["id"] for row in first["results"]] == ids[:500]
+    assert first["previous"] is None
+    assert relative(first["next"]) == relative(client.get("/api/values/?page_size=500").json()["next"])
+
+
+def test_invalid_cursors(client, user, asset):
+    client.force_authenticate(user)
+    MarketValue.objects.create(asset=asset, date=date(2024, 1, 1), value="1.00")
+    for raw in ("!!", "p=soon&p=1", "p=2024-01-01", "r=1", "p=2024-01-01&p=1&r=x"):
+        cursor = raw if raw == "!!" else b64encode(raw.encode()).decode()
+        assert client.get("/api/values/", {"cursor": cursor}).status_code == 404, raw
+    # past the end: an empty page, without links
+    past = b64encode(b"p=2000-01-01&p=1").decode()
+    body = client.get("/api/values/", {"cursor": past}).json()
+    assert body == {"next": None, "previous": None, "results": []}
+
+
+def test_ordering_must_end_in_a_unique_field(rf):
+    class ByDate(KeysetPagination):
+        ordering = ("-date",)
+
+    with pytest.raises(ImproperlyConfigured):
+        ByDate().paginate_queryset(MarketValue.objects.all(), Request(rf.get("/")))
@@ -0,0 +1,75 @@
+import pytest
+from datetime import date, timedelta
+from rest_framework.test import APIClient
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from apps.assets.models import Asset, MarketValue, Tenant, RentalContract
+
+pytestmark = pytest.mark.django_db
+
+TODAY = date.today()
+
+
+@pytest.fixture()
+def client(user):
+    client = APIClient()
+    client.force_authenticate(user)
+    return client
+
+
+@pytest.fixture()
+def user():
+    return User.objects.create_user(username="perf", password="pass")
+
+
+@pytest.fixture()
+def asset(user):
+    asset = Asset.objects.create(owner=user, name="Perf")
+    tenant = Tenant.objects.create(asset=asset, full_name="T")
+    MarketValue.objects.create(asset=asset, date=TODAY - timedelta(days=400), value="50000.00")
+    MarketValue.objects.create(asset=asset, date=TODAY, value="100000.00")
+    # expired: only counted for historical dates
+    RentalContract.objects.create(
+        tenant=tenant,
+        asset=asset,
+        start_date=TODAY - timedelta(days=500),
+        end_date=TODAY - timedelta(days=100),
+        monthly_rent="500.00",
+    )
+    RentalContract.objects.create(
+        tenant=tenant, asset=asset, start_date=TODAY - timedelta(days=50), monthly_rent="1000.00"
+    )
+    return asset
+
+
+def test_expired_contracts_are_ignored(client, asset):
+    body = client.get(f"/api/assets/{asset.id}/performance/").json()
+    assert body == {"annual_income": 12000.0, "market_value": 100000.0, "performance": 0.12}
+
+
+def test_historical_performance(client, asset):
+    as_of = (TODAY - timedelta(days=200)).isoformat()
+    body = client.get(f"/api/assets/{asset.id}/performance/?as_of={as_of}").json()
+    assert body == {"annual_income": 6000.0, "market_value": 50000.0, "performance": 0.12}
+
+
+def test_performance_without_market_value(client, user):
+    asset = Asset.objects.create(owner=user, name="Empty")
+    body = client.get(f"/api/assets/{asset.id}/performance/").json()
+    assert body == {"annual_income": 0.0, "market_value": 0.0, "performance": 0.0}
+
+
+@pytest.mark.parametrize("raw", ["yesterday", "2024-13-40"])
+def test_invalid_as_of(client, asset, raw):
+    res = client.get(f"/api/assets/{asset.id}/performance/?as_of={raw}")
+    assert res.status_code == 400
+    assert "as_of" in res.json()
+
+
+def test_performance_uses_a_single_asset_query(client, asset):
+    with CaptureQueriesContext(connection) as ctx:
+        client.get(f"/api/assets/{asset.id}/performance/")
+    # the response cache's version aggregate, then the annotated asset
+    assert sum("assets_asset" in q["sql"] for q in ctx.captured_queries) == 2
@@ -0,0 +1,100 @@
+import pytest
+from datetime import date, timedelta
+from rest_framework.test import APIClient
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from apps.assets.models import Asset, MarketValue, Tenant, RentalContract
+
+pytestmark = pytest.mark.django_db
+
+TODAY = date.today()
+
+
+@pytest.fixture()
+def user():
+    return User.objects.create_user(username="portfolio", password="pass")
+
+
+@pytest.fixture()
+def client(user):
+    client = APIClient()
+    client.force_authenticate(user)
+    return client
+
+
+def make_asset(owner, name, value, rent):
+    asset = Asset.objects.create(owner=owner, name=name)
+    MarketValue.objects.create(asset=asset, date=TODAY, value=value)
+    tenant = Tenant.objects.create(asset=asset, full_name="T")
+    RentalContract.objects.create(
+        tenant=tenant, asset=asset, start_date=TODAY - timedelta(days=1), monthly_rent=rent
+    )
+    return asset
+
+
+@pytest.fixture()
+def assets(user):
+    return [
+        make_asset(user, "Low", "100000.00", "250.00"),  # 3%
+        make_asset(user, "High", "100000.00", "1000.00"),  # 12%
+        make_asset(user, "Mid", "100000.00", "500.00"),  # 6%
+    ]
+
+
+def names(res):
+    assert res.status_code == 200
+    return [row["name"] for row in res.json()["results"]]
+
+
+def test_portfolio_performance_defaults_to_best_yield_first(client, assets):
+    res = client.get("/api/assets/performance/")
+    assert names(res) == ["High", "Mid", "Low"]
+    assert res.json()["results"][0] == {
+        "id": assets[1].id,
+        "name": "High",
+        "annual_income": 12000.0,
+        "market_value": 100000.0,
+        "performance": 0.12,
+    }
+
+
+def test_portfolio_performance_filter_and_ordering(client, assets):
+    res = client.get("/api/assets/performance/?min_performance=0.05&max_performance=0.1&ordering=name")
+    assert names(res) == ["Mid"]
+    res = client.get("/api/assets/performance/?ordering=performance")
+    assert names(res) == ["Low", "Mid", "High"]
+
+
+def test_portfolio_performance_only_lists_own_assets(client, assets):
+    other = User.objects.create_user(username="someone", password="pass")
+    make_asset(other, "Foreign", "1.00", "1.00")
+    assert "Foreign" not in names(client.get("/api/assets/performance/"))
+
+
+@pytest.mark.parametrize(
+    "query, field",
+    [
+        ("min_performance=abc", "min_performance"),
+        ("ordering=owner", "ordering"),
+        ("ordering=--performance", "ordering"),
+        ("ordering=-", "ordering"),
+    ],
+)
+def test_portfolio_performance_rejects_bad_params(client, assets, query, field):
+    res = client.get(f"/api/assets/performance/?{query}")
+    assert res.status_code == 400
+    assert field in res.json()
+
+
+def test_portfolio_performance_query_count_is_fixed(client, user, assets):
+    with CaptureQueriesContext(connection) as ctx:
+        client.get("/api/assets/performance/")
+    small = len(ctx.captured_queries)
+    for i in range(10):
+        make_asset(user, f"Extra{i}", "1000.00", "10.00")
+    with CaptureQueriesContext(connection) as ctx:
+        client.get("/api/assets/performance/")
+    # the response cache's version aggregate and the annotated assets
+    assert len(ctx.captured_queries) == small == 2
@@ -0,0 +1,179 @@
+import pytest
+from datetime import date, timedelta
+from rest_framework.test import APIClient
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from apps.assets.models import Asset, AssetDocument, MarketValue, Tenant, RentalContract
+
+pytestmark = pytest.mark.django_db
+
+EXPAND = "?expand=documents,values,tenants"
+
+
+@pytest.fixture()
+def client():
+    return APIClient()
+
+
+@pytest.fixture()
+def user():
+    return User.objects.create_user(username="budget", password="pass")
+
+
+def make_assets(owner, count):
+    for i in range(count):
+        asset = Asset.objects.create(owner=owner, name=f"A{i}")
+        AssetDocument.objects.create(asset=asset, file=f"asset_docs/{i}.pdf")
+        MarketValue.objects.create(asset=asset, date=date.today(), value="1000.00")
+        MarketValue.objects.create(asset=asset, date=date.today() - timedelta(days=1), value="900.00")
+        Tenant.objects.create(asset=asset, full_name=f"T{i}")
+
+
+def count_queries(client, url):
+    with CaptureQueriesContext(connection) as ctx:
+        res = client.get(url)
+    assert res.status_code == 200
+    return len(ctx.captured_queries)
+
+
+def test_asset_list_query_count_is_constant(client, user):
+    client.force_authenticate(user)
+    make_assets(user, 2)
+    small = count_queries(client, f"/api/assets/{EXPAND}")
+    make_assets(user, 20)
+    large = count_queries(client, f"/api/assets/{EXPAND}")
+    assert small == large
+    # version for the ETag + assets + documents + values + tenants
+    assert large <= 5
+
+
+def test_asset_retrieve_query_count(client, user):
+    client.force_authenticate(user)
+    make_assets(user, 1)
+    asset = Asset.objects.get(owner=user)
+    res = client.get(f"/api/assets/{asset.id}/{EXPAND}")
+    assert len(res.data["documents"]) == 1
+    assert len(res.data["values"]) == 2
+    assert len(res.data["tenants"]) == 1
+    assert count_queries(client, f"/api/assets/{asset.id}/{EXPAND}") <= 5
+
+
+def capture(method, url, data=None, format="json"):
+    with CaptureQueriesContext(connection) as ctx:
+        res = method(url, data, format=format)
+    assert res.status_code < 300, res.content
+    return ctx.captured_queries
+
+
+@pytest.fixture()
+def owned(client, user):
+    client.force_authenticate(user)
+    make_assets(user, 3)
+    asset = Asset.objects.filter(owner=user).first()
+    tenant = asset.tenants.get()
+    contract = RentalContract.objects.create(
+        tenant=tenant, asset=asset, start_date=date.today(), monthly_rent="500.00"
+    )
+    return {
+        "assets": asset,
+        "documents": asset.documents.get(),
+        "values": asset.values.first(),
+        "tenants": tenant,
+        "contracts": contract,
+    }
+
+
+@pytest.mark.parametrize("resource", ["assets", "documents", "values", "tenants", "contracts"])
+def test_retrieve_checks_ownership_without_extra_queries(client, owned, resource):
+    queries = capture(client.get, f"/api/{resource}/{owned[resource].id}/")
+    # assets also load their ETag version; the others are one joined SELECT
+    assert len(queries) == (2 if resource == "assets" else 1)
+
+
+@pytest.mark.parametrize("resource", ["assets", "documents", "values", "tenants", "contracts"])
+def test_list_query_count_is_constant(client, user, owned, resource):
+    small = len(capture(client.get, f"/api/{resource}/"))
+    make_assets(user, 10)
+    assert len(capture(client.get, f"/api/{resource}/")) == small
+
+
+@pytest.mark.parametrize(
+    "resource, data",
+    [
+        ("assets", {"name": "Renamed"}),
+        ("documents", {"description": "Deed"}),
+        ("values", {"value": "1200.00"}),
+        ("tenants", {"full_name": "Renamed"}),
+        ("contracts", {"monthly_rent": "550.00"}),
+    ],
+)
+def test_update_does_not_load_the_asset_for_the_permission_check(client, owned, resource, data):
+    fmt = "multipart" if resource == "documents" else "json"
+    queries = capture(client.patch, f"/api/{resource}/{owned[resource].id}/", data, fmt)
+    asset_lookups = [q["sql"] for q in queries if 'FROM "assets_asset" WHERE "assets_asset"."id" =' in q["sql"]]
+    assert asset_lookups == []
+
+
+def test_references_are_validated_against_owned_objects(client, owned):
+    other = User.objects.create_user(username="other", password="pass")
+    foreign = Asset.objects.create(owner=other, name="Foreign")
+    res = client.post("/api/values/", {"asset": foreign.id, "date": "2020-01-01", "value": "1.00"}, format="json")
+    assert res.status_code == 400
+    assert "asset" in res.json()
+    res = client.post(
+        "/api/contracts/",
+        {
+            "asset": owned["assets"].id,
+            "tenant": Tenant.objects.create(asset=foreign, full_name="X").id,
+            "start_date": "2020-01-01",
+            "monthly_rent": "1.00",
+        },
+        format="json",
+    )
+    assert res.status_code == 400
+    assert list(res.json()) == ["tenant"]
+
+
+@pytest.mark.parametrize(
+    "resource, data",
+    [
+        ("documents", {"description": "Deed"}),
+        ("values", {"date": "2020-01-01", "value": "1.00"}),
+        ("tenants", {"full_name": "X"}),
+    ],
+)
+def test_rows_cannot_be_put_on_another_users_asset(client, owned, resource, data):
+    foreign = Asset.objects.create(owner=User.objects.create_user(username="other"), name="Foreign")
+    fmt = "multipart" if resource == "documents" else "json"
+    payload = {**data, "asset": foreign.id}
+    if resource == "documents":
+        payload["file"] = SimpleUploadedFile("deed.pdf", b"%PDF")
+    res = client.post(f"/api/{resource}/", payload, format=fmt)
+    assert res.status_code == 400
+    assert "asset" in res.json()
+    res = client.patch(f"/api/{resource}/{owned[resource].id}/", {"asset": foreign.id}, format=fmt)
+    assert res.status_code == 400
+    assert list(res.json()) == ["asset"]
+    assert not type(owned[resource]).objects.filter(asset=foreign).exists()
+
+
+def test_rows_carry_their_assets_owner(user):
+    other = User.objects.create_user(username="other")
+    asset = Asset.objects.create(owner=user, name="Copied")
+    value = MarketValue.objects.create(asset_id=asset.pk, date=date.today(), value="1.00")
+    tenant, looked_up = Tenant.objects.bulk_create(
+        [Tenant(asset=asset, full_name="Held"), Tenant(asset_id=asset.pk, full_name="Looked up")]
+    )
+    contract = RentalContract(asset_id=asset.pk, tenant=tenant, start_date=date.today(), monthly_rent=1)
+    RentalContract.objects.bulk_create([contract])
+    rows = (value, tenant, looked_up, contract)
+    assert [row.owner_id for row in rows] == [user.pk] * 4
+    # an asset handed to another owner takes its rows along
+    asset.owner = other
+    asset.save()
+    for model in (MarketValue, Tenant, RentalContract):
+        assert model.objects.owned_by(other).exists()
+        assert not model.objects.owned_by(user).exists()
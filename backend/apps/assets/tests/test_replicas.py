@@ -0,0 +1,152 @@
+import json
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import User
+from django.core.cache import cache, caches
+from django.core.management import call_command
+from django.db import connections, router
+from django.http import HttpResponse
+from django.test import AsyncClient, RequestFactory
+from rest_framework.test import APIClient
+
+from apps.accounts.serializers import TokenObtainPairSerializer
+from apps.assets import replicas
+from apps.assets.models import Asset
+
+REPLICA = "replica"
+
+pytestmark = [pytest.mark.django_db(databases=["default", REPLICA]), pytest.mark.usefixtures("replica_db")]
+
+
+@pytest.fixture(scope="module")
+def replica_db(django_db_setup, django_db_blocker, tmp_path_factory):
+    """A second SQLite database standing in for a replica; nothing replicates to it.
+
+    Added once the test databases are set up, so that they don't include it.
+    """
+    name = str(tmp_path_factory.mktemp("replica") / "db.sqlite3")
+    databases = {
+        "default": connections.settings["default"],
+        REPLICA: {"ENGINE": "django.db.backends.sqlite3", "NAME": name},
+    }
+    connections.settings[REPLICA] = connections.configure_settings(databases)[REPLICA]
+    with django_db_blocker.unblock():
+        call_command("migrate", database=REPLICA, verbosity=0)
+    yield
+    connections[REPLICA].close()
+    del connections[REPLICA]
+    del connections.settings[REPLICA]
+
+
+@pytest.fixture(autouse=True)
+def replica_settings(settings):
+    settings.DATABASE_REPLICAS = [REPLICA]
+
+
+@pytest.fixture()
+def user():
+    user = User.objects.create_user(username="reader", password="pass")
+    # the replica lags behind: it has the user, but not the assets written since; created
+    # without signals, whose own writes would go to the primary
+    User.objects.using(REPLICA).bulk_create([User(pk=user.pk, username="reader")])
+    Asset.objects.using(REPLICA).bulk_create([Asset(owner_id=user.pk, name="On the replica")])
+    Asset.objects.create(owner=user, name="On the primary")
+    return user
+
+
+@pytest.fixture()
+def client(user):
+    client = APIClient()
+    client.force_authenticate(user)
+    return client
+
+
+def names(response):
+    return [item["name"] for item in response.json()["results"]]
+
+
+def test_safe_requests_read_from_the_replica(client, user):
+    assert names(client.get("/api/assets/")) == ["On the replica"]
+    asset = Asset.objects.using(REPLICA).get()
+    assert client.get(f"/api/assets/{asset.pk}/").json()["name"] == "On the replica"
+    assert "On the replica" in client.get("/api/export/assets.csv").getvalue().decode()
+
+
+def test_writers_read_from_the_primary_for_a_while(client, user):
+    other = User.objects.create_user(username="other")
+    User.objects.using(REPLICA).bulk_create([User(pk=other.pk, username="other")])
+    Asset.objects.using(REPLICA).bulk_create([Asset(owner_id=other.pk, name="Other's, on the replica")])
+    other_client = APIClient()
+    other_client.force_authenticate(other)
+
+    assert client.post("/api/assets/", {"name": "New"}, format="json").status_code == 201
+    assert sorted(names(client.get("/api/assets/"))) == ["New", "On the primary"]
+    assert names(other_client.get("/api/assets/")) == ["Other's, on the replica"]
+    # once the window is over (and the cached responses with it)
+    for each in caches.all():
+        each.clear()
+    assert names(client.get("/api/assets/")) == ["On the replica"]
+
+
+def test_without_replicas_everything_reads_the_primary(settings, client):
+    settings.DATABASE_REPLICAS = []
+    assert names(client.get("/api/assets/")) == ["On the primary"]
+
+
+def test_async_reads_from_the_replica(async_views, user):
+    async_views()
+    token = TokenObtainPairSerializer.get_token(user).access_token
+    headers = {"authorization": f"Bearer {token}"}
+    response = async_to_sync(AsyncClient().get)("/api/assets/", headers=headers)
+    assert [item["name"] for item in json.loads(response.content)["results"]] == ["On the replica"]
+
+
+def test_router(user):
+    routing = replicas.RequestRouting()
+    token = replicas._current.set(routing)
+    try:
+        replicas.read_from_replica(user)
+        assert router.db_for_read(Asset) == REPLICA
+        asset = Asset.objects.get()
+        assert asset.name == "On the replica"
+        # saved to the primary, and the request's reads follow
+        assert router.db_for_write(Asset, instance=asset) == "default"
+        assert router.db_for_read(Asset) == "default"
+        assert router.allow_relation(asset, user)
+    finally:
+        replicas._current.reset(token)
+    assert router.db_for_read(Asset) == "default"
+    replicas.stick_to_primary(user.pk)
+    routing = replicas.RequestRouting()
+    token = replicas._current.set(routing)
+    replicas.read_from_replica(user)
+    replicas._current.reset(token)
+    assert routing.replica is None
+
+
+def test_middleware_sticks_users_who_write(user):
+    def write(request):
+        User.objects.filter(pk=user.pk).update(first_name="Ada")
+        return HttpResponse()
+
+    async def awrite(request):
+        await User.objects.filter(pk=user.pk).aupdate(first_name="Ada")
+        return HttpResponse()
+
+    async def aread(request):
+        return HttpResponse(str(await Asset.objects.acount()))
+
+    request = RequestFactory().get("/")
+    replicas.DatabaseRoutingMiddleware(write)(request)
+    assert cache.get(f"db:primary:{user.pk}") is None
+    request.user = user
+    replicas.DatabaseRoutingMiddleware(write)(request)
+    assert cache.get(f"db:primary:{user.pk}")
+    cache.clear()
+    async_to_sync(replicas.DatabaseRoutingMiddleware(awrite))(request)
+    assert cache.get(f"db:primary:{user.pk}")
+    # reads only
+    cache.clear()
+    async_to_sync(replicas.DatabaseRoutingMiddleware(aread))(request)
+    assert cache.get(f"db:primary:{user.pk}") is None
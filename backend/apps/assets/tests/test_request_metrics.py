@@ -0,0 +1,93 @@
+import json
+import logging
+import pytest
+from rest_framework.test import APIClient
+from django.contrib.auth.models import User
+from django.test import override_settings
+
+from apps.assets import instrumentation
+from apps.assets.models import Asset
+from apps.assets.serializers import AssetSummarySerializer
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture(autouse=True)
+def clean_metrics():
+    instrumentation.reset()
+    yield
+    instrumentation.reset()
+
+
+@pytest.fixture()
+def staff():
+    return User.objects.create_user(username="ops", password="pass", is_staff=True)
+
+
+def client_for(user):
+    # a new client builds its middleware chain under the current settings
+    client = APIClient()
+    client.force_authenticate(user)
+    return client
+
+
+def timings(response):
+    entries = {}
+    for entry in response["Server-Timing"].split(", "):
+        name, *params = entry.split(";")
+        entries[name] = dict(param.split("=", 1) for param in params)
+    return entries
+
+
+@override_settings(REQUEST_METRICS_ENABLED=True)
+def test_request_timings_header_log_and_histograms(staff, caplog):
+    Asset.objects.create(owner=staff, name="Loft")
+    client = client_for(staff)
+    with caplog.at_level(logging.INFO, logger="apps.assets.instrumentation"):
+        res = client.get("/api/assets/")
+    assert res.status_code == 200
+    entries = timings(res)
+    assert set(entries) == {"total", "db", "serialize"}
+    assert float(entries["serialize"]["dur"]) > 0
+    line = json.loads(caplog.records[-1].getMessage())
+    assert line["route"] == "GET asset-list"
+    assert line["status"] == 200
+    assert entries["db"]["desc"] == f'"{line["queries"]} queries"'
+    assert line["queries"] > 0
+
+    client_for(staff).get("/api/nowhere/")
+    client_for(staff).get("/api/nowhere/")
+    metrics = client.get("/api/admin/metrics/").json()
+    assert metrics["enabled"] is True
+    assert metrics["buckets_ms"] == list(instrumentation.BUCKETS_MS)
+    route = metrics["routes"]["GET asset-list"]
+    assert route["count"] == 1
+    assert sum(route["histogram"]) == 1
+    assert route["mean_queries"] == line["queries"]
+    assert route["max_ms"] >= route["mean_ms"] > 0
+    assert metrics["routes"]["GET unresolved"]["count"] == 2
+
+
+def test_nested_data_access_is_counted_once():
+    metrics = instrumentation.RequestMetrics()
+    token = instrumentation._current.set(metrics)
+    try:
+        # as if called from inside another serializer's .data
+        metrics.serializing = True
+        AssetSummarySerializer({"latest_value": None}).data
+    finally:
+        instrumentation._current.reset(token)
+    assert metrics.serialize == 0.0
+
+
+def test_disabled_by_default(staff):
+    res = client_for(staff).get("/api/assets/")
+    assert "Server-Timing" not in res
+    metrics = client_for(staff).get("/api/admin/metrics/").json()
+    assert metrics["enabled"] is False
+    assert metrics["routes"] == {}
+
+
+def test_metrics_are_staff_only():
+    user = User.objects.create_user(username="plain", password="pass")
+    assert client_for(user).get("/api/admin/metrics/").status_code == 403
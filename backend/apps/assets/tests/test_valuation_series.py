@@ -0,0 +1,170 @@
+import numpy as np
+import pytest
+from datetime import date
+from rest_framework.test import APIClient
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from apps.assets.analytics import cagr, combine, drawdowns, period_end, period_ends, rent_roll
+from apps.assets.models import Asset, MarketValue, Tenant, RentalContract
+from apps.assets.projection import Contracts
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture()
+def user():
+    return User.objects.create_user(username="series", password="pass")
+
+
+@pytest.fixture()
+def client(user):
+    client = APIClient()
+    client.force_authenticate(user)
+    return client
+
+
+@pytest.fixture()
+def asset(user):
+    asset = Asset.objects.create(owner=user, name="Loft")
+    for day, value in [
+        (date(2020, 1, 5), "100000.00"),
+        (date(2020, 1, 20), "110000.00"),
+        (date(2020, 2, 10), "90000.00"),
+        (date(2020, 4, 1), "95000.00"),
+        (date(2021, 1, 1), "121000.00"),
+    ]:
+        MarketValue.objects.create(asset=asset, date=day, value=value)
+    tenant = Tenant.objects.create(asset=asset, full_name="T")
+    RentalContract.objects.create(
+        tenant=tenant, asset=asset, start_date=date(2020, 1, 15), end_date=date(2020, 2, 15), monthly_rent="500.00"
+    )
+    RentalContract.objects.create(tenant=tenant, asset=asset, start_date=date(2020, 4, 1), monthly_rent="600.00")
+    return asset
+
+
+def series(res):
+    assert res.status_code == 200
+    return [(point["date"], point["value"]) for point in res.json()["series"]]
+
+
+def test_monthly_last_value_series_with_yield_and_drawdown(client, asset):
+    res = client.get(f"/api/assets/{asset.id}/valuation-series/")
+    body = res.json()
+    assert series(res) == [
+        ("2020-01-01", 110000.0),
+        ("2020-02-01", 90000.0),
+        ("2020-04-01", 95000.0),
+        ("2021-01-01", 121000.0),
+    ]
+    assert body["period"] == "month" and body["agg"] == "last"
+    # rent in force at each month end: January's contract ended mid-February
+    assert [point["annual_rent"] for point in body["series"]] == [6000.0, 0.0, 7200.0, 7200.0]
+    assert body["series"][0]["rental_yield"] == pytest.approx(0.0545, abs=1e-4)
+    assert [point["drawdown"] for point in body["series"]] == [0.0, 0.1818, 0.1364, 0.0]
+    assert body["max_drawdown"] == 0.1818
+    assert body["current_drawdown"] == 0.0
+    assert body["cagr"] == pytest.approx(0.1, abs=1e-3)
+
+
+def test_quarterly_average_and_date_range(client, asset):
+    res = client.get(
+        f"/api/assets/{asset.id}/valuation-series/",
+        {"period": "quarter", "agg": "avg", "date_to": "2020-12-31"},
+    )
+    assert series(res) == [("2020-01-01", 100000.0), ("2020-04-01", 95000.0)]
+    res = client.get(f"/api/assets/{asset.id}/valuation-series/", {"period": "year", "date_from": "2020-02-01"})
+    assert series(res) == [("2020-01-01", 95000.0), ("2021-01-01", 121000.0)]
+
+
+def test_empty_series(client, user):
+    asset = Asset.objects.create(owner=user, name="Empty")
+    body = client.get(f"/api/assets/{asset.id}/valuation-series/").json()
+    assert body["series"] == []
+    assert body["cagr"] is None and body["max_drawdown"] is None and body["current_drawdown"] is None
+
+
+def test_portfolio_series_carries_gaps_forward(client, user, asset):
+    other = Asset.objects.create(owner=user, name="Flat")
+    MarketValue.objects.create(asset=other, date=date(2020, 2, 1), value="0.00")
+    MarketValue.objects.create(asset=other, date=date(2020, 3, 1), value="50000.00")
+    foreign = Asset.objects.create(owner=User.objects.create_user(username="x", password="p"), name="F")
+    MarketValue.objects.create(asset=foreign, date=date(2020, 3, 1), value="1.00")
+    with CaptureQueriesContext(connection) as ctx:
+        res = client.get("/api/assets/valuation-series/")
+    assert series(res) == [
+        ("2020-01-01", 110000.0),
+        ("2020-02-01", 90000.0),
+        ("2020-03-01", 140000.0),
+        ("2020-04-01", 145000.0),
+        ("2021-01-01", 171000.0),
+    ]
+    # valuations and contracts are fetched once each whatever the history length
+    assert len(ctx.captured_queries) <= 4
+
+
+def test_zero_values_have_no_yield_or_cagr(client, user):
+    asset = Asset.objects.create(owner=user, name="Zero")
+    MarketValue.objects.create(asset=asset, date=date(2020, 1, 1), value="0.00")
+    MarketValue.objects.create(asset=asset, date=date(2021, 1, 1), value="0.00")
+    body = client.get(f"/api/assets/{asset.id}/valuation-series/").json()
+    assert [point["rental_yield"] for point in body["series"]] == [None, None]
+    assert body["cagr"] is None and body["max_drawdown"] == 0.0
+
+
+def test_series_ending_at_or_below_zero_has_no_cagr(client, user):
+    asset = Asset.objects.create(owner=user, name="Written off")
+    MarketValue.objects.create(asset=asset, date=date(2020, 1, 1), value="100000.00")
+    MarketValue.objects.create(asset=asset, date=date(2021, 1, 1), value="-5000.00")
+    res = client.get(f"/api/assets/{asset.id}/valuation-series/")
+    assert res.status_code == 200
+    assert res.json()["cagr"] is None
+    MarketValue.objects.filter(date=date(2021, 1, 1)).update(value="0.00")
+    assert client.get(f"/api/assets/{asset.id}/valuation-series/").json()["cagr"] is None
+
+
+def test_cagr_needs_time_to_pass():
+    day = date(2020, 1, 1)
+    assert cagr([(day, 100), (day, 120)]) is None
+    assert cagr([(day, 100), (date(2021, 1, 1), 110)]) == pytest.approx(0.1, abs=1e-3)
+
+
+def test_invalid_parameters(client, asset):
+    url = f"/api/assets/{asset.id}/valuation-series/"
+    assert client.get(url, {"period": "week"}).status_code == 400
+    assert client.get(url, {"agg": "median"}).status_code == 400
+    assert client.get(url, {"date_from": "soon"}).status_code == 400
+
+
+def test_series_of_foreign_asset_is_hidden(client):
+    other = Asset.objects.create(owner=User.objects.create_user(username="y", password="p"), name="F")
+    assert client.get(f"/api/assets/{other.id}/valuation-series/").status_code == 404
+
+
+def test_period_end():
+    assert period_end(date(2020, 2, 1), "month") == date(2020, 2, 29)
+    assert period_end(date(2020, 10, 1), "quarter") == date(2020, 12, 31)
+    assert period_end(date(2020, 1, 1), "year") == date(2020, 12, 31)
+
+
+def test_period_ends_match_period_end():
+    starts = np.array([date(2020, 2, 1), date(2020, 10, 1), date(2021, 12, 1)], dtype="datetime64[D]")
+    for period in ("month", "quarter", "year"):
+        assert period_ends(starts, period).tolist() == [period_end(start, period) for start in starts.tolist()]
+
+
+def test_combine_rent_roll_and_drawdowns():
+    jan, feb, mar = date(2020, 1, 1), date(2020, 2, 1), date(2020, 3, 1)
+    # asset 2 has no February valuation and asset 1 none in March: their last figures carry
+    starts, totals = combine([(1, jan, 10), (2, jan, 5), (1, feb, 8), (2, mar, 7)])
+    assert starts.tolist() == [jan, feb, mar]
+    assert totals.tolist() == [15, 13, 15]
+    assert combine([])[0].tolist() == []
+    contracts = Contracts(
+        [1, 1, 2], [jan, feb, date(2020, 1, 15)], [date(2020, 1, 31), None, date(2020, 2, 1)], [100, 200, 50], [0] * 3
+    )
+    days = np.array([date(2019, 12, 31), jan, date(2020, 1, 31), feb, date(2020, 2, 2)], dtype="datetime64[D]")
+    # start and end days are both covered
+    assert rent_roll(contracts, days).tolist() == [0, 100, 150, 250, 200]
+    assert drawdowns(np.array([0.0, 10.0, 5.0, 12.0])).tolist() == [0.0, 0.0, 0.5, 0.0]
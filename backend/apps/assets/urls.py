@@ -1,5 +1,5 @@
 from rest_framework.routers import DefaultRouter
-from django.urls import path, include
+from django.urls import path, re_path, include
 from .views import (
     AssetViewSet,
     AssetDocumentViewSet,
@@ -7,6 +7,8 @@ from .views import (
     TenantViewSet,
     RentalContractViewSet,
     AdminOverviewViewSet,
+    AdminMetricsViewSet,
+    PortfolioExportView,
 )
 
 router = DefaultRouter()
@@ -16,7 +18,13 @@ router.register(r"values", MarketValueViewSet, basename="value")
 router.register(r"tenants", TenantViewSet, basename="tenant")
 router.register(r"contracts", RentalContractViewSet, basename="contract")
 router.register(r"admin/overview", AdminOverviewViewSet, basename="admin-overview")
+router.register(r"admin/metrics", AdminMetricsViewSet, basename="admin-metrics")
 
 urlpatterns = [
+    re_path(
+        r"^export/(?P<resource>assets|values|tenants|contracts)\.(?P<fmt>csv|ndjson)$",
+        PortfolioExportView.as_view(),
+        name="portfolio-export",
+    ),
     path("", include(router.urls)),
 ]
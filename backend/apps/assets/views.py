@@ -1,46 +1,366 @@
+from datetime import date, timedelta
+
+from django.db import transaction
+from django.db.models import Count, Max, Prefetch
+from django.http import StreamingHttpResponse
+from django.utils.dateparse import parse_date
 from rest_framework import viewsets, permissions
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
 from rest_framework.parsers import MultiPartParser, FormParser
+from rest_framework.views import APIView
+from .analytics import AGGREGATES, PERIODS, period_end, valuation_series
+from .async_views import AsyncReadMixin
+from .bulk import BulkWriteMixin
+from .conditional import ConditionalGetMixin
+from .documents import ChecksumUploadHandler, document_response
+from .exporting import FORMATS, export_queryset, stream_rows
+from .instrumentation import snapshot as metrics_snapshot
 from .models import Asset, AssetDocument, MarketValue, Tenant, RentalContract
+from .occupancy import asset_occupancy, period_start, portfolio_occupancy
+from .pagination import (
+    AssetPagination,
+    AssetDocumentPagination,
+    MarketValuePagination,
+    TenantPagination,
+    RentalContractPagination,
+)
+from .projection import LAST_START, MAX_MONTHS, project_cashflow
+from .replicas import read_from_replica
+from .response_cache import CachedResponseMixin, cache_response, get_counters
 from .serializers import (
     AssetSerializer,
+    AssetPerformanceSerializer,
+    PortfolioPerformanceSerializer,
     AssetDocumentSerializer,
     MarketValueSerializer,
+    MarketValueBulkSerializer,
     TenantSerializer,
     RentalContractSerializer,
+    RentalContractBulkSerializer,
+    ValuationSeriesSerializer,
+    AssetOccupancySerializer,
+    PortfolioOccupancySerializer,
 )
+from .stats import get_overview
+from .streaming import stream
+
+
+def parse_date_param(request, name="as_of"):
+    """Return an optional ``YYYY-MM-DD`` query parameter (``?as_of=`` by default) as a date."""
+    raw = request.query_params.get(name)
+    if not raw:
+        return None
+    try:
+        value = parse_date(raw)
+    except ValueError:
+        value = None
+    if value is None:
+        raise ValidationError({name: "Expected a date in YYYY-MM-DD format."})
+    return value
+
+
+def parse_number(request, name, cast=float):
+    raw = request.query_params.get(name)
+    if raw in (None, ""):
+        return None
+    try:
+        return cast(raw)
+    except ValueError:
+        raise ValidationError({name: "Expected a number."})
+
+
+def parse_choice(request, name, choices, default):
+    value = request.query_params.get(name) or default
+    if value not in choices:
+        raise ValidationError({name: f"Choose one of {sorted(choices)}."})
+    return value
+
+
+def parse_list(request, name, choices):
+    """Return a comma-separated query parameter as a tuple of names taken from ``choices``."""
+    raw = request.query_params.get(name)
+    if raw is None:
+        return None
+    names = tuple(part for part in (p.strip() for p in raw.split(",")) if part)
+    unknown = sorted(set(names) - set(choices))
+    if unknown:
+        raise ValidationError(
+            {name: f"Unknown {', '.join(unknown)}; choose from {sorted(choices)}."}
+        )
+    return names
+
+
+# dates a window may start or end on, leaving whole years either side for the periods
+OCCUPANCY_DATES = (date(date.min.year + 1, 1, 1), date(date.max.year - 1, 12, 31))
+MAX_OCCUPANCY_YEARS = 10
+
+
+def parse_occupancy_window(request):
+    """``?date_from=``, ``?date_to=`` and ``?period=`` of the occupancy endpoints.
+
+    The window, the year to today by default, is widened to whole periods. It may span at
+    most ``MAX_OCCUPANCY_YEARS`` calendar years.
+    """
+    earliest, latest = OCCUPANCY_DATES
+    date_to = parse_date_param(request, "date_to")
+    date_from = parse_date_param(request, "date_from")
+    for name, value in (("date_from", date_from), ("date_to", date_to)):
+        if value and not earliest <= value <= latest:
+            raise ValidationError({name: f"Expected a date from {earliest} to {latest}."})
+    date_to = date_to or date.today()
+    date_from = date_from or date_to - timedelta(days=364)
+    if date_from > date_to:
+        raise ValidationError({"date_from": "Expected a date on or before date_to."})
+    if date_to.year - date_from.year >= MAX_OCCUPANCY_YEARS:
+        raise ValidationError(
+            {"date_from": f"Expected at most {MAX_OCCUPANCY_YEARS} calendar years."}
+        )
+    period = parse_choice(request, "period", PERIODS, "month")
+    return (
+        period_start(date_from, period),
+        period_end(period_start(date_to, period), period),
+        period,
+    )
+
+
+def contract_spans(contracts):
+    """``(asset_id, start_date, end_date)`` rows of ``contracts``, in the sweep's scan order."""
+    return contracts.order_by("asset_id", "start_date").values_list(
+        "asset_id", "start_date", "end_date"
+    )
 
 
 class IsOwner(permissions.BasePermission):
+    """Compare owner ids, never instances, so the check doesn't load the asset or the user.
+
+    Assets carry ``owner_id``, and the other resources a copy of their asset's. Only an
+    object without one falls back to ``obj.asset``.
+    """
+
     def has_object_permission(self, request, view, obj):
-        owner = getattr(obj, "owner", None)
-        if owner is None and hasattr(obj, "asset"):
-            owner = getattr(obj.asset, "owner", None)
-        return owner == request.user
+        owner_id = getattr(obj, "owner_id", None)
+        if owner_id is None and hasattr(obj, "asset"):
+            owner_id = obj.asset.owner_id
+        return owner_id == request.user.pk
+
+
+class AtomicWriteMixin:
+    """Run each write together with what its signals write: summaries, blob counts, jobs."""
+
+    def perform_create(self, serializer):
+        with transaction.atomic():
+            super().perform_create(serializer)
+
+    def perform_update(self, serializer):
+        with transaction.atomic():
+            super().perform_update(serializer)
+
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            super().perform_destroy(instance)
+
+
+class ReplicaReadMixin:
+    """Read from a replica, if there are any, on safe requests once they are authenticated."""
 
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self.route_reads(request)
 
-class AssetViewSet(viewsets.ModelViewSet):
+    async def ainitial(self, request, *args, **kwargs):
+        await super().ainitial(request, *args, **kwargs)
+        self.route_reads(request)
+
+    def route_reads(self, request):
+        if request.method in permissions.SAFE_METHODS:
+            read_from_replica(request.user)
+
+
+class AssetViewSet(
+    ReplicaReadMixin,
+    ConditionalGetMixin,
+    CachedResponseMixin,
+    AsyncReadMixin,
+    AtomicWriteMixin,
+    viewsets.ModelViewSet,
+):
+    pagination_class = AssetPagination
     serializer_class = AssetSerializer
     permission_classes = [permissions.IsAuthenticated, IsOwner]
 
     def get_queryset(self):
-        return Asset.objects.filter(owner=self.request.user)
+        queryset = Asset.objects.owned_by(self.request.user)
+        if self.action in ("list", "retrieve"):
+            # load each relation the serializer will embed in a single query, and no others
+            context = self.get_serializer_context()
+            if context["fields"] is None or "summary" in context["fields"]:
+                queryset = queryset.select_related("summary")
+            for name in context["expand"]:
+                if name == "values" and context["values_limit"] is not None:
+                    # a sliced prefetch: the database keeps the latest N per asset
+                    values = MarketValue.objects.order_by("-date", "-id")[: context["values_limit"]]
+                    queryset = queryset.prefetch_related(
+                        Prefetch("values", queryset=values, to_attr="latest_values")
+                    )
+                else:
+                    queryset = queryset.prefetch_related(name)
+        elif self.action in ("performance", "portfolio_performance"):
+            queryset = queryset.with_performance(parse_date_param(self.request))
+        return queryset
+
+    def get_serializer_context(self):
+        # ?fields=name,address picks top-level fields; ?expand=documents,values,tenants embeds
+        # relations; ?values_limit=N embeds the latest N valuations only
+        context = super().get_serializer_context()
+        request = self.request
+        expandable = AssetSerializer.expandable_fields
+        base_fields = [name for name in AssetSerializer.Meta.fields if name not in expandable]
+        expand = parse_list(request, "expand", expandable) or ()
+        values_limit = parse_number(request, "values_limit", cast=int)
+        if values_limit is not None:
+            # no more than a page of /api/values/ would hold
+            most = MarketValuePagination.max_page_size
+            if not 1 <= values_limit <= most:
+                raise ValidationError({"values_limit": f"Expected 1 to {most}."})
+            expand = tuple({*expand, "values"})
+        return {
+            **context,
+            "fields": parse_list(request, "fields", base_fields),
+            "expand": expand,
+            "values_limit": values_limit,
+        }
+
+    version_aggregates = {
+        "count": Count("pk"),
+        "updated": Max("updated_at"),
+        "summarized": Max("summary__updated_at"),
+    }
+
+    def get_resource_version(self):
+        # child writes bump Asset.updated_at and rollovers bump the summary, so these two
+        # timestamps plus the asset count (for deletions) cover the whole nested payload
+        assets = self._versioned_assets()
+        if assets is None:
+            return None
+        return self._resource_version(assets.aggregate(**self.version_aggregates))
+
+    async def aget_resource_version(self):
+        assets = self._versioned_assets()
+        if assets is None:
+            return None
+        return self._resource_version(await assets.aaggregate(**self.version_aggregates))
+
+    def _versioned_assets(self):
+        # the asset a detail route is about, or every owned asset
+        assets = Asset.objects.owned_by(self.request.user)
+        if "pk" in self.kwargs:
+            try:
+                assets = assets.filter(pk=self.kwargs["pk"])
+            except (TypeError, ValueError):
+                return None
+        return assets
 
-    @action(detail=True, methods=["get"]) 
+    def _resource_version(self, version):
+        if "pk" in self.kwargs and not version["count"]:
+            return None
+        stamps = [stamp for stamp in (version["updated"], version["summarized"]) if stamp]
+        return max(stamps, default=None), "{count}:{updated}:{summarized}".format(**version)
+
+    @action(detail=True, methods=["get"])
+    @cache_response
     def performance(self, request, pk=None):
+        # Annualized rent from active contracts / latest market value, computed in the database
         asset = self.get_object()
-        # Simple performance: annualized rent from active contracts / latest market value
-        latest_value = asset.values.order_by("-date").first()
-        active_contracts = asset.contracts.all()
-        annual_income = sum([float(c.monthly_rent) * 12 for c in active_contracts])
-        mv = float(latest_value.value) if latest_value else 0.0
-        performance = (annual_income / mv) if mv > 0 else 0.0
-        return Response({
-            "annual_income": annual_income,
-            "market_value": mv,
-            "performance": performance,
-        })
+        return Response(AssetPerformanceSerializer(asset).data)
+
+    @cache_response
+    async def aperformance(self, request, pk=None):
+        return Response(AssetPerformanceSerializer(await self.aget_object()).data)
+
+    portfolio_orderings = {"performance", "annual_income", "market_value", "name", "id"}
+
+    @action(detail=False, methods=["get"], url_path="performance", url_name="portfolio-performance")
+    @cache_response
+    def portfolio_performance(self, request):
+        """Performance of every owned asset in one query, filterable and orderable by yield."""
+        queryset = self.get_queryset()
+        min_performance = parse_number(request, "min_performance")
+        if min_performance is not None:
+            queryset = queryset.filter(performance__gte=min_performance)
+        max_performance = parse_number(request, "max_performance")
+        if max_performance is not None:
+            queryset = queryset.filter(performance__lte=max_performance)
+        orderings = {sign + name for name in self.portfolio_orderings for sign in ("", "-")}
+        ordering = parse_choice(request, "ordering", orderings, "-performance")
+        queryset = queryset.order_by(ordering, "id")
+        return Response({"results": PortfolioPerformanceSerializer(queryset, many=True).data})
+
+    @action(detail=False, methods=["get"], url_path="cashflow", url_name="portfolio-cashflow")
+    @cache_response
+    def cashflow(self, request):
+        """Projected monthly rent, deposits held, expirations and vacancy, per asset and in total.
+
+        ``?months=`` months (12 by default, at most ``MAX_MONTHS``) from the month of ``?as_of=``
+        (today by default); ``?detail=portfolio`` leaves the per-asset rows out.
+        """
+        months = parse_number(request, "months", cast=int)
+        if months is None:
+            months = 12
+        if not 1 <= months <= MAX_MONTHS:
+            raise ValidationError({"months": f"Expected 1 to {MAX_MONTHS}."})
+        as_of = parse_date_param(request)
+        if as_of and as_of > LAST_START:
+            raise ValidationError({"as_of": f"Expected a date on or before {LAST_START}."})
+        detail = parse_choice(request, "detail", {"assets", "portfolio"}, "assets")
+        assets = Asset.objects.owned_by(request.user).order_by("id").values_list("id", "name")
+        contracts = RentalContract.objects.owned_by(request.user)
+        return Response(
+            project_cashflow(assets, contracts, as_of, months, per_asset=detail == "assets")
+        )
+
+    @action(detail=True, methods=["get"])
+    @cache_response
+    def occupancy(self, request, pk=None):
+        """Occupied and vacant runs of the asset, and its vacant days and occupancy per period."""
+        first, last, period = parse_occupancy_window(request)
+        asset = self.get_object()
+        contracts = contract_spans(asset.contracts.running_between(first, last))
+        data = asset_occupancy(contracts, first, last, period)
+        return Response(AssetOccupancySerializer(data).data)
+
+    @action(detail=True, methods=["get"], url_path="valuation-series", url_name="valuation-series")
+    def valuation_series(self, request, pk=None):
+        asset = self.get_object()
+        return self._valuation_series(asset.values.all(), asset.contracts.all())
+
+    @action(
+        detail=False,
+        methods=["get"],
+        url_path="valuation-series",
+        url_name="portfolio-valuation-series",
+    )
+    def portfolio_valuation_series(self, request):
+        """Summed valuation series of every owned asset."""
+        return self._valuation_series(
+            MarketValue.objects.owned_by(request.user),
+            RentalContract.objects.owned_by(request.user),
+        )
+
+    def _valuation_series(self, values, contracts):
+        # ?period=month|quarter|year, ?agg=last|avg, ?date_from= / ?date_to= bound the valuations
+        request = self.request
+        period = parse_choice(request, "period", PERIODS, "month")
+        agg = parse_choice(request, "agg", AGGREGATES, "last")
+        date_from = parse_date_param(request, "date_from")
+        if date_from is not None:
+            values = values.filter(date__gte=date_from)
+        date_to = parse_date_param(request, "date_to")
+        if date_to is not None:
+            values = values.filter(date__lte=date_to)
+        data = valuation_series(values, contracts, period, agg)
+        return Response(ValuationSeriesSerializer(data).data)
 
 
 class IsAdmin(permissions.BasePermission):
@@ -48,51 +368,193 @@ class IsAdmin(permissions.BasePermission):
         return bool(request.user and request.user.is_staff)
 
 
-class AdminOverviewViewSet(viewsets.ViewSet):
+class AdminOverviewViewSet(ReplicaReadMixin, viewsets.ViewSet):
     permission_classes = [permissions.IsAuthenticated, IsAdmin]
 
     def list(self, request):
-        total_assets = Asset.objects.count()
-        total_users = Asset.objects.values("owner").distinct().count()
-        total_contracts = RentalContract.objects.count()
-        occupied_assets = Asset.objects.filter(contracts__isnull=False).distinct().count()
-        occupancy_rate = (occupied_assets / total_assets) if total_assets else 0
-        return Response({
-            "total_assets": total_assets,
-            "total_users": total_users,
-            "total_contracts": total_contracts,
-            "occupancy_rate": occupancy_rate,
-        })
-
-
-class AssetDocumentViewSet(viewsets.ModelViewSet):
+        # ?fresh=1 bypasses the cache; cache_age is how old the figures are, in seconds
+        stats, age = get_overview(fresh=request.query_params.get("fresh") == "1")
+        return Response({**stats, "cache_age": round(age, 3)})
+
+    @action(detail=False, methods=["get"], url_path="response-cache")
+    def response_cache(self, request):
+        """Hit and miss counters of the per-user asset response cache."""
+        return Response(get_counters())
+
+    @action(detail=False, methods=["get"])
+    def occupancy(self, request):
+        """Vacant asset-days and occupancy rate of all assets per period, in one contract scan."""
+        first, last, period = parse_occupancy_window(request)
+        contracts = contract_spans(RentalContract.objects.running_between(first, last))
+        data = portfolio_occupancy(Asset.objects.count(), contracts, first, last, period)
+        return Response(PortfolioOccupancySerializer(data).data)
+
+
+class AdminMetricsViewSet(viewsets.ViewSet):
+    permission_classes = [permissions.IsAuthenticated, IsAdmin]
+
+    def list(self, request):
+        # per-route request metrics of the process that serves this request
+        return Response(metrics_snapshot())
+
+
+class PortfolioExportView(ReplicaReadMixin, APIView):
+    """Stream a resource as CSV or NDJSON, filtered by ``?date_from=`` / ``?date_to=``.
+
+    Users export their own portfolio; staff may pass ``?owner=<id>`` or ``?owner=all``.
+    """
+
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request, resource, fmt):
+        owner_id = request.user.pk
+        if request.user.is_staff and request.query_params.get("owner") == "all":
+            owner_id = None
+        elif request.user.is_staff and "owner" in request.query_params:
+            # only an explicit id widens the scope; a blank one must not mean everyone
+            owner_id = parse_number(request, "owner", cast=int)
+            if owner_id is None or owner_id < 1:
+                raise ValidationError({"owner": "Expected a user id or all."})
+        rows = export_queryset(
+            resource,
+            owner_id=owner_id,
+            date_from=parse_date_param(request, "date_from"),
+            date_to=parse_date_param(request, "date_to"),
+        )
+        # the body is read after the request's routing is gone, so pick the database now
+        rows = rows.using(rows.db)
+        response = StreamingHttpResponse(
+            stream(stream_rows(resource, fmt, rows), batch=500), content_type=FORMATS[fmt]
+        )
+        response["Content-Disposition"] = f'attachment; filename="{resource}.{fmt}"'
+        return response
+
+
+class AssetDocumentViewSet(ReplicaReadMixin, AtomicWriteMixin, viewsets.ModelViewSet):
+    pagination_class = AssetDocumentPagination
     serializer_class = AssetDocumentSerializer
     permission_classes = [permissions.IsAuthenticated, IsOwner]
     parser_classes = [MultiPartParser, FormParser]
 
+    def initialize_request(self, request, *args, **kwargs):
+        # before anything reads the body, so uploads stream to disk instead of memory
+        request.upload_handlers = [ChecksumUploadHandler(request)]
+        return super().initialize_request(request, *args, **kwargs)
+
     def get_queryset(self):
-        return AssetDocument.objects.filter(asset__owner=self.request.user)
+        return AssetDocument.objects.owned_by(self.request.user)
 
+    @action(detail=True, methods=["get"])
+    def download(self, request, pk=None):
+        """The document's file, with ``Range`` support; see ``document_response``."""
+        return document_response(request, self.get_object())
 
-class MarketValueViewSet(viewsets.ModelViewSet):
+
+class MarketValueViewSet(ReplicaReadMixin, AtomicWriteMixin, BulkWriteMixin, viewsets.ModelViewSet):
+    pagination_class = MarketValuePagination
     serializer_class = MarketValueSerializer
+    bulk_serializer_class = MarketValueBulkSerializer
+    # (asset, date) is the natural key: POST upserts on it, PATCH only changes the value
+    bulk_update_fields = ("value",)
     permission_classes = [permissions.IsAuthenticated, IsOwner]
 
     def get_queryset(self):
-        return MarketValue.objects.filter(asset__owner=self.request.user)
+        queryset = MarketValue.objects.owned_by(self.request.user)
+        if self.action in ("update", "partial_update"):
+            # the (asset, date) unique-together validator reads instance.asset
+            queryset = queryset.select_related("asset")
+        return queryset
+
+    def get_bulk_references(self):
+        return {"asset": Asset.objects.owned_by(self.request.user)}
 
+    def perform_bulk_create(self, rows):
+        # last item wins when a payload repeats an (asset, date) pair
+        rows = {(row["asset"], row["date"]): row for row in rows}
+        existing = set(
+            MarketValue.objects.filter(
+                asset_id__in={asset for asset, _ in rows}, date__in={day for _, day in rows}
+            ).values_list("asset_id", "date")
+        )
+        MarketValue.objects.bulk_create(
+            [
+                MarketValue(
+                    asset_id=row["asset"],
+                    owner=self.request.user,
+                    date=row["date"],
+                    value=row["value"],
+                )
+                for row in rows.values()
+            ],
+            update_conflicts=True,
+            unique_fields=["asset", "date"],
+            update_fields=["value"],
+        )
+        updated = len(existing & rows.keys())
+        return len(rows) - updated, updated
 
-class TenantViewSet(viewsets.ModelViewSet):
+
+class TenantViewSet(ReplicaReadMixin, AtomicWriteMixin, viewsets.ModelViewSet):
+    pagination_class = TenantPagination
     serializer_class = TenantSerializer
     permission_classes = [permissions.IsAuthenticated, IsOwner]
 
     def get_queryset(self):
-        return Tenant.objects.filter(asset__owner=self.request.user)
+        return Tenant.objects.owned_by(self.request.user)
 
 
-class RentalContractViewSet(viewsets.ModelViewSet):
+class RentalContractViewSet(
+    ReplicaReadMixin, AtomicWriteMixin, BulkWriteMixin, viewsets.ModelViewSet
+):
+    pagination_class = RentalContractPagination
     serializer_class = RentalContractSerializer
+    bulk_serializer_class = RentalContractBulkSerializer
+    bulk_update_fields = (
+        "tenant",
+        "asset",
+        "start_date",
+        "end_date",
+        "monthly_rent",
+        "deposit",
+        "notes",
+    )
     permission_classes = [permissions.IsAuthenticated, IsOwner]
 
     def get_queryset(self):
-        return RentalContract.objects.filter(asset__owner=self.request.user)
+        return RentalContract.objects.owned_by(self.request.user)
+
+    def get_bulk_references(self):
+        return {
+            "asset": Asset.objects.owned_by(self.request.user),
+            "tenant": Tenant.objects.owned_by(self.request.user),
+        }
+
+    def get_bulk_row_errors(self, rows):
+        # a contract's tenant must be a tenant of its asset; checked where a row names both
+        named = [(index, row) for index, row in rows if "tenant" in row and "asset" in row]
+        tenant_assets = dict(
+            Tenant.objects.filter(pk__in={row["tenant"] for _, row in named}).values_list(
+                "pk", "asset_id"
+            )
+        )
+        for index, row in named:
+            if tenant_assets[row["tenant"]] != row["asset"]:
+                yield index, {"tenant": ["The tenant is not one of the asset's."]}
+
+    def perform_bulk_create(self, rows):
+        RentalContract.objects.bulk_create(
+            [
+                RentalContract(
+                    tenant_id=row["tenant"],
+                    asset_id=row["asset"],
+                    owner=self.request.user,
+                    start_date=row["start_date"],
+                    end_date=row["end_date"],
+                    monthly_rent=row["monthly_rent"],
+                    deposit=row["deposit"],
+                    notes=row["notes"],
+                )
+                for row in rows
+            ]
+        )
+        return len(rows), 0
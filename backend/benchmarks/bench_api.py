@@ -0,0 +1,96 @@
+from datetime import date
+
+import numpy as np
+import pytest
+from django.core.cache import caches
+from django.core.files.uploadedfile import SimpleUploadedFile
+
+from apps.assets.projection import Contracts, project
+
+pytestmark = pytest.mark.django_db
+
+
+def clear_caches():
+    for cache in caches.all():
+        cache.clear()
+
+
+def get(client, url):
+    def request():
+        res = client.get(url)
+        assert res.status_code == 200, res.content
+
+    return request
+
+
+@pytest.mark.parametrize("cold", [True, False], ids=["cold", "cached"])
+def test_asset_list(scenario, client, cold):
+    name = f"asset list ({'cold' if cold else 'cached'})"
+    scenario(name, get(client, "/api/assets/"), clear_caches if cold else None)
+
+
+def test_asset_list_expanded(scenario, client):
+    url = "/api/assets/?expand=tenants&values_limit=12"
+    scenario("asset list expanded", get(client, url), clear_caches)
+
+
+def test_asset_detail(scenario, client, portfolio):
+    url = f"/api/assets/{portfolio['asset'].id}/?expand=documents,tenants&values_limit=30"
+    scenario("asset detail", get(client, url), clear_caches)
+
+
+def test_asset_performance(scenario, client, portfolio):
+    url = f"/api/assets/{portfolio['asset'].id}/performance/"
+    scenario("asset performance", get(client, url), clear_caches)
+
+
+def test_portfolio_performance(scenario, client):
+    scenario("portfolio performance", get(client, "/api/assets/performance/"), clear_caches)
+
+
+def test_portfolio_valuation_series(scenario, client):
+    scenario(
+        "portfolio valuation series", get(client, "/api/assets/valuation-series/?period=quarter")
+    )
+
+
+def test_portfolio_cashflow(scenario, client):
+    scenario("portfolio cashflow", get(client, "/api/assets/cashflow/?months=120"), clear_caches)
+
+
+def test_cashflow_projection(scenario):
+    """The projection alone, of 10,000 assets with 3 contracts each over 120 months."""
+    rng = np.random.default_rng(0)
+    assets, count = 10_000, 30_000
+    starts = np.datetime64("2018-01-01") + rng.integers(0, 3650, count)
+    ends = np.where(
+        rng.random(count) < 0.3, np.datetime64("NaT"), starts + rng.integers(30, 2000, count)
+    )
+    contracts = Contracts(
+        rng.integers(0, assets, count),
+        starts,
+        ends,
+        rng.random(count) * 2000,
+        rng.random(count) * 4000,
+    )
+    scenario(
+        "cashflow projection (10k assets, 120 months)",
+        lambda: project(np.arange(assets), contracts, date(2026, 1, 1), 120),
+    )
+
+
+def test_admin_overview(scenario, staff_client):
+    scenario("admin overview (fresh)", get(staff_client, "/api/admin/overview/?fresh=1"))
+
+
+def test_document_upload(scenario, client, portfolio, settings, tmp_path):
+    settings.MEDIA_ROOT = tmp_path
+
+    def upload():
+        content = b"%PDF-1.4 " + b"x" * 64 * 1024
+        document = SimpleUploadedFile("lease.pdf", content, content_type="application/pdf")
+        data = {"asset": portfolio["asset"].id, "file": document}
+        res = client.post("/api/documents/", data, format="multipart")
+        assert res.status_code == 201, res.content
+
+    scenario("document upload", upload)
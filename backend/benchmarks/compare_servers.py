@@ -0,0 +1,218 @@
+"""Throughput of the gthread (WSGI) and uvicorn (ASGI) gunicorn profiles at high concurrency.
+
+Run from ``backend/`` with ``make bench-servers`` (``BENCH_SERVER_ARGS`` passes options; see
+``python benchmarks/compare_servers.py --help``). A portfolio is generated in the database of
+``DATABASE_URL``, then each profile is started in turn on a local port and loaded by
+``--concurrency`` keep-alive clients cycling through the asset read endpoints for
+``--duration`` seconds. ``--slow-clients`` more clients meanwhile download a document of
+``--document-mb`` at ``--slow-rate`` KiB/s, as users on slow links do; their requests aren't in
+the results, only their effect on everyone else's.
+"""
+
+import argparse
+import http.client
+import io
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+BACKEND = Path(__file__).resolve().parent.parent
+PROFILES = {
+    "gthread": ["config.wsgi:application", "-c", "gunicorn.conf.py"],
+    "asgi": ["config.asgi:application", "-c", "gunicorn.asgi.conf.py"],
+}
+PATHS = ("/api/assets/", "/api/assets/{asset}/", "/api/assets/{asset}/performance/")
+
+
+def prepare(assets, years, document_mb):
+    """Generate the portfolio; return its owner's access token, an asset id and a document id."""
+    sys.path.insert(0, str(BACKEND))
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+    import django
+
+    django.setup()
+    from django.contrib.auth import get_user_model
+    from django.core.files.base import ContentFile
+    from django.core.management import call_command
+
+    from apps.accounts.serializers import TokenObtainPairSerializer
+    from apps.assets.models import AssetDocument
+
+    call_command(
+        "generate_portfolio",
+        users=1,
+        assets=assets,
+        years=years,
+        prefix="bench-server",
+        replace=True,
+        stdout=io.StringIO(),
+    )
+    owner = get_user_model().objects.get(username="bench-server-0")
+    token = str(TokenObtainPairSerializer.get_token(owner).access_token)
+    asset = owner.assets.order_by("pk").first()
+    # the same content every run, so the stored file is reused
+    content = ContentFile(bytes(document_mb * 2**20), name="bench-server.bin")
+    document = AssetDocument.objects.create(asset=asset, file=content, size=content.size)
+    return token, asset.pk, document.pk
+
+
+def start(profile, port, workers):
+    env = {**os.environ, "DJANGO_USE_FORCE_SCRIPT_NAME": "false"}
+    command = [
+        "gunicorn",
+        *PROFILES[profile],
+        "--bind",
+        f"127.0.0.1:{port}",
+        "--workers",
+        str(workers),
+    ]
+    server = subprocess.Popen(
+        command, cwd=BACKEND, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE
+    )
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        try:
+            connection = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+            connection.request("GET", "/health/")
+            if connection.getresponse().status == 200:
+                return server
+        except OSError:
+            time.sleep(0.2)
+    server.terminate()
+    raise SystemExit(f"{profile} didn't start:\n{server.stderr.read().decode()}")
+
+
+def client(port, paths, headers, deadline):
+    """Request ``paths`` in turn over one connection until ``deadline``; return the timings."""
+    latencies, errors = [], 0
+    connection = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+    while time.monotonic() < deadline:
+        for path in paths:
+            started = time.perf_counter()
+            try:
+                connection.request("GET", path, headers=headers)
+                response = connection.getresponse()
+                response.read()
+            except (OSError, http.client.HTTPException):
+                errors += 1
+                connection.close()
+                continue
+            if response.status != 200:
+                errors += 1
+            latencies.append(time.perf_counter() - started)
+    connection.close()
+    return latencies, errors
+
+
+def slow_client(port, path, headers, rate, deadline):
+    """Download ``path`` at ``rate`` KiB/s over and over until ``deadline``; return bytes read."""
+    received = 0
+    while time.monotonic() < deadline:
+        connection = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+        # a small window, as on a slow link, instead of loopback's buffering the whole file
+        connection.sock = socket.socket()
+        connection.sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 64 * 1024)
+        connection.sock.settimeout(30)
+        try:
+            connection.sock.connect(("127.0.0.1", port))
+            connection.request("GET", path, headers=headers)
+            response = connection.getresponse()
+            while time.monotonic() < deadline and (data := response.read(rate * 1024 // 10)):
+                received += len(data)
+                time.sleep(0.1)
+        except (OSError, http.client.HTTPException):
+            pass
+        connection.close()
+    return received
+
+
+def load(port, paths, token, concurrency, duration, slow=(0, None, 0)):
+    slow_clients, document_path, rate = slow
+    headers = {"Authorization": f"Bearer {token}"}
+    # one warm-up request per path, so that caches and connections don't count
+    client(port, paths, headers, time.monotonic())
+    with ThreadPoolExecutor(concurrency + slow_clients) as pool:
+        # started first, so that the downloads hold their slots all along
+        downloads = [
+            pool.submit(
+                slow_client, port, document_path, headers, rate, time.monotonic() + duration + 1
+            )
+            for _ in range(slow_clients)
+        ]
+        if slow_clients:
+            time.sleep(1)
+        deadline = time.monotonic() + duration
+        results = list(
+            pool.map(lambda _: client(port, paths, headers, deadline), range(concurrency))
+        )
+    latencies = sorted(latency for result, _ in results for latency in result)
+    # with every slot held by a download, nothing else may get through at all
+    quantiles = (
+        statistics.quantiles(latencies, n=100) if len(latencies) > 1 else [float("nan")] * 99
+    )
+    p50, p95, p99 = (quantiles[i] for i in (49, 94, 98))
+    return {
+        "requests": len(latencies),
+        "errors": sum(errors for _, errors in results),
+        "rps": round(len(latencies) / duration, 1),
+        "p50_ms": round(p50 * 1000, 2),
+        "p95_ms": round(p95 * 1000, 2),
+        "p99_ms": round(p99 * 1000, 2),
+        # at most slow_clients * rate if no download waits for a slot
+        "download_kib_s": round(
+            sum(download.result() for download in downloads) / 1024 / (duration + 1)
+        ),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--profiles", nargs="+", choices=PROFILES, default=list(PROFILES))
+    parser.add_argument("--concurrency", type=int, default=64, help="Concurrent clients.")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds of load per profile.")
+    parser.add_argument("--workers", type=int, default=3, help="Gunicorn workers of both profiles.")
+    parser.add_argument("--assets", type=int, default=50, help="Generated assets.")
+    parser.add_argument("--years", type=int, default=2, help="Years of daily values per asset.")
+    parser.add_argument("--slow-clients", type=int, default=0, help="Concurrent slow downloads.")
+    parser.add_argument("--slow-rate", type=int, default=256, help="KiB/s of each slow download.")
+    parser.add_argument(
+        "--document-mb", type=int, default=16, help="Size of the downloaded document."
+    )
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--output", help="Also write the results to this JSON file.")
+    options = parser.parse_args()
+
+    token, asset, document = prepare(options.assets, options.years, options.document_mb)
+    paths = [path.format(asset=asset) for path in PATHS]
+    slow = (options.slow_clients, f"/api/documents/{document}/download/", options.slow_rate)
+    results = {}
+    for profile in options.profiles:
+        server = start(profile, options.port, options.workers)
+        try:
+            results[profile] = load(
+                options.port, paths, token, options.concurrency, options.duration, slow
+            )
+        finally:
+            server.terminate()
+            server.wait()
+        print(profile, json.dumps(results[profile]), flush=True)
+    if {"gthread", "asgi"} <= results.keys():
+        ratio = results["asgi"]["rps"] / results["gthread"]["rps"]
+        print(
+            f"asgi/gthread throughput: {ratio:.2f}x at {options.concurrency} concurrent clients"
+            f" and {options.slow_clients} slow downloads"
+        )
+    if options.output:
+        Path(options.output).write_text(json.dumps(results, indent=2) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""Benchmark harness: a generated portfolio, latency percentiles and a JSON baseline.
+
+Run from ``backend/`` with ``make bench`` (compare against the baseline) or
+``make bench-save`` (record a new one); see ``pytest benchmarks/bench_api.py --help``.
+"""
+
+import io
+import json
+import statistics
+from pathlib import Path
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+DEFAULT_BASELINE = Path(__file__).with_name("baseline.json")
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup("casapp benchmarks")
+    group.addoption("--bench-users", type=int, default=3, help="Generated users.")
+    group.addoption("--bench-assets", type=int, default=20, help="Generated assets per user.")
+    group.addoption("--bench-years", type=int, default=10, help="Years of daily values per asset.")
+    group.addoption("--bench-rounds", type=int, default=30, help="Timed rounds per scenario.")
+    group.addoption("--bench-baseline", default=str(DEFAULT_BASELINE), help="Baseline JSON file.")
+    group.addoption("--bench-save", action="store_true", help="Write the results as the baseline.")
+    group.addoption(
+        "--bench-threshold",
+        type=float,
+        default=0.25,
+        help="Allowed p95 slowdown against the baseline (0.25 = 25%%).",
+    )
+
+
+@pytest.fixture(scope="session")
+def portfolio(django_db_setup, django_db_blocker, pytestconfig):
+    """Generate the portfolio once per session, outside the per-test transactions."""
+    User = get_user_model()
+    with django_db_blocker.unblock():
+        call_command(
+            "generate_portfolio",
+            users=pytestconfig.getoption("--bench-users"),
+            assets=pytestconfig.getoption("--bench-assets"),
+            years=pytestconfig.getoption("--bench-years"),
+            seed=0,
+            stdout=io.StringIO(),
+        )
+        owner = User.objects.filter(username__startswith="bench-").order_by("username").first()
+        staff = User.objects.create_user(username="bench-staff", password="bench", is_staff=True)
+        return {"owner": owner, "staff": staff, "asset": owner.assets.order_by("pk").first()}
+
+
+@pytest.fixture()
+def client(portfolio):
+    client = APIClient()
+    client.force_authenticate(portfolio["owner"])
+    return client
+
+
+@pytest.fixture()
+def staff_client(portfolio):
+    client = APIClient()
+    client.force_authenticate(portfolio["staff"])
+    return client
+
+
+@pytest.fixture(scope="session")
+def bench_baseline(pytestconfig):
+    path = Path(pytestconfig.getoption("--bench-baseline"))
+    results = {}
+    yield json.loads(path.read_text()) if path.exists() else {}, results
+    if pytestconfig.getoption("--bench-save") and results:
+        path.write_text(json.dumps(results, indent=2, sort_keys=True) + "\n")
+
+
+def percentile(timings, p):
+    return statistics.quantiles(timings, n=100, method="inclusive")[p - 1] * 1000
+
+
+@pytest.fixture()
+def scenario(benchmark, bench_baseline, pytestconfig):
+    """Time ``func`` and check its query count and p95 latency against the baseline.
+
+    ``setup`` runs untimed before every round, e.g. to empty caches for a cold scenario.
+    """
+    baseline, results = bench_baseline
+
+    def run(name, func, setup=None):
+        if setup:
+            setup()
+        with CaptureQueriesContext(connection) as ctx:
+            func()
+        # read now: every request started by the timed rounds empties connection.queries
+        queries = len(ctx.captured_queries)
+        rounds = pytestconfig.getoption("--bench-rounds")
+        benchmark.pedantic(func, setup=setup, rounds=rounds, iterations=1, warmup_rounds=1)
+        timings = benchmark.stats.stats.data
+        result = {
+            "queries": queries,
+            "p50_ms": round(percentile(timings, 50), 3),
+            "p95_ms": round(percentile(timings, 95), 3),
+            "p99_ms": round(percentile(timings, 99), 3),
+        }
+        benchmark.extra_info.update(result)
+        results[name] = result
+        expected = baseline.get(name)
+        if expected and not pytestconfig.getoption("--bench-save"):
+            limit = expected["p95_ms"] * (1 + pytestconfig.getoption("--bench-threshold"))
+            assert (
+                result["queries"] <= expected["queries"]
+            ), f"{name}: {result['queries']} queries, baseline {expected['queries']}"
+            assert result["p95_ms"] <= limit, f"{name}: p95 {result['p95_ms']}ms over {limit:.3f}ms"
+        return result
+
+    return run
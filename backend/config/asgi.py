@@ -0,0 +1,7 @@
+import os
+from django.core.asgi import get_asgi_application
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+# serve the read endpoints that have async variants without tying up a thread
+os.environ.setdefault("ASYNC_VIEWS", "true")
+application = get_asgi_application()
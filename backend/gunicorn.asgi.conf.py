@@ -0,0 +1,9 @@
+# ASGI profile: gunicorn config.asgi:application -c gunicorn.asgi.conf.py
+# Each worker is an event loop; requests waiting on the database, the cache or a slow client
+# don't hold a thread, so concurrency isn't capped at workers x threads.
+bind = "0.0.0.0:8003"
+workers = 3
+worker_class = "uvicorn_worker.UvicornWorker"
+max_requests = 1000
+max_requests_jitter = 50
+preload_app = True